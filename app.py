@@ -1,26 +1,36 @@
 # app.py - Application Factory for RentVerify
 
+from utils import startup
+startup.begin()
+
 import os
 import sys
 import logging
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from pathlib import Path
 from flask import Flask
 from dotenv import load_dotenv
+from services import db_service
+from utils.auth import login_required
+from utils.settings import init_settings, install_reload_handler
 
 def create_app():
     """
     Application factory for RentVerify.
     Initializes Flask, loads config, and registers blueprints.
+    Each step is timed; see utils/startup.py and /health/startup.
     """
     # Load environment variables
-    BASE_DIR = Path(__file__).resolve().parent
-    ENV_PATH = BASE_DIR / '.env'
-    if ENV_PATH.exists():
-        load_dotenv(dotenv_path=ENV_PATH, override=True)
-    else:
-        load_dotenv()
+    with startup.phase('load_env'):
+        BASE_DIR = Path(__file__).resolve().parent
+        ENV_PATH = BASE_DIR / '.env'
+        if ENV_PATH.exists():
+            load_dotenv(dotenv_path=ENV_PATH, override=True)
+        else:
+            load_dotenv()
+
+        # Parse and validate configuration once; SIGHUP re-reads the live tunables
+        settings = init_settings()
+        install_reload_handler()
 
     # Logging configuration
     logging.basicConfig(
@@ -33,11 +43,20 @@ def create_app():
     logger.info("Application factory started")
 
     # Initialize Flask app
-    app = Flask(__name__, instance_relative_config=True)
+    with startup.phase('flask_app'):
+        app = Flask(__name__, instance_relative_config=True)
+
+        # Register error handlers
+        from utils.error_handlers import register_error_handlers
+        register_error_handlers(app)
 
-    # Register error handlers
-    from utils.error_handlers import register_error_handlers
-    register_error_handlers(app)
+        # Request timing hooks and /metrics endpoint
+        from utils.metrics import register_metrics
+        register_metrics(app)
+
+        # Fingerprinted, precompressed static assets and response gzip
+        from utils.assets import register_assets
+        register_assets(app)
 
     # Secret key configuration
     SECRET_KEY = os.getenv('SECRET_KEY')
@@ -56,98 +75,86 @@ def create_app():
     os.makedirs(app.instance_path, exist_ok=True)
 
     # Database configuration
-    DATABASE_URL = os.getenv('DATABASE_URL')
-    if not DATABASE_URL:
+    if not settings.is_postgres:
         logger.warning("DATABASE_URL not found - database features may not work")
     else:
         logger.info("DATABASE_URL found - PostgreSQL mode enabled")
-        # Initialize database tables
-        try:
-            init_database(DATABASE_URL, logger)
-        except Exception as e:
-            logger.error(f"Database initialization error: {e}")
-            # Continue anyway - tables might already exist
+        # Under gunicorn the master applies migrations once before forking
+        # (gunicorn.conf.py); otherwise this is a single version SELECT.
+        if not os.getenv('RENTVERIFY_SCHEMA_READY'):
+            with startup.phase('ensure_schema'):
+                try:
+                    from services.schema import ensure_schema
+                    ensure_schema()
+                except Exception as e:
+                    logger.error(f"Database initialization error: {e}")
+                    # Continue anyway - tables might already exist
 
     # Database connection functions
     def get_db_connection():
-        """Get PostgreSQL database connection."""
-        db_url = os.getenv('DATABASE_URL')
-        if not db_url:
+        """Get a pooled PostgreSQL database connection."""
+        if not settings.is_postgres:
             raise ValueError("DATABASE_URL not set")
-        conn = psycopg2.connect(db_url)
-        return conn
+        return db_service.get_db_connection()
 
     def return_db_connection(conn):
-        """Return connection to pool (close for PostgreSQL)."""
-        if conn:
-            conn.close()
+        """Return connection to the pool."""
+        db_service.close_db_connection(conn)
 
-    def mask_phone_number(phone_number):
-        """Mask phone number for privacy (show last 4 digits)."""
-        if not phone_number or len(phone_number) < 4:
-            return phone_number
-        return '******' + phone_number[-4:]
+    # Same masking as the pages (last four digits, formatting ignored)
+    from services.phone import mask_phone as mask_phone_number
 
     # Make functions available to app and blueprints
     app.get_db_connection = get_db_connection
     app.return_db_connection = return_db_connection
     app.mask_phone_number = mask_phone_number
     app.logger = logger
+    app.login_required = login_required
+
+    # Resolve blueprint helpers once (see utils/extensions.py)
+    from utils.extensions import register_services
+    register_services(app, logger, mask_phone_number, is_postgres=settings.is_postgres)
 
     # Register blueprints
-    from routes.sms import sms_bp
-    from routes.dashboard import dashboard_bp
-    app.register_blueprint(sms_bp)
-    app.register_blueprint(dashboard_bp)
-    
-    # Register relay blueprint (optional - for forwarding to multiple endpoints)
-    try:
-        from routes.relay import relay_bp
-        app.register_blueprint(relay_bp)
-    except ImportError:
-        pass  # Relay is optional
-
-    # Health check endpoint for Azure App Service
-    from flask import jsonify
-    @app.route('/health')
-    def health_check():
-        """Health check endpoint for Azure App Service monitoring."""
+    with startup.phase('blueprints'):
+        from routes.sms import sms_bp
+        from routes.dashboard import dashboard_bp
+        from routes.analytics import analytics_bp
+        from routes.conversation import conversation_bp
+        from routes.search import search_bp
+        from routes.api import api_bp
+        from routes.events import events_bp
+        app.register_blueprint(sms_bp)
+        app.register_blueprint(dashboard_bp)
+        app.register_blueprint(analytics_bp)
+        app.register_blueprint(conversation_bp)
+        app.register_blueprint(search_bp)
+        app.register_blueprint(api_bp)
+        app.register_blueprint(events_bp)
+
+        # Register relay blueprint (optional - for forwarding to multiple endpoints)
         try:
-            # Basic health check - just return OK
-            # Optionally check database connectivity
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            if DATABASE_URL:
-                try:
-                    conn = psycopg2.connect(DATABASE_URL, connect_timeout=5)
-                    conn.close()
-                    return jsonify({'status': 'healthy', 'database': 'connected'}), 200
-                except Exception as db_error:
-                    logger.warning(f"Database health check failed: {db_error}")
-                    return jsonify({'status': 'degraded', 'database': 'disconnected'}), 503
-            return jsonify({'status': 'healthy'}), 200
-        except Exception as e:
-            logger.error(f"Health check error: {e}")
-            return jsonify({'status': 'unhealthy', 'error': str(e)}), 503
+            from routes.relay import relay_bp
+            app.register_blueprint(relay_bp)
+        except ImportError:
+            pass  # Relay is optional
+
+        # Liveness/readiness probes served from a cached background check
+        from utils.health import register_health
+        register_health(app)
 
     # Import and register authentication and root routes
     from flask import request, render_template, session, redirect, url_for, flash
-    from werkzeug.security import generate_password_hash, check_password_hash
-
-    # Admin credentials (fixed as requested)
-    ADMIN_USERNAME = 'amina'
-    ADMIN_PASSWORD = 'amina0000'
-    ADMIN_PASSWORD_HASH = generate_password_hash(ADMIN_PASSWORD)
-
-    def login_required(f):
-        from functools import wraps
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if 'logged_in' not in session:
-                flash('Please log in to access this page.', 'warning')
-                return redirect(url_for('login'))
-            return f(*args, **kwargs)
-        return decorated_function
-    app.login_required = login_required
+    from utils.auth import check_admin_credentials
+
+    with startup.phase('diagnostics'):
+        # On-demand cProfile capture with admin report pages
+        from utils.profiling import register_profiling
+        register_profiling(app, login_required)
+
+        # Log statements over SLOW_QUERY_MS with sampled EXPLAIN plans
+        from utils.slow_query_log import register_slow_query_log
+        register_slow_query_log(app, login_required)
 
     # Make logger available globally
     app.logger_instance = logger
@@ -159,7 +166,7 @@ def create_app():
         if request.method == 'POST':
             username = request.form.get('username', '').strip()
             password = request.form.get('password', '').strip()
-            if username == ADMIN_USERNAME and check_password_hash(ADMIN_PASSWORD_HASH, password):
+            if check_admin_credentials(username, password):
                 session['logged_in'] = True
                 session['username'] = username
                 session.permanent = True
@@ -185,192 +192,60 @@ def create_app():
             return redirect(url_for('dashboard.dashboard'))
         return redirect(url_for('login'))
 
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create or upgrade the database schema."""
+        from services.schema import ensure_schema
+        print(f"Schema version: {ensure_schema()}")
+
+    @app.cli.command('rollup-analytics')
+    def rollup_analytics_command():
+        """Refresh the analytics rollups (schedule nightly)."""
+        from services.analytics_service import rollup
+        print(f"Analytics rollup: {db_service.write(lambda conn: rollup(conn, settings.is_postgres))}")
+
+    # Pre-open connections, compile templates etc. before taking traffic
+    from utils.warmup import register_warmup
+    register_warmup(app)
+
+    startup.finish(app, logger)
     return app
 
 
-def init_database(database_url, logger):
-    """Initialize PostgreSQL database tables if they don't exist."""
-    try:
-        conn = psycopg2.connect(database_url)
-        cursor = conn.cursor()
-        
-        # Create rent_records table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rent_records (
-                id SERIAL PRIMARY KEY,
-                phone_number TEXT NOT NULL,
-                reply TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                record_type TEXT DEFAULT 'tenant'
-            )
-        ''')
-        
-        # Add record_type column if it doesn't exist (for existing databases)
-        cursor.execute('''
-            DO $$ 
-            BEGIN
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='rent_records' AND column_name='record_type'
-                ) THEN
-                    ALTER TABLE rent_records ADD COLUMN record_type TEXT DEFAULT 'tenant';
-                END IF;
-            END $$;
-        ''')
-        
-        # Create payments table (if needed)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS payments (
-                id SERIAL PRIMARY KEY,
-                phone_number TEXT NOT NULL,
-                status TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create tenants table - simplified for credit reporting
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tenants (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                address TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                email TEXT,
-                rent_amount DECIMAL(10, 2) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create landlords table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS landlords (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                address TEXT NOT NULL,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create outgoing_messages table - messages sent from dashboard/system to landlords
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS outgoing_messages (
-                id SERIAL PRIMARY KEY,
-                landlord_name TEXT NOT NULL,
-                landlord_phone TEXT NOT NULL,
-                landlord_address TEXT NOT NULL,
-                landlord_email TEXT,
-                message_body TEXT NOT NULL,
-                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                twilio_message_sid TEXT,
-                status TEXT DEFAULT 'sent'
-            )
-        ''')
-        
-        # Create incoming_messages table - landlord replies (yes/no) from Twilio
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS incoming_messages (
-                id SERIAL PRIMARY KEY,
-                landlord_phone TEXT NOT NULL,
-                message_body TEXT NOT NULL,
-                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                twilio_message_sid TEXT,
-                is_yes BOOLEAN DEFAULT FALSE,
-                is_no BOOLEAN DEFAULT FALSE
-            )
-        ''')
-        
-        # Create landlord_record table - landlord payment records
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS landlord_record (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                email TEXT,
-                home_address TEXT NOT NULL,
-                num_units INTEGER DEFAULT 0,
-                reply TEXT,
-                timestamp TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Add new columns to existing landlord_record table if they don't exist
-        cursor.execute('''
-            DO $$ 
-            BEGIN
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='landlord_record' AND column_name='name'
-                ) THEN
-                    ALTER TABLE landlord_record ADD COLUMN name TEXT;
-                END IF;
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='landlord_record' AND column_name='email'
-                ) THEN
-                    ALTER TABLE landlord_record ADD COLUMN email TEXT;
-                END IF;
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='landlord_record' AND column_name='home_address'
-                ) THEN
-                    ALTER TABLE landlord_record ADD COLUMN home_address TEXT;
-                END IF;
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='landlord_record' AND column_name='num_units'
-                ) THEN
-                    ALTER TABLE landlord_record ADD COLUMN num_units INTEGER DEFAULT 0;
-                END IF;
-            END $$;
-        ''')
-        
-        # Update tenants table structure to also store payment records
-        # Check if reply and timestamp columns exist in tenants table
-        cursor.execute('''
-            DO $$ 
-            BEGIN
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='tenants' AND column_name='reply'
-                ) THEN
-                    ALTER TABLE tenants ADD COLUMN reply TEXT;
-                END IF;
-                IF NOT EXISTS (
-                    SELECT 1 FROM information_schema.columns 
-                    WHERE table_name='tenants' AND column_name='timestamp'
-                ) THEN
-                    ALTER TABLE tenants ADD COLUMN timestamp TEXT;
-                END IF;
-            END $$;
-        ''')
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info("Database tables initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-        raise
-
-
-# For flask run compatibility
-app = create_app()
-
-# Make functions available at module level for imports
-get_db_connection = app.get_db_connection
-return_db_connection = app.return_db_connection
-mask_phone_number = app.mask_phone_number
-login_required = app.login_required
-logger = app.logger_instance
+# ==================== Module-level App ====================
+# The app is built on first access (gunicorn's `app:app`, `flask run`, or
+# `from app import logger`) rather than at import, so importing this module
+# for tooling or migrations doesn't pay for the whole factory.
+
+_app = None
+
+_APP_HELPERS = {
+    'get_db_connection': 'get_db_connection',
+    'return_db_connection': 'return_db_connection',
+    'mask_phone_number': 'mask_phone_number',
+    'login_required': 'login_required',
+    'logger': 'logger_instance',
+}
+
+
+def get_app():
+    """Return the process-wide app, creating it on first use."""
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name):
+    if name == 'app':
+        return get_app()
+    if name in _APP_HELPERS:
+        return getattr(get_app(), _APP_HELPERS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # For direct execution
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV') != 'production'
-    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    get_app().run(host='0.0.0.0', port=port, debug=debug)
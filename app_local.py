@@ -3,19 +3,18 @@ Local Development Version - Uses SQLite instead of PostgreSQL
 Run this for local testing when you don't have PostgreSQL installed
 """
 
+from utils import startup
+startup.begin()
+
 import os
-import csv
 import sqlite3
 import logging
 import sys
-from io import StringIO
-from datetime import datetime
-from functools import wraps
 from pathlib import Path
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask import Flask, request, render_template, session, redirect, url_for, flash, make_response
-from twilio.twiml.messaging_response import MessagingResponse
+from flask import Flask, request, render_template, session, redirect, url_for, flash
 from dotenv import load_dotenv
+from utils.auth import admin_username, check_admin_credentials, login_required, DEFAULT_ADMIN_PASSWORD
+from utils.settings import init_settings, install_reload_handler
 
 # ==================== Environment Configuration ====================
 
@@ -27,6 +26,10 @@ if ENV_PATH.exists():
 else:
     load_dotenv()
 
+# Parse and validate configuration once; SIGHUP re-reads the live tunables
+settings = init_settings()
+install_reload_handler()
+
 # ==================== Logging Configuration ====================
 
 logging.basicConfig(
@@ -51,10 +54,13 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600
 
-# Admin credentials (fixed as requested)
-ADMIN_USERNAME = 'amina'
-ADMIN_PASSWORD = 'amina0000'
-ADMIN_PASSWORD_HASH = generate_password_hash(ADMIN_PASSWORD)
+# Request timing hooks and /metrics endpoint
+from utils.metrics import register_metrics
+register_metrics(app)
+
+# Fingerprinted, precompressed static assets and response gzip
+from utils.assets import register_assets
+register_assets(app)
 
 # Ensure the instance folder exists
 os.makedirs(app.instance_path, exist_ok=True)
@@ -73,145 +79,35 @@ def get_db_connection():
 
 
 def init_db():
-    """Initialize the database and create tables if they don't exist."""
+    """Create or upgrade the SQLite schema (a single version SELECT once current)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Create payments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone_number TEXT NOT NULL,
-                status TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create rent_records table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rent_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone_number TEXT NOT NULL,
-                reply TEXT NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        ''')
-        
-        # Create tenants table - simplified for credit reporting
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tenants (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                address TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                email TEXT,
-                rent_amount REAL NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create landlords table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS landlords (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                address TEXT NOT NULL,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create outgoing_messages table - messages sent from dashboard/system to landlords
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS outgoing_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                landlord_name TEXT NOT NULL,
-                landlord_phone TEXT NOT NULL,
-                landlord_address TEXT NOT NULL,
-                landlord_email TEXT,
-                message_body TEXT NOT NULL,
-                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                twilio_message_sid TEXT,
-                status TEXT DEFAULT 'sent'
-            )
-        ''')
-        
-        # Create incoming_messages table - landlord replies (yes/no) from Twilio
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS incoming_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                landlord_phone TEXT NOT NULL,
-                message_body TEXT NOT NULL,
-                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                twilio_message_sid TEXT,
-                is_yes INTEGER DEFAULT 0,
-                is_no INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Create landlord_record table - landlord payment records
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS landlord_record (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                email TEXT,
-                home_address TEXT NOT NULL,
-                num_units INTEGER DEFAULT 0,
-                reply TEXT,
-                timestamp TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Add new columns to existing landlord_record table if they don't exist
-        cursor.execute("PRAGMA table_info(landlord_record)")
-        landlord_cols = [col[1] for col in cursor.fetchall()]
-        if 'name' not in landlord_cols:
-            cursor.execute("ALTER TABLE landlord_record ADD COLUMN name TEXT")
-        if 'email' not in landlord_cols:
-            cursor.execute("ALTER TABLE landlord_record ADD COLUMN email TEXT")
-        if 'home_address' not in landlord_cols:
-            cursor.execute("ALTER TABLE landlord_record ADD COLUMN home_address TEXT")
-        if 'num_units' not in landlord_cols:
-            cursor.execute("ALTER TABLE landlord_record ADD COLUMN num_units INTEGER DEFAULT 0")
-        
-        # Update tenants table - add reply and timestamp columns if they don't exist
-        cursor.execute("PRAGMA table_info(tenants)")
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'reply' not in columns:
-            cursor.execute("ALTER TABLE tenants ADD COLUMN reply TEXT")
-        if 'timestamp' not in columns:
-            cursor.execute("ALTER TABLE tenants ADD COLUMN timestamp TEXT")
-        
-        conn.commit()
-        conn.close()
-        logger.info("SQLite database initialized successfully")
+        from services.schema import ensure_schema
+        ensure_schema()
     except Exception as e:
         logger.error(f"Database initialization error: {e}")
         raise
 
 
 # Initialize the database on startup
-init_db()
+with startup.phase('ensure_schema'):
+    init_db()
 
 
-# ==================== Authentication Decorator ====================
+# ==================== Blueprint Services ====================
 
-def login_required(f):
-    """Decorator to protect routes - requires login."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'logged_in' not in session:
-            flash('Please log in to access this page.', 'warning')
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated_function
+# Resolve blueprint helpers once (see utils/extensions.py); phone numbers are
+# masked with services.phone.mask_phone, as in production.
+from utils.extensions import register_services
+register_services(app, logger, is_postgres=settings.is_postgres, dev_tools=True)
+
+
+# On-demand cProfile capture with admin report pages
+from utils.profiling import register_profiling
+register_profiling(app, login_required)
+
+# Log statements over SLOW_QUERY_MS with sampled EXPLAIN plans
+from utils.slow_query_log import register_slow_query_log
+register_slow_query_log(app, login_required)
 
 
 # ==================== Authentication Routes ====================
@@ -226,7 +122,7 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '').strip()
         
-        if username == ADMIN_USERNAME and check_password_hash(ADMIN_PASSWORD_HASH, password):
+        if check_admin_credentials(username, password):
             session['logged_in'] = True
             session['username'] = username
             session.permanent = True
@@ -261,13 +157,40 @@ def index():
 
 
 
+# ==================== Health Probes ====================
+from utils.health import register_health
+register_health(app)
+
+
 # ==================== SMS Webhook Route (moved) ====================
 # The SMS webhook handler was moved to `routes/sms.py` as the `sms_bp` blueprint.
-from routes.sms import sms_bp
-app.register_blueprint(sms_bp)
+with startup.phase('blueprints'):
+    from routes.sms import sms_bp
+    app.register_blueprint(sms_bp)
+
+    from routes.dashboard import dashboard_bp
+    app.register_blueprint(dashboard_bp)
+
+    from routes.analytics import analytics_bp
+    app.register_blueprint(analytics_bp)
+
+    from routes.conversation import conversation_bp
+    app.register_blueprint(conversation_bp)
+
+    from routes.search import search_bp
+    app.register_blueprint(search_bp)
+
+    from routes.api import api_bp
+    app.register_blueprint(api_bp)
+
+    from routes.events import events_bp
+    app.register_blueprint(events_bp)
+
+# Pre-open connections, compile templates etc. before taking traffic
+from utils.warmup import register_warmup
+register_warmup(app)
 
-from routes.dashboard import dashboard_bp
-app.register_blueprint(dashboard_bp)
+startup.finish(app, logger)
 # ==================== Run Application ====================
 
 if __name__ == '__main__':
@@ -276,8 +199,8 @@ if __name__ == '__main__':
     print("LOCAL DEVELOPMENT SERVER")
     print(f"{'='*60}")
     print(f"URL: http://localhost:{port}")
-    print(f"Username: {ADMIN_USERNAME}")
-    print(f"Password: {ADMIN_PASSWORD}")
+    print(f"Username: {admin_username()}")
+    print(f"Password: {os.getenv('ADMIN_PASSWORD', DEFAULT_ADMIN_PASSWORD)}")
     print(f"Database: {DB_PATH}")
     print(f"{'='*60}\n")
     app.run(host='0.0.0.0', port=port, debug=True)
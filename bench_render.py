@@ -0,0 +1,72 @@
+"""
+Render benchmark: phone masking in the Jinja loop vs once in Python
+
+Renders a phone-number table of 100 / 1,000 / 10,000 synthetic rows two ways:
+- template: the old per-character digit loop inside the template
+- python:   services.phone.mask_phone() per row, plain {{ msg.phone }}
+
+Run: python bench_render.py
+"""
+
+import time
+from jinja2 import Environment
+from services.phone import mask_phone
+
+ROW_COUNTS = (100, 1000, 10000)
+REPEAT = 5
+
+TEMPLATE_MASKING = Environment(autoescape=True).from_string("""
+{% for msg in rows %}<tr><td>{{ msg.name }}</td><td>
+    {% set phone = msg.phone | string %}
+    {% set cleaned = phone | replace('+', '') | replace('-', '') | replace('(', '') | replace(')', '') | replace(' ', '') %}
+    {% set digits_only = [] %}
+    {% for char in cleaned %}
+        {% if char.isdigit() %}
+            {% set _ = digits_only.append(char) %}
+        {% endif %}
+    {% endfor %}
+    {% if digits_only | length >= 4 %}
+        ******{{ digits_only[-4:] | join('') }}
+    {% else %}
+        {{ msg.phone }}
+    {% endif %}
+</td></tr>{% endfor %}
+""")
+
+PLAIN_OUTPUT = Environment(autoescape=True).from_string("""
+{% for msg in rows %}<tr><td>{{ msg.name }}</td><td>
+    {{ msg.phone }}
+</td></tr>{% endfor %}
+""")
+
+
+def make_rows(count):
+    return [{'name': f"Landlord {i}", 'phone': f"+1 (555) {i % 1000:03d}-{i % 10000:04d}"} for i in range(count)]
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def render_python(rows):
+    shaped = [{'name': row['name'], 'phone': mask_phone(row['phone'])} for row in rows]
+    return PLAIN_OUTPUT.render(rows=shaped)
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Phone masking render benchmark (best of %d)" % REPEAT)
+    print("=" * 60)
+    print(f"{'rows':>8} {'template':>12} {'python':>12} {'speedup':>9}")
+    for count in ROW_COUNTS:
+        rows = make_rows(count)
+        mask_phone.cache_clear()
+        template_seconds = best_of(lambda: TEMPLATE_MASKING.render(rows=rows))
+        python_seconds = best_of(lambda: (mask_phone.cache_clear(), render_python(rows)))
+        print(f"{count:>8} {template_seconds * 1000:>10.1f}ms {python_seconds * 1000:>10.1f}ms "
+              f"{template_seconds / python_seconds:>8.1f}x")
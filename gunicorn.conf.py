@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration for RentVerify
+
+Loaded automatically by gunicorn from the working directory, so the
+Procfile / startup.sh command lines keep working unchanged.
+"""
+
+import os
+import shutil
+import tempfile
+
+# ==================== Prometheus Multiprocess Mode ====================
+# Each worker writes its metric values to this directory and /metrics
+# aggregates them. It must be set before prometheus_client is imported.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'rentverify-metrics')
+)
+
+# ==================== Workers ====================
+# Threaded workers: a live dashboard stream (/events) holds its thread for
+# minutes, which would block a sync worker outright. The Procfile / startup.sh
+# --workers count still applies.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+
+def on_starting(server):
+    """
+    Runs once in the master before any worker is forked.
+    Resets the metrics directory and applies schema migrations, so workers
+    skip DDL during their own startup.
+    """
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if os.getenv('DATABASE_URL'):
+        from services import db_service
+        from services.schema import ensure_schema
+        try:
+            ensure_schema()
+            os.environ['RENTVERIFY_SCHEMA_READY'] = '1'
+        except Exception as e:
+            server.log.error(f"Schema migration failed; workers will retry: {e}")
+        finally:
+            # Don't leak the master's connections into forked workers
+            db_service.close_pool()
+
+
+def post_worker_init(worker):
+    """
+    Hold a freshly loaded worker until its warm-up finishes, so it never serves cold.
+    Also (re)installs the SIGHUP settings reload, which gunicorn resets in each worker.
+    """
+    from utils.settings import get_settings, install_reload_handler
+    install_reload_handler()
+
+    app = worker.wsgi
+    warmup = getattr(app, 'extensions', {}).get('warmup')
+    if warmup is None:
+        return
+    timeout = get_settings().warmup_timeout
+    if not warmup.wait(timeout):
+        worker.log.warning(f"Warm-up still running after {timeout:.0f}s; accepting traffic anyway")
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a worker that exited."""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
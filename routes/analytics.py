@@ -0,0 +1,85 @@
+"""
+Analytics Blueprint for RentVerify
+
+- /analytics: time-to-reply histogram, daily YES/NO/no-reply trend and
+  per-landlord response rates
+- /api/analytics: the same report as JSON
+
+Both read the rollups maintained by services/analytics_service.py.
+"""
+
+from flask import Blueprint, render_template, request, jsonify, flash
+from services import db_service
+from services.analytics_service import rollup_is_current, ensure_rollup, get_analytics
+from services.verification_service import format_duration
+from services.phone import phone_hash, mask_phone
+from utils.auth import login_required
+from utils.extensions import get_services
+
+analytics_bp = Blueprint('analytics', __name__)
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 3650
+
+
+def _requested_days():
+    try:
+        days = int(request.args.get('days', DEFAULT_DAYS))
+    except ValueError:
+        days = DEFAULT_DAYS
+    return max(1, min(days, MAX_DAYS))
+
+
+def _load_report(days):
+    services = get_services()
+    conn = db_service.get_read_connection()
+    try:
+        if not rollup_is_current(conn):
+            # Rare (the nightly job didn't run): roll up through the writer,
+            # which re-checks in case another request got there first
+            db_service.write(lambda write_conn: ensure_rollup(write_conn, services.is_postgres))
+        report = get_analytics(conn, services.is_postgres, days=days)
+    finally:
+        db_service.close_db_connection(conn)
+    # Numbers leave the server masked, like everywhere else
+    for landlord in report['landlords']:
+        phone_key = landlord.pop('phone_key')
+        landlord['phone'] = mask_phone(phone_key)
+        landlord['phone_hash'] = phone_hash(phone_key)
+    return report
+
+
+# ==================== Analytics Page ====================
+@analytics_bp.route('/analytics')
+@login_required
+def analytics():
+    """Response latency and response rates (protected route)."""
+    services = get_services()
+    days = _requested_days()
+    try:
+        report = _load_report(days)
+    except Exception as e:
+        services.logger.error(f"Error loading analytics: {e}")
+        flash('Error loading analytics data.', 'danger')
+        report = {'days': days, 'totals': {}, 'latency_histogram': [], 'daily': [], 'landlords': []}
+    histogram_max = max([bucket['count'] for bucket in report['latency_histogram']] + [1])
+    return render_template(
+        'analytics.html',
+        report=report,
+        days=days,
+        histogram_max=histogram_max,
+        format_duration=format_duration
+    )
+
+
+# ==================== Analytics API ====================
+@analytics_bp.route('/api/analytics')
+@login_required
+def analytics_api():
+    """Analytics report as JSON; ?days= selects the period (default 30)."""
+    services = get_services()
+    try:
+        return jsonify(_load_report(_requested_days()))
+    except Exception as e:
+        services.logger.error(f"Error loading analytics: {e}")
+        return jsonify({'error': 'Could not load analytics'}), 500
@@ -0,0 +1,152 @@
+"""
+Read API Blueprint for RentVerify (/api/v1)
+
+- /api/v1/landlords, /api/v1/tenants
+- /api/v1/messages/outgoing, /api/v1/messages/incoming
+- /api/v1/stats
+
+List endpoints take ?fields=a,b (field selection), ?limit=N, ?cursor=
+(the next_cursor of the previous page) and the record filters ?from=, ?to=
+(YYYY-MM-DD), ?status=yes|no|pending, ?type=landlord|tenant and ?phone=
+(trailing digits), and return {"data": [...], "next_cursor": ...}.
+
+Every response carries a strong ETag built from the data version (see
+services/data_version.py), the current DASHBOARD_CACHE_TTL window and the
+request URL. A poll whose If-None-Match still matches gets a 304 after the
+one-row version lookup, without running any of the data queries; writes
+that never bumped the version show up within one TTL window. With a TTL of
+0 no ETag is sent. Bodies are compact JSON (gzipped when large, which
+weakens the ETag; If-None-Match is compared weakly).
+"""
+
+import json
+import hashlib
+from flask import Blueprint, Response, request
+from services import db_service
+from services.api_service import (
+    RESOURCES, DEFAULT_LIMIT, select_fields, check_filters, list_resource, get_stats
+)
+from services.data_version import current_version, version_tag
+from utils.auth import login_required
+from utils.extensions import get_services
+from utils.settings import get_settings
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def _json_response(payload, status=200):
+    body = json.dumps(payload, separators=(',', ':'), default=str)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _error(message, status):
+    return _json_response({'error': message}, status)
+
+
+def _etag(version):
+    """Strong validator: same data version, TTL window and URL -> same bytes (None: no ETag)."""
+    tag = version_tag(version, get_settings().dashboard_cache_ttl)
+    if tag is None:
+        return None
+    digest = hashlib.sha1(request.full_path.encode()).hexdigest()[:16]
+    return f"{tag}-{digest}"
+
+
+def _conditional(load):
+    """
+    Serve load(conn)'s payload, or a 304 if the client's copy is current.
+
+    Args:
+        load (func): Builds the JSON payload from a connection
+    """
+    services = get_services()
+    etag = None
+    try:
+        conn = db_service.get_read_connection()
+        try:
+            etag = _etag(current_version(conn))
+            if etag and request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = _json_response(load(conn))
+        finally:
+            db_service.close_db_connection(conn)
+    except Exception as e:
+        services.logger.error(f"Error serving {request.path}: {e}")
+        return _error('Could not load data', 500)
+    if etag:
+        response.set_etag(etag)
+    # Clients may keep the body but must revalidate before reusing it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _list(resource):
+    try:
+        fields = select_fields(resource, request.args.get('fields'))
+        filters = db_service.parse_filters(request.args)
+        check_filters(resource, filters)
+    except ValueError as e:
+        return _error(str(e), 400)
+    try:
+        cursor = request.args.get('cursor')
+        cursor = int(cursor) if cursor else None
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return _error('cursor and limit must be integers', 400)
+
+    def load(conn):
+        items, next_cursor = list_resource(
+            conn, get_services().is_postgres, resource, fields, cursor=cursor, limit=limit, filters=filters
+        )
+        return {'data': items, 'next_cursor': next_cursor}
+    return _conditional(load)
+
+
+# ==================== Records ====================
+@api_bp.route('/landlords')
+@login_required
+def landlords():
+    """Landlord records, newest first."""
+    return _list('landlords')
+
+
+@api_bp.route('/tenants')
+@login_required
+def tenants():
+    """Tenant records, newest first."""
+    return _list('tenants')
+
+
+# ==================== Messages ====================
+@api_bp.route('/messages/<direction>')
+@login_required
+def messages(direction):
+    """Outgoing or incoming messages, newest first."""
+    if direction not in ('outgoing', 'incoming'):
+        return _error("direction must be 'outgoing' or 'incoming'", 404)
+    return _list(direction)
+
+
+# ==================== Stats ====================
+@api_bp.route('/stats')
+@login_required
+def stats():
+    """YES/NO/pending totals and verification request stats."""
+    return _conditional(lambda conn: get_stats(conn, get_services().is_postgres))
+
+
+# ==================== Index ====================
+@api_bp.route('/')
+@login_required
+def index():
+    """List the available resources and their fields."""
+    return _json_response({
+        'resources': {
+            'landlords': list(RESOURCES['landlords'][1]),
+            'tenants': list(RESOURCES['tenants'][1]),
+            'messages/outgoing': list(RESOURCES['outgoing'][1]),
+            'messages/incoming': list(RESOURCES['incoming'][1]),
+            'stats': [],
+        }
+    })
@@ -0,0 +1,57 @@
+"""
+Conversation Blueprint for RentVerify
+
+/conversation/<phone_hash> shows every message sent to and received from one
+number, newest first, with the landlord/tenant details on file. The URL
+carries the number's keyed hash rather than the number itself.
+"""
+
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from werkzeug.exceptions import HTTPException
+from services import db_service
+from services.phone import mask_phone
+from services.conversation_service import find_phone_key, get_conversation, get_contact, decode_cursor
+from utils.auth import login_required
+from utils.extensions import get_services
+
+conversation_bp = Blueprint('conversation', __name__)
+
+
+# ==================== Conversation Route ====================
+@conversation_bp.route('/conversation/<phone_hash>')
+@login_required
+def conversation(phone_hash):
+    """One number's message thread (protected route); ?before= pages back."""
+    services = get_services()
+    logger = services.logger
+    before = None
+    if request.args.get('before'):
+        before = decode_cursor(request.args['before'])
+        if before is None:
+            abort(400)
+    try:
+        conn = db_service.get_read_connection()
+        try:
+            phone_key = find_phone_key(conn.cursor(), services.is_postgres, phone_hash)
+            if phone_key is None:
+                abort(404)
+            messages, next_cursor = get_conversation(conn, services.is_postgres, phone_key, before=before)
+            contact = get_contact(conn, services.is_postgres, phone_key)
+        finally:
+            db_service.close_db_connection(conn)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading conversation: {e}")
+        flash('Error loading conversation.', 'danger')
+        return redirect(url_for('dashboard.dashboard'))
+
+    return render_template(
+        'conversation.html',
+        phone=mask_phone(phone_key),
+        phone_hash=phone_hash,
+        contact=contact,
+        messages=messages,
+        next_cursor=next_cursor,
+        paged=before is not None
+    )
@@ -2,450 +2,315 @@
 Dashboard Blueprint for RentVerify
 
 This blueprint contains all dashboard-related routes, including:
-- Dashboard HTML view
+- Dashboard HTML view (page shell plus one fragment endpoint per section)
 - CSV export endpoint
+Both take the record filters (?from=, ?to=, ?status=, ?type=, ?phone=; see
+db_service.parse_filters).
 - Test data endpoint (local only)
-
-Business logic and template rendering are unchanged.
 """
 
 
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash, make_response
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, make_response, abort
+from markupsafe import escape
 from utils.validators import validate_dashboard_form
 from datetime import datetime
 import csv
+import hashlib
 from io import StringIO
 from services import db_service
-from services.twilio_service import send_sms_to_landlord
+from services.twilio_service import send_sms_to_landlord, upsert_entity
+from services.phone import phone_columns, mask_phone
+from services.verification_service import verification_stats, format_duration
+from services.dashboard_service import (
+    outgoing_query, incoming_query, landlord_query, tenant_query, export_query,
+    fetch_rows, fetch_sections, make_outgoing, make_incoming, make_landlord, make_tenant
+)
+from utils.auth import login_required
+from utils.extensions import get_services
+from utils.settings import get_settings
+from utils.cache import TTLCache
+from services.data_version import current_version, bump_version, version_tag
 
 # Create the dashboard blueprint
 # url_prefix is not set, so routes are registered at the root level
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Rendered section fragments per (section, data version, filters); a few
+# versions each, for workers that lag a write, plus the filtered views in use
+_section_cache = TTLCache('dashboard', maxsize=64)
+
+
+class SectionIncomplete(Exception):
+    """
+    A section rendered with one of its sources unreadable (shown empty).
+    Raised out of the cache loader so the fragment is served once but never
+    cached or given an ETag, which would pin the gap until the next write.
+    """
+
+    def __init__(self, html):
+        super().__init__('section rendered without all of its data')
+        self.html = html
+
+
+def _fetch(services, conn, table, build_query, make_row, filters):
+    """
+    One section's rows.
+
+    Returns:
+        tuple: (rows, failed); rows is [] (logged) if the table can't be read
+    """
+    query, params = build_query(filters, services.is_postgres)
+    try:
+        return fetch_rows(conn, services.is_postgres, query, make_row, params), False
+    except Exception as e:
+        services.logger.warning(f"Could not fetch {table} (table may not exist yet): {e}")
+        conn.rollback()
+        return [], True
+
+
+# Section loaders return (template context, failed)
+
+def _outgoing_section(services, conn, filters):
+    """Outbound messages with their verification state, plus request stats."""
+    is_postgres = services.is_postgres
+    query, params = outgoing_query(filters, is_postgres)
+    # Rows and stats are independent; concurrent on PostgreSQL
+    sections, errors = fetch_sections(conn, is_postgres, {
+        'outgoing_messages': lambda c: fetch_rows(c, is_postgres, query, make_outgoing, params),
+        'verification_requests': lambda c: verification_stats(c.cursor(), is_postgres),
+    })
+    for name, error in errors.items():
+        services.logger.warning(f"Could not fetch {name} (table may not exist yet): {error}")
+    outgoing_messages = sections.get('outgoing_messages', [])
+    verification = sections.get('verification_requests') or {
+        'open': 0, 'resolved': 0, 'avg_reply_seconds': None, 'max_reply_seconds': None
+    }
+    return dict(
+        outgoing_messages=outgoing_messages,
+        outgoing_total=len(outgoing_messages),
+        verification_open=verification['open'],
+        verification_resolved=verification['resolved'],
+        avg_reply_time=format_duration(verification['avg_reply_seconds'])
+    ), bool(errors)
+
+
+def _incoming_section(services, conn, filters):
+    """Landlord replies and their YES/NO/pending counts."""
+    incoming_messages, failed = _fetch(services, conn, 'incoming_messages', incoming_query, make_incoming, filters)
+    incoming_yes = sum(1 for msg in incoming_messages if msg.status == 'YES')
+    incoming_no = sum(1 for msg in incoming_messages if msg.status == 'NO')
+    return dict(
+        incoming_messages=incoming_messages,
+        incoming_total=len(incoming_messages),
+        incoming_yes=incoming_yes,
+        incoming_no=incoming_no,
+        incoming_pending=len(incoming_messages) - incoming_yes - incoming_no
+    ), failed
+
+
+def _landlords_section(services, conn, filters):
+    rows, failed = _fetch(services, conn, 'landlord_record', landlord_query, make_landlord, filters)
+    return dict(landlord_messages=rows), failed
+
+
+def _tenants_section(services, conn, filters):
+    rows, failed = _fetch(services, conn, 'tenants', tenant_query, make_tenant, filters)
+    return dict(tenant_messages=rows), failed
+
+
+# Section name -> loader for templates/dashboard_sections/<name>.html
+SECTIONS = {
+    'outgoing': _outgoing_section,
+    'incoming': _incoming_section,
+    'landlords': _landlords_section,
+    'tenants': _tenants_section,
+}
+
+
 # ==================== Dashboard Route ====================
 @dashboard_bp.route('/dashboard')
+@login_required
 def dashboard():
-    """Display payment records in a web dashboard (protected route)."""
-    # Lazy import to avoid circular dependencies
+    """
+    Dashboard page shell (protected route). It renders without querying any
+    table; the page fetches each section from /dashboard/section/<name>,
+    sections below the fold only once they scroll into view.
+    """
+    services = get_services()
+    logger = services.logger
+    # Example: Validate login form if POST (extend as needed)
+    if request.method == 'POST':
+        is_valid, errors = validate_dashboard_form(request.form)
+        if not is_valid:
+            for field, error in errors.items():
+                flash(f"{field}: {error}", 'danger')
+            return redirect(url_for('dashboard.dashboard'))
+    logger.info(f"Dashboard accessed by user: {session.get('username', 'Unknown')}")
     try:
-        from app import mask_phone_number, logger, login_required
-        use_mask = True
-    except ImportError:
+        filters = db_service.parse_filters(request.args)
+    except ValueError as e:
+        flash(f"Filter ignored: {e}", 'danger')
+        return redirect(url_for('dashboard.dashboard'))
+    version = None
+    try:
+        conn = db_service.get_read_connection()
         try:
-            from app_local import logger, login_required
-        except ImportError:
-            import logging
-            logger = logging.getLogger(__name__)
-            def login_required(f):
-                from functools import wraps
-                @wraps(f)
-                def decorated_function(*args, **kwargs):
-                    if 'logged_in' not in session:
-                        flash('Please log in to access this page.', 'warning')
-                        return redirect(url_for('login'))
-                    return f(*args, **kwargs)
-                return decorated_function
-        use_mask = False
-        def mask_phone_number(phone_number):
-            return phone_number
-    
-    # Apply login protection
-    @login_required
-    def inner_dashboard():
-        # Example: Validate login form if POST (extend as needed)
-        if request.method == 'POST':
-            is_valid, errors = validate_dashboard_form(request.form)
-            if not is_valid:
-                for field, error in errors.items():
-                    flash(f"{field}: {error}", 'danger')
-                return redirect(url_for('dashboard.dashboard'))
+            # Live updates compare against this to spot missed writes
+            version = current_version(conn)
+        finally:
+            db_service.close_db_connection(conn)
+    except Exception as e:
+        logger.error(f"Error reading data version: {e}")
+    return render_template(
+        'dashboard.html', data_version=version, filters=filters, filter_args=db_service.filter_args(filters),
+        filter_statuses=db_service.FILTER_STATUSES, record_types=db_service.RECORD_TYPES
+    )
+
+
+@dashboard_bp.route('/dashboard/section/<name>')
+@login_required
+def dashboard_section(name):
+    """
+    One dashboard section as an HTML fragment (protected route).
+
+    Each section is cached per data version and carries an ETag built from
+    it, so a refetch after an unrelated write still costs only the version
+    lookup (304 from the browser's copy, or the rendered fragment from this
+    worker's cache). The ETag also changes every DASHBOARD_CACHE_TTL seconds,
+    which bounds staleness from writes that never bumped the version; with
+    a TTL of 0 nothing is cached and no ETag is sent.
+    """
+    if name not in SECTIONS:
+        abort(404)
+    try:
+        filters = db_service.parse_filters(request.args)
+    except ValueError as e:
+        return make_response(f'<div class="empty-state"><div class="empty-state-text">{escape(str(e))}</div></div>', 400)
+    services = get_services()
+    etag = None
+    try:
+        conn = db_service.get_read_connection()
         try:
-            logger.info(f"Dashboard accessed by user: {session.get('username', 'Unknown')}")
-            conn = db_service.get_db_connection()
-            
-            # Use appropriate cursor based on database type
-            import os
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
+            version = current_version(conn)
+
+            def render():
+                context, failed = SECTIONS[name](services, conn, filters)
+                html = render_template(f'dashboard_sections/{name}.html', data_version=version, **context)
+                if failed:
+                    raise SectionIncomplete(html)
+                return html
+
+            ttl = get_settings().dashboard_cache_ttl
+            tag = version_tag(version, ttl)
+            if tag is None:
+                html = render()
             else:
-                # SQLite - row_factory is set on connection, not cursor
-                cursor = conn.cursor()
-            
-            # Fetch outgoing messages (sent from dashboard/system to landlords)
-            outgoing_rows = []
-            incoming_rows = []
-            try:
-                cursor.execute("SELECT * FROM outgoing_messages ORDER BY sent_at DESC LIMIT 100")
-                outgoing_rows = cursor.fetchall()
-            except Exception as e:
-                logger.warning(f"Could not fetch outgoing_messages (table may not exist yet): {e}")
-            
-            # Fetch incoming messages (landlord replies from Twilio)
-            try:
-                cursor.execute("SELECT * FROM incoming_messages ORDER BY received_at DESC LIMIT 100")
-                incoming_rows = cursor.fetchall()
-            except Exception as e:
-                logger.warning(f"Could not fetch incoming_messages (table may not exist yet): {e}")
-            
-            # Fetch landlord_record table (landlord records)
-            landlord_record_rows = []
-            try:
-                cursor.execute("SELECT * FROM landlord_record ORDER BY created_at DESC LIMIT 100")
-                landlord_record_rows = cursor.fetchall()
-            except Exception as e:
-                logger.warning(f"Could not fetch landlord_record (table may not exist yet): {e}")
-            
-            # Fetch tenants table (tenant payment records) - show all tenants
-            tenant_rows = []
-            try:
-                cursor.execute("SELECT * FROM tenants ORDER BY created_at DESC LIMIT 100")
-                tenant_rows = cursor.fetchall()
-            except Exception as e:
-                logger.warning(f"Could not fetch tenants (table may not exist yet): {e}")
-            
+                etag = f"{name}-{tag}"
+                if filters != db_service.NO_FILTERS:
+                    etag += '-' + hashlib.sha1(repr(filters).encode()).hexdigest()[:12]
+                if request.if_none_match.contains_weak(etag):
+                    response = make_response('', 304)
+                    response.set_etag(etag)
+                    return response
+                html = _section_cache.get_or_load((name, version, filters), render, ttl=ttl)
+        finally:
             db_service.close_db_connection(conn)
-            logger.info(f"Retrieved {len(outgoing_rows)} outgoing, {len(incoming_rows)} incoming, {len(landlord_record_rows)} landlord records, {len(tenant_rows)} tenant records")
-            
-            # Process outgoing messages
-            outgoing_messages = []
-            for row in outgoing_rows:
-                if isinstance(row, dict):
-                    phone = mask_phone_number(row['landlord_phone']) if use_mask else row['landlord_phone']
-                    msg_data = {
-                        'name': row.get('landlord_name', ''),
-                        'phone': phone,
-                        'address': row.get('landlord_address', ''),
-                        'email': row.get('landlord_email', ''),
-                        'body': row.get('message_body', ''),
-                        'sent_at': str(row.get('sent_at', '')),
-                        'status': row.get('status', 'sent'),
-                        'twilio_sid': row.get('twilio_message_sid', '')
-                    }
-                else:
-                    # SQLite Row object
-                    phone = mask_phone_number(row['landlord_phone']) if use_mask else row['landlord_phone']
-                    msg_data = {
-                        'name': row.get('landlord_name', ''),
-                        'phone': phone,
-                        'address': row.get('landlord_address', ''),
-                        'email': row.get('landlord_email', ''),
-                        'body': row.get('message_body', ''),
-                        'sent_at': str(row.get('sent_at', '')),
-                        'status': row.get('status', 'sent'),
-                        'twilio_sid': row.get('twilio_message_sid', '')
-                    }
-                outgoing_messages.append(msg_data)
-            
-            # Process incoming messages (landlord replies)
-            incoming_messages = []
-            for row in incoming_rows:
-                if isinstance(row, dict):
-                    phone = mask_phone_number(row['landlord_phone']) if use_mask else row['landlord_phone']
-                    is_yes = row.get('is_yes', False)
-                    is_no = row.get('is_no', False)
-                    # Convert boolean for SQLite (0/1) to bool
-                    if isinstance(is_yes, int):
-                        is_yes = bool(is_yes)
-                    if isinstance(is_no, int):
-                        is_no = bool(is_no)
-                    
-                    status = 'YES' if is_yes else ('NO' if is_no else 'Pending')
-                    msg_data = {
-                        'phone': phone,
-                        'body': row.get('message_body', ''),
-                        'status': status,
-                        'received_at': str(row.get('received_at', '')),
-                        'is_yes': is_yes,
-                        'is_no': is_no,
-                        'twilio_sid': row.get('twilio_message_sid', '')
-                    }
-                else:
-                    # SQLite Row object
-                    phone = mask_phone_number(row['landlord_phone']) if use_mask else row['landlord_phone']
-                    is_yes = bool(row.get('is_yes', 0))
-                    is_no = bool(row.get('is_no', 0))
-                    status = 'YES' if is_yes else ('NO' if is_no else 'Pending')
-                    msg_data = {
-                        'phone': phone,
-                        'body': row.get('message_body', ''),
-                        'status': status,
-                        'received_at': str(row.get('received_at', '')),
-                        'is_yes': is_yes,
-                        'is_no': is_no,
-                        'twilio_sid': row.get('twilio_message_sid', '')
-                    }
-                incoming_messages.append(msg_data)
-            
-            # Process landlord_record table (landlord payment records)
-            landlord_messages = []
-            for row in landlord_record_rows:
-                if isinstance(row, dict):
-                    phone = mask_phone_number(row['phone_number']) if use_mask else row['phone_number']
-                    msg_data = {
-                        'name': row.get('name', 'N/A'),
-                        'phone': phone,
-                        'email': row.get('email', 'N/A'),
-                        'home_address': row.get('home_address', 'N/A'),
-                        'num_units': row.get('num_units', 0),
-                        'reply': row.get('reply', ''),
-                        'status': row.get('reply', '').upper() if row.get('reply') else '',
-                        'timestamp': row.get('timestamp', ''),
-                        'type': 'landlord'
-                    }
-                else:
-                    # SQLite Row object
-                    phone = mask_phone_number(row['phone_number']) if use_mask else row['phone_number']
-                    msg_data = {
-                        'name': row.get('name', 'N/A'),
-                        'phone': phone,
-                        'email': row.get('email', 'N/A'),
-                        'home_address': row.get('home_address', 'N/A'),
-                        'num_units': row.get('num_units', 0),
-                        'reply': row.get('reply', ''),
-                        'status': row.get('reply', '').upper() if row.get('reply') else '',
-                        'timestamp': row.get('timestamp', ''),
-                        'type': 'landlord'
-                    }
-                landlord_messages.append(msg_data)
-            
-            # Process tenants table (tenant payment records)
-            tenant_messages = []
-            for row in tenant_rows:
-                if isinstance(row, dict):
-                    phone = mask_phone_number(row['phone_number']) if use_mask else row['phone_number']
-                    msg_data = {
-                        'name': row.get('name', 'N/A'),
-                        'phone': phone,
-                        'email': row.get('email', 'N/A'),
-                        'address': row.get('address', 'N/A'),
-                        'rent_amount': row.get('rent_amount', 0),
-                        'reply': row.get('reply', ''),
-                        'status': row.get('reply', '').upper() if row.get('reply') else '',
-                        'timestamp': row.get('timestamp', ''),
-                        'type': 'tenant'
-                    }
-                else:
-                    # SQLite Row object
-                    phone = mask_phone_number(row['phone_number']) if use_mask else row['phone_number']
-                    msg_data = {
-                        'name': row.get('name', 'N/A'),
-                        'phone': phone,
-                        'email': row.get('email', 'N/A'),
-                        'address': row.get('address', 'N/A'),
-                        'rent_amount': row.get('rent_amount', 0),
-                        'reply': row.get('reply', ''),
-                        'status': row.get('reply', '').upper() if row.get('reply') else '',
-                        'timestamp': row.get('timestamp', ''),
-                        'type': 'tenant'
-                    }
-                tenant_messages.append(msg_data)
-            
-            # Combine all messages for total count
-            all_messages = landlord_messages + tenant_messages
-            
-            # Calculate statistics
-            total_messages = len(all_messages)
-            yes_count = sum(1 for msg in all_messages if msg['status'] == 'YES')
-            no_count = sum(1 for msg in all_messages if msg['status'] == 'NO')
-            pending_count = total_messages - yes_count - no_count
-            
-            # Tenant statistics
-            tenant_total = len(tenant_messages)
-            tenant_yes = sum(1 for msg in tenant_messages if msg['status'] == 'YES')
-            tenant_no = sum(1 for msg in tenant_messages if msg['status'] == 'NO')
-            tenant_pending = tenant_total - tenant_yes - tenant_no
-            
-            # Landlord statistics
-            landlord_total = len(landlord_messages)
-            landlord_yes = sum(1 for msg in landlord_messages if msg['status'] == 'YES')
-            landlord_no = sum(1 for msg in landlord_messages if msg['status'] == 'NO')
-            landlord_pending = landlord_total - landlord_yes - landlord_no
-            
-            # Calculate statistics for incoming messages
-            incoming_yes = sum(1 for msg in incoming_messages if msg['is_yes'])
-            incoming_no = sum(1 for msg in incoming_messages if msg['is_no'])
-            incoming_pending = len(incoming_messages) - incoming_yes - incoming_no
-            
-            return render_template(
-                'dashboard.html',
-                messages=all_messages,
-                tenant_messages=tenant_messages,
-                landlord_messages=landlord_messages,
-                outgoing_messages=outgoing_messages,
-                incoming_messages=incoming_messages,
-                total_messages=total_messages,
-                yes_count=yes_count,
-                no_count=no_count,
-                pending_count=pending_count,
-                tenant_total=tenant_total,
-                tenant_yes=tenant_yes,
-                tenant_no=tenant_no,
-                tenant_pending=tenant_pending,
-                landlord_total=landlord_total,
-                landlord_yes=landlord_yes,
-                landlord_no=landlord_no,
-                landlord_pending=landlord_pending,
-                outgoing_total=len(outgoing_messages),
-                incoming_total=len(incoming_messages),
-                incoming_yes=incoming_yes,
-                incoming_no=incoming_no,
-                incoming_pending=incoming_pending
-            )
-        except Exception as e:
-            logger.error(f"Error loading dashboard: {e}")
-            flash('Error loading dashboard data.', 'danger')
-            return render_template('dashboard.html', messages=[], total_messages=0, yes_count=0, no_count=0, pending_count=0)
-    return inner_dashboard()
+    except SectionIncomplete as e:
+        html, etag = e.html, None
+    except Exception as e:
+        services.logger.error(f"Error loading dashboard section {name}: {e}")
+        return make_response('<div class="empty-state"><div class="empty-state-text">Could not load this section.</div></div>', 500)
+    response = make_response(html)
+    if etag:
+        response.set_etag(etag)
+    # The browser may keep a copy but must revalidate it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 # ==================== CSV Export Route ====================
 @dashboard_bp.route('/export')
+@login_required
 def export_csv():
-    """Export all payment records to CSV (protected route)."""
+    """Export replies to CSV, narrowed by the record filters (protected route)."""
+    services = get_services()
+    logger = services.logger
     try:
-        from app import mask_phone_number, logger, login_required
-        use_mask = True
-    except ImportError:
-        try:
-            from app_local import logger, login_required
-        except ImportError:
-            import logging
-            logger = logging.getLogger(__name__)
-            def login_required(f):
-                from functools import wraps
-                @wraps(f)
-                def decorated_function(*args, **kwargs):
-                    if 'logged_in' not in session:
-                        flash('Please log in to access this page.', 'warning')
-                        return redirect(url_for('login'))
-                    return f(*args, **kwargs)
-                return decorated_function
-        use_mask = False
-        def mask_phone_number(phone_number):
-            return phone_number
-    
-    @login_required
-    def inner_export_csv():
-        try:
-            logger.info(f"CSV export initiated by user: {session.get('username', 'Unknown')}")
-            conn = db_service.get_db_connection()
-            
-            # Use appropriate cursor based on database type
-            import os
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-            else:
-                # SQLite
-                cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM rent_records ORDER BY timestamp DESC")
-            rows = cursor.fetchall()
-            db_service.close_db_connection(conn)
-            si = StringIO()
-            writer = csv.writer(si)
-            writer.writerow(['Phone Number', 'Reply', 'Type', 'Timestamp'])
-            for row in rows:
-                # Handle both dict-like (PostgreSQL) and tuple-like (SQLite) rows
-                if isinstance(row, dict):
-                    phone = mask_phone_number(row['phone_number']) if use_mask else row['phone_number']
-                    record_type = row.get('record_type', 'tenant')
-                    writer.writerow([phone, row['reply'], record_type, row['timestamp']])
-                else:
-                    phone = mask_phone_number(row['phone_number']) if use_mask else row['phone_number']
-                    record_type = row.get('record_type', 'tenant') if hasattr(row, 'get') else 'tenant'
-                    writer.writerow([phone, row['reply'], record_type, row['timestamp']])
-            output = make_response(si.getvalue())
-            output.headers["Content-Disposition"] = f"attachment; filename=payment_records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            output.headers["Content-type"] = "text/csv"
-            logger.info(f"CSV export completed: {len(rows)} records")
-            return output
-        except Exception as e:
-            logger.error(f"Error exporting CSV: {e}")
-            flash('Error exporting data.', 'danger')
-            return redirect(url_for('dashboard.dashboard'))
-    return inner_export_csv()
+        filters = db_service.parse_filters(request.args)
+    except ValueError as e:
+        flash(f"Export not filtered: {e}", 'danger')
+        return redirect(url_for('dashboard.dashboard'))
+    try:
+        logger.info(f"CSV export initiated by user: {session.get('username', 'Unknown')}")
+        conn = db_service.get_read_connection()
+        query, params = export_query(filters, services.is_postgres)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        db_service.close_db_connection(conn)
+        si = StringIO()
+        writer = csv.writer(si)
+        writer.writerow(['Phone Number', 'Reply', 'Type', 'Timestamp'])
+        for phone, reply, record_type, received_at in (tuple(row) for row in rows):
+            writer.writerow([mask_phone(phone), reply, record_type or 'tenant', received_at])
+        output = make_response(si.getvalue())
+        output.headers["Content-Disposition"] = f"attachment; filename=payment_records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        output.headers["Content-type"] = "text/csv"
+        logger.info(f"CSV export completed: {len(rows)} records")
+        return output
+    except Exception as e:
+        logger.error(f"Error exporting CSV: {e}")
+        flash('Error exporting data.', 'danger')
+        return redirect(url_for('dashboard.dashboard'))
 
 # ==================== Test Data Route (Development Only) ====================
 @dashboard_bp.route('/add-test-data')
+@login_required
 def add_test_data():
     """Add test SMS messages to database for testing (development only)."""
-    try:
-        from app_local import get_db_connection, logger, login_required
-    except ImportError:
+    services = get_services()
+    if not services.dev_tools:
         return redirect(url_for('dashboard.dashboard'))
-    @login_required
-    def inner_add_test_data():
-        try:
-            test_messages = [
-                ('+1234567890', 'YES', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-                ('+9876543210', 'NO', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-                ('+5555555555', 'Maybe', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-            ]
-            conn = db_service.get_db_connection()
+    logger = services.logger
+    try:
+        test_messages = [
+            ('+1234567890', 'YES', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            ('+9876543210', 'NO', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            ('+5555555555', 'Maybe', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        ]
+        def insert(conn):
             cursor = conn.cursor()
             for phone, reply, timestamp in test_messages:
                 cursor.execute(
                     "INSERT INTO rent_records (phone_number, reply, timestamp) VALUES (?, ?, ?)",
                     (phone, reply, timestamp)
                 )
-            conn.commit()
-            db_service.close_db_connection(conn)
-            flash(f'Added {len(test_messages)} test messages successfully!', 'success')
-            logger.info(f"Test data added: {len(test_messages)} records")
-        except Exception as e:
-            logger.error(f"Error adding test data: {e}")
-            flash('Error adding test data.', 'danger')
-        return redirect(url_for('dashboard'))
-    return inner_add_test_data()
+        db_service.write(insert)
+        flash(f'Added {len(test_messages)} test messages successfully!', 'success')
+        logger.info(f"Test data added: {len(test_messages)} records")
+    except Exception as e:
+        logger.error(f"Error adding test data: {e}")
+        flash('Error adding test data.', 'danger')
+    return redirect(url_for('dashboard.dashboard'))
 
 
 # ==================== Update Records to Landlord Route ====================
 @dashboard_bp.route('/update-to-landlord', methods=['POST'])
+@login_required
 def update_to_landlord():
     """Update all existing records to have record_type = 'landlord' (admin only)."""
-    # Lazy import to avoid circular dependencies
+    services = get_services()
+    logger = services.logger
     try:
-        from app import login_required, logger
-    except ImportError:
-        try:
-            from app_local import login_required, logger
-        except ImportError:
-            import logging
-            logger = logging.getLogger(__name__)
-            def login_required(f):
-                return f
-    
-    @login_required
-    def inner_update_to_landlord():
-        try:
-            import os
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            conn = db_service.get_db_connection()
-            
-            if DATABASE_URL:
+        def relabel(conn):
+            if services.is_postgres:
                 # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor = services.cursor(conn)
                 
                 # Count records to update
                 cursor.execute("SELECT COUNT(*) as count FROM rent_records WHERE record_type IS NULL OR record_type = 'tenant'")
                 count_result = cursor.fetchone()
                 count_to_update = count_result['count'] if count_result else 0
-                
-                if count_to_update > 0:
-                    cursor.execute("UPDATE rent_records SET record_type = 'landlord' WHERE record_type IS NULL OR record_type = 'tenant'")
-                    conn.commit()
-                    flash(f'Successfully updated {count_to_update} record(s) to "landlord"!', 'success')
-                    logger.info(f"Updated {count_to_update} records to landlord")
-                else:
-                    flash('No records to update (all records are already "landlord")', 'info')
-                
             else:
                 # SQLite
                 cursor = conn.cursor()
@@ -461,224 +326,205 @@ def update_to_landlord():
                 # Count records to update
                 cursor.execute("SELECT COUNT(*) FROM rent_records WHERE record_type IS NULL OR record_type = 'tenant'")
                 count_to_update = cursor.fetchone()[0]
-                
-                if count_to_update > 0:
-                    cursor.execute("UPDATE rent_records SET record_type = 'landlord' WHERE record_type IS NULL OR record_type = 'tenant'")
-                    conn.commit()
-                    flash(f'Successfully updated {count_to_update} record(s) to "landlord"!', 'success')
-                    logger.info(f"Updated {count_to_update} records to landlord")
-                else:
-                    flash('No records to update (all records are already "landlord")', 'info')
-            
-            cursor.close()
-            conn.close()
             
-        except Exception as e:
-            logger.error(f"Error updating records: {e}")
-            flash('Error updating records. Please try again.', 'danger')
+            if count_to_update > 0:
+                cursor.execute("UPDATE rent_records SET record_type = 'landlord' WHERE record_type IS NULL OR record_type = 'tenant'")
+                conn.commit()
+            return count_to_update
         
-        return redirect(url_for('dashboard.dashboard'))
+        count_to_update = db_service.write(relabel)
+        if count_to_update > 0:
+            flash(f'Successfully updated {count_to_update} record(s) to "landlord"!', 'success')
+            logger.info(f"Updated {count_to_update} records to landlord")
+        else:
+            flash('No records to update (all records are already "landlord")', 'info')
+        
+    except Exception as e:
+        logger.error(f"Error updating records: {e}")
+        flash('Error updating records. Please try again.', 'danger')
     
-    return inner_update_to_landlord()
+    return redirect(url_for('dashboard.dashboard'))
 
 
 # ==================== Send SMS to Landlord Route ====================
 @dashboard_bp.route('/send-sms', methods=['POST'])
+@login_required
 def send_sms_to_landlord_route():
     """Send SMS message to landlord and store in outgoing_messages table."""
-    # Lazy import to avoid circular dependencies
+    services = get_services()
+    logger = services.logger
     try:
-        from app import login_required, logger
-    except ImportError:
-        try:
-            from app_local import login_required, logger
-        except ImportError:
-            import logging
-            logger = logging.getLogger(__name__)
-            def login_required(f):
-                return f
-    
-    @login_required
-    def inner_send_sms():
-        try:
-            # Get form data
-            landlord_name = request.form.get('landlord_name', '').strip()
-            landlord_phone = request.form.get('landlord_phone', '').strip()
-            landlord_address = request.form.get('landlord_address', '').strip()
-            landlord_email = request.form.get('landlord_email', '').strip()
-            message_body = request.form.get('message_body', '').strip()
-            
-            # Validate required fields
-            if not all([landlord_name, landlord_phone, landlord_address, message_body]):
-                flash('Please fill in all required fields (Name, Phone, Address, Message).', 'danger')
-                return redirect(url_for('dashboard.dashboard'))
-            
-            # Default message if not provided
-            if not message_body:
-                message_body = f"Hi {landlord_name}, did you receive the rent payment for the property at {landlord_address}? Please reply YES or NO."
-            
-            # Send SMS via Twilio service
-            success, message_sid, error_msg = send_sms_to_landlord(
-                landlord_name=landlord_name,
-                landlord_phone=landlord_phone,
-                landlord_address=landlord_address,
-                landlord_email=landlord_email,
-                message_body=message_body,
-                db_service=db_service,
-                logger=logger
-            )
-            
-            if success:
-                flash(f'SMS sent successfully to {landlord_name}! Message SID: {message_sid[:20]}...', 'success')
-                logger.info(f"SMS sent to {landlord_name} ({landlord_phone}) - SID: {message_sid}")
-            else:
-                flash(f'Error sending SMS: {error_msg}', 'danger')
-                logger.error(f"Failed to send SMS to {landlord_name}: {error_msg}")
+        # Get form data
+        landlord_name = request.form.get('landlord_name', '').strip()
+        landlord_phone = request.form.get('landlord_phone', '').strip()
+        landlord_address = request.form.get('landlord_address', '').strip()
+        landlord_email = request.form.get('landlord_email', '').strip()
+        message_body = request.form.get('message_body', '').strip()
         
-        except Exception as e:
-            logger.error(f"Error sending SMS: {e}")
-            flash('Error sending SMS. Please try again.', 'danger')
+        # Validate required fields
+        if not all([landlord_name, landlord_phone, landlord_address, message_body]):
+            flash('Please fill in all required fields (Name, Phone, Address, Message).', 'danger')
+            return redirect(url_for('dashboard.dashboard'))
         
-        return redirect(url_for('dashboard.dashboard'))
+        # Default message if not provided
+        if not message_body:
+            message_body = f"Hi {landlord_name}, did you receive the rent payment for the property at {landlord_address}? Please reply YES or NO."
+        
+        # Send SMS via Twilio service
+        success, message_sid, error_msg = send_sms_to_landlord(
+            landlord_name=landlord_name,
+            landlord_phone=landlord_phone,
+            landlord_address=landlord_address,
+            landlord_email=landlord_email,
+            message_body=message_body,
+            db_service=db_service,
+            logger=logger
+        )
+        
+        if success:
+            flash(f'SMS sent successfully to {landlord_name}! Message SID: {message_sid[:20]}...', 'success')
+            logger.info(f"SMS sent to {landlord_name} ({mask_phone(landlord_phone)}) - SID: {message_sid}")
+        else:
+            flash(f'Error sending SMS: {error_msg}', 'danger')
+            logger.error(f"Failed to send SMS to {landlord_name}: {error_msg}")
+    
+    except Exception as e:
+        logger.error(f"Error sending SMS: {e}")
+        flash('Error sending SMS. Please try again.', 'danger')
     
-    return inner_send_sms()
+    return redirect(url_for('dashboard.dashboard'))
 
 
 # ==================== Add Landlord Record Route ====================
+
+# Form saves: one row per phone_key (see twilio_service.upsert_entity), written
+# with %s placeholders; SQLite runs them with '?' (same UPSERT syntax)
+LANDLORD_FORM_UPSERT = """
+    INSERT INTO landlord_record (name, phone_number, email, home_address, num_units, phone_key, phone_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (phone_key) DO UPDATE SET
+        name = excluded.name, phone_number = excluded.phone_number, email = excluded.email,
+        home_address = excluded.home_address, num_units = excluded.num_units, updated_at = CURRENT_TIMESTAMP
+"""
+
+LANDLORD_FORM_UPDATE_UNKEYED = """
+    UPDATE landlord_record SET name = %s, email = %s, home_address = %s, num_units = %s, updated_at = CURRENT_TIMESTAMP
+    WHERE phone_key IS NULL AND phone_number = %s
+"""
+
+
 @dashboard_bp.route('/add-landlord-record', methods=['POST'])
+@login_required
 def add_landlord_record():
     """Add a new landlord record to landlord_record table."""
+    services = get_services()
+    logger = services.logger
     try:
-        from app import login_required, logger
-    except ImportError:
-        try:
-            from app_local import login_required, logger
-        except ImportError:
-            import logging
-            logger = logging.getLogger(__name__)
-            def login_required(f):
-                return f
-    
-    @login_required
-    def inner_add_landlord():
+        # Get form data
+        name = request.form.get('name', '').strip()
+        phone_number = request.form.get('phone_number', '').strip()
+        email = request.form.get('email', '').strip()
+        home_address = request.form.get('home_address', '').strip()
+        num_units = request.form.get('num_units', '0').strip()
+        
+        # Validate required fields
+        if not all([name, phone_number, home_address]):
+            flash('Please fill in all required fields (Name, Phone, Home Address).', 'danger')
+            return redirect(url_for('dashboard.dashboard'))
+        
         try:
-            # Get form data
-            name = request.form.get('name', '').strip()
-            phone_number = request.form.get('phone_number', '').strip()
-            email = request.form.get('email', '').strip()
-            home_address = request.form.get('home_address', '').strip()
-            num_units = request.form.get('num_units', '0').strip()
-            
-            # Validate required fields
-            if not all([name, phone_number, home_address]):
-                flash('Please fill in all required fields (Name, Phone, Home Address).', 'danger')
-                return redirect(url_for('dashboard.dashboard'))
-            
-            try:
-                num_units = int(num_units) if num_units else 0
-            except ValueError:
-                num_units = 0
-            
-            # Insert into landlord_record table
-            import os
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            conn = db_service.get_db_connection()
-            
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                cursor.execute(
-                    "INSERT INTO landlord_record (name, phone_number, email, home_address, num_units) VALUES (%s, %s, %s, %s, %s)",
-                    (name, phone_number, email or None, home_address, num_units)
-                )
-            else:
-                # SQLite
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO landlord_record (name, phone_number, email, home_address, num_units) VALUES (?, ?, ?, ?, ?)",
-                    (name, phone_number, email or None, home_address, num_units)
-                )
-            
-            conn.commit()
-            conn.close()
-            flash(f'Landlord record added successfully for {name}!', 'success')
-            logger.info(f"Landlord record added: {name} ({phone_number})")
+            num_units = int(num_units) if num_units else 0
+        except ValueError:
+            num_units = 0
         
-        except Exception as e:
-            logger.error(f"Error adding landlord record: {e}")
-            flash('Error adding landlord record. Please try again.', 'danger')
+        # Insert into landlord_record table, or update the row already held for this phone.
+        # The number is stored in canonical form when it normalizes, as the SMS paths do.
+        phone_key, phone_hash = phone_columns(phone_number)
+        stored_phone = phone_key or phone_number
         
-        return redirect(url_for('dashboard.dashboard'))
+        def upsert(conn):
+            upsert_entity(
+                conn.cursor(), services.is_postgres, phone_key,
+                LANDLORD_FORM_UPSERT,
+                (name, stored_phone, email or None, home_address, num_units, phone_key, phone_hash),
+                LANDLORD_FORM_UPDATE_UNKEYED,
+                (name, email or None, home_address, num_units, stored_phone)
+            )
+            conn.commit()
+            bump_version(conn)
+        
+        db_service.write(upsert)
+        flash(f'Landlord record added successfully for {name}!', 'success')
+        logger.info(f"Landlord record added: {name} ({mask_phone(phone_number)})")
     
-    return inner_add_landlord()
+    except Exception as e:
+        logger.error(f"Error adding landlord record: {e}")
+        flash('Error adding landlord record. Please try again.', 'danger')
+    
+    return redirect(url_for('dashboard.dashboard'))
 
 
 # ==================== Add Tenant Record Route ====================
+
+TENANT_FORM_UPSERT = """
+    INSERT INTO tenants (name, phone_number, email, address, rent_amount, phone_key, phone_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (phone_key) DO UPDATE SET
+        name = excluded.name, phone_number = excluded.phone_number, email = excluded.email,
+        address = excluded.address, rent_amount = excluded.rent_amount, updated_at = CURRENT_TIMESTAMP
+"""
+
+TENANT_FORM_UPDATE_UNKEYED = """
+    UPDATE tenants SET name = %s, email = %s, address = %s, rent_amount = %s, updated_at = CURRENT_TIMESTAMP
+    WHERE phone_key IS NULL AND phone_number = %s
+"""
+
+
 @dashboard_bp.route('/add-tenant-record', methods=['POST'])
+@login_required
 def add_tenant_record():
     """Add a new tenant record to tenants table."""
+    services = get_services()
+    logger = services.logger
     try:
-        from app import login_required, logger
-    except ImportError:
-        try:
-            from app_local import login_required, logger
-        except ImportError:
-            import logging
-            logger = logging.getLogger(__name__)
-            def login_required(f):
-                return f
-    
-    @login_required
-    def inner_add_tenant():
+        # Get form data
+        name = request.form.get('name', '').strip()
+        phone_number = request.form.get('phone_number', '').strip()
+        email = request.form.get('email', '').strip()
+        address = request.form.get('address', '').strip()
+        rent_amount = request.form.get('rent_amount', '0').strip()
+        
+        # Validate required fields
+        if not all([name, phone_number, address, rent_amount]):
+            flash('Please fill in all required fields (Name, Phone, Address, Rent Amount).', 'danger')
+            return redirect(url_for('dashboard.dashboard'))
+        
         try:
-            # Get form data
-            name = request.form.get('name', '').strip()
-            phone_number = request.form.get('phone_number', '').strip()
-            email = request.form.get('email', '').strip()
-            address = request.form.get('address', '').strip()
-            rent_amount = request.form.get('rent_amount', '0').strip()
-            
-            # Validate required fields
-            if not all([name, phone_number, address, rent_amount]):
-                flash('Please fill in all required fields (Name, Phone, Address, Rent Amount).', 'danger')
-                return redirect(url_for('dashboard.dashboard'))
-            
-            try:
-                rent_amount = float(rent_amount) if rent_amount else 0.0
-            except ValueError:
-                rent_amount = 0.0
-            
-            # Insert into tenants table
-            import os
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            conn = db_service.get_db_connection()
-            
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                cursor.execute(
-                    "INSERT INTO tenants (name, phone_number, email, address, rent_amount) VALUES (%s, %s, %s, %s, %s)",
-                    (name, phone_number, email or None, address, rent_amount)
-                )
-            else:
-                # SQLite
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO tenants (name, phone_number, email, address, rent_amount) VALUES (?, ?, ?, ?, ?)",
-                    (name, phone_number, email or None, address, rent_amount)
-                )
-            
-            conn.commit()
-            conn.close()
-            flash(f'Tenant record added successfully for {name}!', 'success')
-            logger.info(f"Tenant record added: {name} ({phone_number})")
+            rent_amount = float(rent_amount) if rent_amount else 0.0
+        except ValueError:
+            rent_amount = 0.0
         
-        except Exception as e:
-            logger.error(f"Error adding tenant record: {e}")
-            flash('Error adding tenant record. Please try again.', 'danger')
+        # Insert into tenants table, or update the row already held for this phone
+        phone_key, phone_hash = phone_columns(phone_number)
+        stored_phone = phone_key or phone_number
         
-        return redirect(url_for('dashboard.dashboard'))
+        def upsert(conn):
+            upsert_entity(
+                conn.cursor(), services.is_postgres, phone_key,
+                TENANT_FORM_UPSERT,
+                (name, stored_phone, email or None, address, rent_amount, phone_key, phone_hash),
+                TENANT_FORM_UPDATE_UNKEYED,
+                (name, email or None, address, rent_amount, stored_phone)
+            )
+            conn.commit()
+            bump_version(conn)
+        
+        db_service.write(upsert)
+        flash(f'Tenant record added successfully for {name}!', 'success')
+        logger.info(f"Tenant record added: {name} ({mask_phone(phone_number)})")
+    
+    except Exception as e:
+        logger.error(f"Error adding tenant record: {e}")
+        flash('Error adding tenant record. Please try again.', 'danger')
     
-    return inner_add_tenant()
+    return redirect(url_for('dashboard.dashboard'))
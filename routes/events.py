@@ -0,0 +1,96 @@
+"""
+Live Events Blueprint for RentVerify
+
+/events is a Server-Sent Events stream of dashboard updates (see
+services/event_bus.py). The dashboard keeps one stream open and patches its
+tables and counters in place instead of reloading.
+
+- 'hello' on connect carries the current data version; a page that has
+  fallen behind refetches its sections to catch up
+- 'reply' / 'sent' carry the new row and counter deltas
+- 'resync' asks the page to refetch its sections (missed or dropped events)
+
+Streams end after STREAM_SECONDS and the browser reconnects, so long-lived
+connections get recycled. Each stream holds a worker thread, so gunicorn
+runs gthread workers (gunicorn.conf.py) and a worker refuses streams beyond
+MAX_STREAMS; the page then falls back to periodic refetches.
+"""
+
+import json
+import time
+from flask import Blueprint, Response, stream_with_context
+from services import db_service, event_bus
+from services.data_version import current_version
+from utils.auth import login_required
+from utils.extensions import get_services
+
+events_bp = Blueprint('events', __name__)
+
+# Streams per worker process (each holds one of its threads)
+MAX_STREAMS = 4
+
+# Comment line sent when idle so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+
+# Recycle each stream after this long; EventSource reconnects by itself
+STREAM_SECONDS = 300
+
+# Browser reconnect delay (milliseconds)
+RETRY_MS = 3000
+
+
+def _sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+def _read_version():
+    conn = db_service.get_read_connection()
+    try:
+        return current_version(conn)
+    finally:
+        db_service.close_db_connection(conn)
+
+
+# ==================== Event Stream ====================
+@events_bp.route('/events')
+@login_required
+def events():
+    """Live dashboard updates as Server-Sent Events (protected route)."""
+    services = get_services()
+    if event_bus.subscriber_count() >= MAX_STREAMS:
+        return Response('Too many live streams', status=503, headers={'Retry-After': '30'})
+
+    def stream():
+        # Subscribe before reading the version: a write landing in between is
+        # then either counted in the version or delivered as an event
+        subscriber = event_bus.subscribe()
+        try:
+            try:
+                version = _read_version()
+            except Exception as e:
+                services.logger.warning(f"Could not read data version for event stream: {e}")
+                version = None
+            yield f"retry: {RETRY_MS}\n\n"
+            yield _sse('hello', {'version': version})
+            deadline = time.monotonic() + STREAM_SECONDS
+            while time.monotonic() < deadline:
+                event = subscriber.get(timeout=HEARTBEAT_SECONDS)
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield _sse('resync', {})
+                elif event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield _sse(event['type'], event['data'])
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx-style proxies from buffering the stream
+            'X-Accel-Buffering': 'no',
+        }
+    )
@@ -4,9 +4,8 @@ This allows sending the same SMS to both Azure and Render (or other platforms)
 """
 
 from flask import Blueprint, request
-import requests
 import logging
-import os
+from utils.settings import get_settings
 
 relay_bp = Blueprint('relay', __name__)
 logger = logging.getLogger(__name__)
@@ -18,20 +17,24 @@ def sms_relay():
     Relay SMS webhook to multiple endpoints.
     Receives from Twilio and forwards to both Azure and Render.
     """
+    # Imported on first relay call; most workers never forward anything
+    import requests
+
     try:
         # Get the payload from Twilio
         payload = dict(request.form)
         
         # List of endpoints to forward to
         endpoints = []
+        settings = get_settings()
         
-        # Azure endpoint (from environment variable or default)
-        azure_url = os.getenv('AZURE_WEBHOOK_URL', 'https://rentverify-app-fbbbazaagbd8e0hn.canadacentral-01.azurewebsites.net/sms')
+        # Azure endpoint (AZURE_WEBHOOK_URL or default)
+        azure_url = settings.azure_webhook_url
         if azure_url:
             endpoints.append(('Azure', azure_url))
         
-        # Render endpoint (from environment variable or default)
-        render_url = os.getenv('RENDER_WEBHOOK_URL', 'https://rent-verify-bot.onrender.com/sms')
+        # Render endpoint (RENDER_WEBHOOK_URL or default)
+        render_url = settings.render_webhook_url
         if render_url:
             endpoints.append(('Render', render_url))
         
@@ -40,7 +43,7 @@ def sms_relay():
         # Forward to each endpoint
         for name, url in endpoints:
             try:
-                response = requests.post(url, data=payload, timeout=10)
+                response = requests.post(url, data=payload, timeout=settings.relay_timeout)
                 if response.status_code == 200:
                     results.append(f"{name}: Success")
                     logger.info(f"Successfully forwarded to {name}: {url}")
@@ -0,0 +1,50 @@
+"""
+Search Blueprint for RentVerify
+
+/search?q=...&page=N runs a ranked full-text search over landlord and tenant
+records and inbound/outbound messages (services/search_service.py).
+"""
+
+from flask import Blueprint, render_template, request, flash
+from services import db_service
+from services.search_service import search
+from services.phone import mask_phone
+from utils.auth import login_required
+from utils.extensions import get_services
+
+search_bp = Blueprint('search', __name__)
+
+
+# ==================== Search Route ====================
+@search_bp.route('/search')
+@login_required
+def search_page():
+    """Full-text search results (protected route)."""
+    services = get_services()
+    query = request.args.get('q', '').strip()
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        page = 1
+
+    outcome = {'results': [], 'page': 1, 'has_more': False}
+    if query:
+        try:
+            conn = db_service.get_read_connection()
+            try:
+                outcome = search(conn, services.is_postgres, query, page=page)
+            finally:
+                db_service.close_db_connection(conn)
+        except Exception as e:
+            services.logger.error(f"Error running search: {e}")
+            flash('Search failed.', 'danger')
+
+    for result in outcome['results']:
+        result['phone'] = mask_phone(result.pop('phone_key') or result['phone'])
+    return render_template(
+        'search.html',
+        query=query,
+        results=outcome['results'],
+        page=outcome['page'],
+        has_more=outcome['has_more']
+    )
@@ -3,7 +3,8 @@ SMS Blueprint - Twilio Webhook Handler
 
 This module defines the SMS blueprint that handles incoming SMS messages from Twilio.
 It is designed to work with both the production app (PostgreSQL) and local development 
-app (SQLite), using lazy imports to avoid circular dependencies.
+app (SQLite); the logger and masking function come from the services registered
+by whichever factory built the app (utils/extensions.py).
 
 Routes:
     POST /sms - Handles incoming SMS messages from Twilio webhook
@@ -13,7 +14,7 @@ Routes:
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from services.twilio_service import process_incoming_sms
-from services import db_service
+from utils.extensions import get_services
 from utils.validators import validate_sms_payload
 
 # Create the SMS Blueprint
@@ -28,7 +29,7 @@ def sms_reply():
     
     This route processes incoming SMS messages and stores them in the database.
     It works with both PostgreSQL (app.py) and SQLite (app_local.py) through
-    lazy imports to avoid circular import issues.
+    the app's registered services.
     
     Expected POST parameters (from Twilio):
         From (str): Sender's phone number
@@ -40,6 +41,8 @@ def sms_reply():
             - ("Error processing message", 500) on failure
     """
 
+    services = get_services()
+    logger = services.logger
     try:
         payload = {
             'From': request.form.get('From'),
@@ -53,30 +56,15 @@ def sms_reply():
         reply = payload['Body']
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        # Lazy import for environment-specific helpers
-        try:
-            from app import mask_phone_number, logger
-        except ImportError:
-            try:
-                from app_local import logger
-            except ImportError:
-                import logging
-                logger = logging.getLogger(__name__)
-            def mask_phone_number(phone_number):
-                return phone_number
-
         # Use service layer for SMS processing
         success = process_incoming_sms(
             raw_phone_number, reply, timestamp,
-            db_service, mask_phone_number, logger
+            services.db, services.mask_phone_number, logger
         )
         if success:
             return "Reply recorded", 200
         else:
             return "Error processing message", 500
     except Exception as e:
-        try:
-            logger.error(f"Error in SMS handler: {e}")
-        except Exception:
-            pass
+        logger.error(f"Error in SMS handler: {e}")
         return "Error processing message", 500
@@ -0,0 +1,352 @@
+"""
+Analytics Service - Response Latency and Response Rates
+
+The analytics page reads rollups instead of scanning verification_requests:
+- verification_daily: one row per day requests were opened (sent, YES, NO,
+  no reply, and a time-to-reply histogram)
+- verification_phone_rollup: one row per number (sent, answered, average
+  time to reply)
+
+rollup() refreshes them incrementally: the last ROLLUP_REFRESH_DAYS days,
+any earlier day with a request resolved since then, and the numbers those
+requests belong to. Run it nightly (`flask rollup-analytics`); the page also
+runs it when yesterday hasn't been rolled up yet. Today's numbers are always
+read live through the opened_at index.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from services.verification_service import elapsed_seconds_sql
+
+logger = logging.getLogger(__name__)
+
+# Days re-aggregated on every rollup, since late replies change recent days
+ROLLUP_REFRESH_DAYS = 14
+
+# Time-to-reply histogram: (column, label, upper bound in seconds)
+LATENCY_BUCKETS = (
+    ('under_1h', '< 1 hour', 3600),
+    ('under_6h', '1-6 hours', 6 * 3600),
+    ('under_24h', '6-24 hours', 24 * 3600),
+    ('under_72h', '1-3 days', 72 * 3600),
+    ('over_72h', '> 3 days', None),
+)
+
+# Numbers re-aggregated per statement
+PHONE_BATCH_SIZE = 500
+
+_rollup_lock = threading.Lock()
+
+
+def _day_sql(column, is_postgres):
+    if is_postgres:
+        return f"TO_CHAR({column}, 'YYYY-MM-DD')"
+    return f"date({column})"
+
+
+def _daily_select(is_postgres):
+    """Per-day aggregate over verification_requests; the caller appends WHERE/GROUP BY."""
+    elapsed = elapsed_seconds_sql(is_postgres)
+    buckets = []
+    lower = 0
+    for column, _, upper in LATENCY_BUCKETS:
+        condition = f"{elapsed} >= {lower}" + (f" AND {elapsed} < {upper}" if upper else "")
+        buckets.append(f"SUM(CASE WHEN state = 'resolved' AND {condition} THEN 1 ELSE 0 END)")
+        lower = upper
+    return (
+        f"SELECT {_day_sql('opened_at', is_postgres)} AS day, COUNT(*), "
+        "SUM(CASE WHEN reply_status = 'YES' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN reply_status = 'NO' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN state <> 'resolved' THEN 1 ELSE 0 END), "
+        f"COALESCE(SUM(CASE WHEN state = 'resolved' THEN {elapsed} END), 0), "
+        + ", ".join(buckets) +
+        " FROM verification_requests"
+    )
+
+
+def _daily_columns():
+    return ('day', 'sent', 'yes_count', 'no_count', 'no_reply', 'reply_seconds_sum') + \
+        tuple(column for column, _, _ in LATENCY_BUCKETS)
+
+
+def _rollup_days(cursor, is_postgres, start_day, today):
+    """Rewrite verification_daily from start_day up to yesterday, plus days with late replies."""
+    placeholder = '%s' if is_postgres else '?'
+    start = start_day.isoformat()
+    end = today.isoformat()
+
+    # Earlier days whose requests were resolved since the window began
+    cursor.execute(
+        f"SELECT DISTINCT {_day_sql('opened_at', is_postgres)} FROM verification_requests "
+        f"WHERE resolved_at >= {placeholder} AND opened_at < {placeholder}",
+        (start, start)
+    )
+    late_days = sorted(row[0] for row in cursor.fetchall())
+
+    rows = {}
+    cursor.execute(
+        _daily_select(is_postgres) +
+        f" WHERE opened_at >= {placeholder} AND opened_at < {placeholder} GROUP BY 1",
+        (start, end)
+    )
+    for row in cursor.fetchall():
+        rows[row[0]] = tuple(row)
+    for day in late_days:
+        next_day = (datetime.strptime(day, '%Y-%m-%d').date() + timedelta(days=1)).isoformat()
+        cursor.execute(
+            _daily_select(is_postgres) +
+            f" WHERE opened_at >= {placeholder} AND opened_at < {placeholder} GROUP BY 1",
+            (day, next_day)
+        )
+        for row in cursor.fetchall():
+            rows[row[0]] = tuple(row)
+
+    # Every day in the window gets a row, so MAX(day) shows how far the rollup got
+    day = start_day
+    while day < today:
+        key = day.isoformat()
+        if key not in rows:
+            rows[key] = (key,) + (0,) * (len(_daily_columns()) - 1)
+        day += timedelta(days=1)
+
+    days = sorted(rows)
+    columns = _daily_columns()
+    cursor.execute(
+        f"DELETE FROM verification_daily WHERE day >= {placeholder} AND day < {placeholder}",
+        (start, end)
+    )
+    for day in late_days:
+        cursor.execute(f"DELETE FROM verification_daily WHERE day = {placeholder}", (day,))
+    cursor.executemany(
+        f"INSERT INTO verification_daily ({', '.join(columns)}) "
+        f"VALUES ({', '.join([placeholder] * len(columns))})",
+        [rows[day] for day in days]
+    )
+    return len(days)
+
+
+def _rollup_phones(cursor, is_postgres, since):
+    """Recompute verification_phone_rollup for numbers with requests opened or resolved since `since` (None: all)."""
+    placeholder = '%s' if is_postgres else '?'
+    elapsed = elapsed_seconds_sql(is_postgres)
+    select = (
+        "SELECT phone_key, COUNT(*), "
+        "SUM(CASE WHEN state = 'resolved' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN reply_status = 'YES' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN reply_status = 'NO' THEN 1 ELSE 0 END), "
+        f"AVG(CASE WHEN state = 'resolved' THEN {elapsed} END), "
+        "MAX(opened_at) "
+        "FROM verification_requests"
+    )
+    insert = (
+        "INSERT INTO verification_phone_rollup "
+        "(phone_key, sent, answered, yes_count, no_count, avg_reply_seconds, last_sent_at) "
+        f"VALUES ({', '.join([placeholder] * 7)})"
+    )
+    if since is None:
+        cursor.execute("DELETE FROM verification_phone_rollup")
+        cursor.execute(select + " GROUP BY phone_key")
+        rows = [tuple(row) for row in cursor.fetchall()]
+        if rows:
+            cursor.executemany(insert, rows)
+        return len(rows)
+
+    cursor.execute(
+        "SELECT phone_key FROM verification_requests WHERE opened_at >= "
+        f"{placeholder} UNION SELECT phone_key FROM verification_requests WHERE resolved_at >= {placeholder}",
+        (since, since)
+    )
+    phone_keys = [row[0] for row in cursor.fetchall()]
+    for start in range(0, len(phone_keys), PHONE_BATCH_SIZE):
+        batch = phone_keys[start:start + PHONE_BATCH_SIZE]
+        marks = ', '.join([placeholder] * len(batch))
+        cursor.execute(f"DELETE FROM verification_phone_rollup WHERE phone_key IN ({marks})", batch)
+        cursor.execute(select + f" WHERE phone_key IN ({marks}) GROUP BY phone_key", batch)
+        rows = [tuple(row) for row in cursor.fetchall()]
+        if rows:
+            cursor.executemany(insert, rows)
+    return len(phone_keys)
+
+
+def rollup(conn, is_postgres, today=None):
+    """
+    Refresh the analytics rollups and commit.
+
+    Args:
+        conn: Database connection
+        is_postgres (bool): Database flavour
+        today (date): Override the current (UTC) date, e.g. for backfills
+    Returns:
+        dict: Days and numbers rewritten, or {'skipped': ...} if another
+            process is already rolling up
+    """
+    today = today or datetime.utcnow().date()
+    with _rollup_lock:
+        cursor = conn.cursor()
+        if is_postgres:
+            # Held until commit; a concurrent rollup in another worker just skips
+            cursor.execute("SELECT pg_try_advisory_xact_lock(hashtext('verification_rollup'))")
+            if not cursor.fetchone()[0]:
+                return {'skipped': 'rollup already running'}
+
+        cursor.execute("SELECT MAX(day) FROM verification_daily")
+        last_day = cursor.fetchone()[0]
+        refresh_from = today - timedelta(days=ROLLUP_REFRESH_DAYS)
+        if last_day is None:
+            # First run: everything since the first request
+            cursor.execute(f"SELECT MIN({_day_sql('opened_at', is_postgres)}) FROM verification_requests")
+            first_day = cursor.fetchone()[0]
+            # No requests yet: a zero row for yesterday still marks the rollup current
+            start_day = datetime.strptime(first_day, '%Y-%m-%d').date() if first_day else today - timedelta(days=1)
+            since = None
+        else:
+            next_day = datetime.strptime(last_day, '%Y-%m-%d').date() + timedelta(days=1)
+            start_day = min(next_day, refresh_from)
+            since = start_day.isoformat()
+
+        days = _rollup_days(cursor, is_postgres, start_day, today)
+        phones = _rollup_phones(cursor, is_postgres, since)
+        conn.commit()
+    logger.info(f"Analytics rollup refreshed {days} days and {phones} numbers")
+    return {'days': days, 'numbers': phones}
+
+
+def rollup_is_current(conn, today=None):
+    """True if yesterday has been rolled up (read-only; safe on a read connection)."""
+    today = today or datetime.utcnow().date()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(day) FROM verification_daily")
+    last_day = cursor.fetchone()[0]
+    return last_day is not None and last_day >= (today - timedelta(days=1)).isoformat()
+
+
+def ensure_rollup(conn, is_postgres, today=None):
+    """Run rollup() if yesterday hasn't been rolled up yet (e.g. the nightly job didn't run)."""
+    today = today or datetime.utcnow().date()
+    if rollup_is_current(conn, today):
+        return None
+    return rollup(conn, is_postgres, today)
+
+
+# ==================== Reports ====================
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def get_analytics(conn, is_postgres, days=30, landlord_limit=50, today=None):
+    """
+    Latency histogram, daily YES/NO/no-reply trend and per-number response rates.
+
+    Args:
+        conn: Database connection
+        is_postgres (bool): Database flavour
+        days (int): Days of history, including today
+        landlord_limit (int): Numbers listed, least responsive first
+        today (date): Override the current (UTC) date
+    Returns:
+        dict: totals, latency_histogram, daily and landlords
+    """
+    today = today or datetime.utcnow().date()
+    placeholder = '%s' if is_postgres else '?'
+    first_day = today - timedelta(days=days - 1)
+    cursor = conn.cursor()
+
+    # Daily trend from the rollup, with a 7-day rolling response rate
+    # (read from 6 days earlier so the first rows' windows are full)
+    cursor.execute(
+        "SELECT day, sent, yes_count, no_count, no_reply, reply_seconds_sum, "
+        + ", ".join(column for column, _, _ in LATENCY_BUCKETS) + ", "
+        "SUM(yes_count + no_count) OVER w, SUM(sent) OVER w "
+        f"FROM verification_daily WHERE day >= {placeholder} AND day < {placeholder} "
+        "WINDOW w AS (ORDER BY day ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) "
+        "ORDER BY day",
+        ((first_day - timedelta(days=6)).isoformat(), today.isoformat())
+    )
+    daily_rows = [tuple(row) for row in cursor.fetchall()]
+
+    # Today, live
+    cursor.execute(
+        _daily_select(is_postgres) + f" WHERE opened_at >= {placeholder} GROUP BY 1",
+        (today.isoformat(),)
+    )
+    live = cursor.fetchone()
+
+    bucket_count = len(LATENCY_BUCKETS)
+    histogram = [0] * bucket_count
+    totals = {'sent': 0, 'yes': 0, 'no': 0, 'no_reply': 0, 'reply_seconds': 0.0}
+    daily = []
+
+    def add_day(day, sent, yes, no, no_reply, reply_seconds, buckets, window_answered, window_sent):
+        totals['sent'] += sent
+        totals['yes'] += yes
+        totals['no'] += no
+        totals['no_reply'] += no_reply
+        totals['reply_seconds'] += float(reply_seconds or 0)
+        for index, count in enumerate(buckets):
+            histogram[index] += count
+        daily.append({
+            'day': day,
+            'sent': sent,
+            'yes': yes,
+            'no': no,
+            'no_reply': no_reply,
+            'response_rate': _rate(yes + no, sent),
+            'rolling_7d_response_rate': _rate(window_answered, window_sent),
+        })
+
+    for row in daily_rows:
+        if row[0] < first_day.isoformat():
+            continue
+        add_day(row[0], *row[1:6], row[6:6 + bucket_count], *row[6 + bucket_count:])
+    if live:
+        live = tuple(live)
+        # Extend the rolling window with today's live counts
+        recent = [row for row in daily_rows if row[0] > (today - timedelta(days=7)).isoformat()]
+        window_answered = sum(row[2] + row[3] for row in recent) + live[2] + live[3]
+        window_sent = sum(row[1] for row in recent) + live[1]
+        add_day(live[0], *live[1:6], live[6:6 + bucket_count], window_answered, window_sent)
+
+    answered = totals['yes'] + totals['no']
+    totals_out = {
+        'sent': totals['sent'],
+        'yes': totals['yes'],
+        'no': totals['no'],
+        'no_reply': totals['no_reply'],
+        'response_rate': _rate(answered, totals['sent']),
+        'avg_reply_seconds': totals['reply_seconds'] / answered if answered else None,
+    }
+
+    # Least responsive numbers first
+    cursor.execute(
+        "SELECT r.phone_key, l.name, r.sent, r.answered, r.yes_count, r.no_count, "
+        "r.avg_reply_seconds, r.last_sent_at "
+        "FROM verification_phone_rollup r LEFT JOIN landlord_record l ON l.phone_key = r.phone_key "
+        "ORDER BY (r.answered * 1.0 / r.sent), r.sent DESC "
+        f"LIMIT {int(landlord_limit)}"
+    )
+    landlords = [
+        {
+            'phone_key': row[0],
+            'name': row[1],
+            'sent': row[2],
+            'answered': row[3],
+            'yes': row[4],
+            'no': row[5],
+            'response_rate': _rate(row[3], row[2]),
+            'avg_reply_seconds': float(row[6]) if row[6] is not None else None,
+            'last_sent_at': str(row[7]) if row[7] is not None else None,
+        }
+        for row in (tuple(r) for r in cursor.fetchall())
+    ]
+
+    return {
+        'days': days,
+        'totals': totals_out,
+        'latency_histogram': [
+            {'bucket': label, 'count': histogram[index]}
+            for index, (_, label, _) in enumerate(LATENCY_BUCKETS)
+        ],
+        'daily': daily,
+        'landlords': landlords,
+    }
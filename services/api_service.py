@@ -0,0 +1,173 @@
+"""
+API Service - Read Queries Behind /api/v1
+
+Each list resource maps public field names to columns of one table. Clients
+pick fields with ?fields=, and only those columns are selected. Lists are
+newest first with keyset pagination on the primary key: the cursor is the
+last id returned, and the next page is WHERE id < cursor, an index range
+scan however deep the client pages.
+
+Lists also take the record filters (?from=, ?to=, ?status=, ?type=,
+?phone=; see db_service.parse_filters), applied as indexed WHERE conditions.
+
+Phone numbers leave the server masked, with phone_hash for linking.
+"""
+from services import db_service
+from services.phone import mask_phone
+from services.verification_service import verification_stats
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# resource -> (table, {public field: column}); 'id' is always returned
+RESOURCES = {
+    'landlords': ('landlord_record', {
+        'id': 'id', 'name': 'name', 'phone': 'phone_number', 'phone_hash': 'phone_hash',
+        'email': 'email', 'home_address': 'home_address', 'num_units': 'num_units',
+        'reply': 'reply', 'status': 'status', 'timestamp': 'timestamp', 'created_at': 'created_at',
+    }),
+    'tenants': ('tenants', {
+        'id': 'id', 'name': 'name', 'phone': 'phone_number', 'phone_hash': 'phone_hash',
+        'email': 'email', 'address': 'address', 'rent_amount': 'rent_amount',
+        'reply': 'reply', 'status': 'status', 'timestamp': 'timestamp', 'created_at': 'created_at',
+    }),
+    'outgoing': ('outgoing_messages', {
+        'id': 'id', 'name': 'landlord_name', 'phone': 'landlord_phone', 'phone_hash': 'phone_hash',
+        'address': 'landlord_address', 'email': 'landlord_email', 'body': 'message_body',
+        'status': 'status', 'sent_at': 'sent_at',
+    }),
+    'incoming': ('incoming_messages', {
+        'id': 'id', 'phone': 'landlord_phone', 'phone_hash': 'phone_hash', 'body': 'message_body',
+        'status': 'status', 'record_type': 'record_type', 'received_at': 'received_at',
+    }),
+}
+
+# resource -> db_service.filter_conditions() columns. Outgoing messages have
+# a delivery status rather than a reply status, so they can't filter on it.
+FILTER_COLUMNS = {
+    'landlords': dict(date_column='created_at', status_column='status', phone_column='phone_key',
+                      implied_type='landlord'),
+    'tenants': dict(date_column='created_at', status_column='status', phone_column='phone_key',
+                    implied_type='tenant'),
+    'outgoing': dict(date_column='sent_at', phone_column='phone_key', implied_type='landlord'),
+    'incoming': dict(date_column='received_at', status_column='status', type_column='record_type',
+                     phone_column='phone_key'),
+}
+
+# Tables whose status column (YES/NO/PENDING/OTHER) is summarised in /stats
+_STATUS_TABLES = (
+    ('landlords', 'landlord_record'),
+    ('tenants', 'tenants'),
+    ('incoming', 'incoming_messages'),
+)
+
+
+def select_fields(resource, fields=None):
+    """
+    Validate a ?fields= value.
+
+    Args:
+        resource (str): Key of RESOURCES
+        fields (str): Comma-separated field names; empty selects every field
+    Returns:
+        list: Field names, 'id' first
+    Raises:
+        ValueError: If a field is unknown
+    """
+    columns = RESOURCES[resource][1]
+    names = [name.strip() for name in (fields or '').split(',') if name.strip()]
+    if not names:
+        return list(columns)
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(columns)}")
+    return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+
+def check_filters(resource, filters):
+    """
+    Raises:
+        ValueError: If a filter is set that `resource` can't apply
+    """
+    db_service.filter_conditions(filters, False, **FILTER_COLUMNS[resource])
+
+
+def resource_query(is_postgres, resource, fields, cursor=None, limit=DEFAULT_LIMIT,
+                   filters=db_service.NO_FILTERS):
+    """
+    Query and parameters for one page of a list resource (see list_resource()).
+
+    Raises:
+        ValueError: If a filter doesn't apply to this resource
+    """
+    table, columns = RESOURCES[resource]
+    placeholder = '%s' if is_postgres else '?'
+    conditions, params = db_service.filter_conditions(filters, is_postgres, **FILTER_COLUMNS[resource])
+    if cursor is not None:
+        conditions.append(f"id < {placeholder}")
+        params.append(int(cursor))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    # One extra row tells us whether there is a next page
+    query = (
+        f"SELECT {', '.join(columns[name] for name in fields)} FROM {table}{where} "
+        f"ORDER BY id DESC LIMIT {limit + 1}"
+    )
+    return query, params
+
+
+def list_resource(conn, is_postgres, resource, fields, cursor=None, limit=DEFAULT_LIMIT,
+                  filters=db_service.NO_FILTERS):
+    """
+    One page of a list resource, newest first.
+
+    Args:
+        conn: Database connection
+        is_postgres (bool): Database flavour
+        resource (str): Key of RESOURCES
+        fields (list): Names from select_fields()
+        cursor (int): Last id of the previous page, or None for the first page
+        limit (int): Page size (capped at MAX_LIMIT)
+        filters (RecordFilters): From db_service.parse_filters()
+    Returns:
+        tuple: (items, next_cursor); next_cursor is None on the last page
+    Raises:
+        ValueError: If a filter doesn't apply to this resource
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    query, params = resource_query(is_postgres, resource, fields, cursor, limit, filters)
+
+    db_cursor = conn.cursor()
+    db_cursor.execute(query, params)
+    rows = db_cursor.fetchall()
+
+    phone_index = fields.index('phone') if 'phone' in fields else None
+    items = []
+    for row in rows[:limit]:
+        values = list(row)
+        if phone_index is not None:
+            values[phone_index] = mask_phone(values[phone_index])
+        items.append(dict(zip(fields, values)))
+    next_cursor = items[-1]['id'] if len(rows) > limit else None
+    return items, next_cursor
+
+
+def get_stats(conn, is_postgres):
+    """
+    Totals across all records (not just the rows the dashboard lists).
+
+    Returns:
+        dict: Per-table total/yes/no/pending counts, outgoing total and
+            verification request stats
+    """
+    cursor = conn.cursor()
+    stats = {}
+    for name, table in _STATUS_TABLES:
+        cursor.execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status")
+        counts = {status: count for status, count in (tuple(row) for row in cursor.fetchall())}
+        total = sum(counts.values())
+        yes, no = counts.get('YES', 0), counts.get('NO', 0)
+        stats[name] = {'total': total, 'yes': yes, 'no': no, 'pending': total - yes - no}
+    cursor.execute("SELECT COUNT(*) FROM outgoing_messages")
+    stats['outgoing'] = {'total': cursor.fetchone()[0]}
+    stats['verification'] = verification_stats(cursor, is_postgres)
+    return stats
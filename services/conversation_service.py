@@ -0,0 +1,146 @@
+"""
+Conversation Service - One Number's Message History
+
+Merges outgoing_messages and incoming_messages for a single phone_key into
+one time-ordered thread, newest first. Both tables are read through their
+(phone_key, timestamp, id) indexes, so a page costs the same however much
+history the number (or anyone else) has.
+
+Pages use keyset pagination: the cursor is the (timestamp, kind, id) of the
+last message shown, and the next page starts strictly after it.
+"""
+
+# Page size for the conversation view
+PAGE_SIZE = 50
+
+# Sort order of the two message kinds when timestamps tie
+KIND_OUTGOING = 'out'
+KIND_INCOMING = 'in'
+
+_SOURCES = (
+    # kind, table, timestamp column, columns read
+    (KIND_OUTGOING, 'outgoing_messages', 'sent_at',
+     'id, sent_at, message_body, status, landlord_name, twilio_message_sid'),
+    (KIND_INCOMING, 'incoming_messages', 'received_at',
+     'id, received_at, message_body, status, record_type, NULL'),
+)
+
+# Tables searched, in order, to turn a phone_hash back into a phone_key
+_HASH_TABLES = ('landlord_record', 'tenants', 'outgoing_messages', 'incoming_messages')
+
+
+def find_phone_key(cursor, is_postgres, phone_hash):
+    """
+    Look up the number behind a phone_hash through the phone_hash indexes.
+
+    Returns:
+        str or None: The phone_key, or None if no table has that hash
+    """
+    placeholder = '%s' if is_postgres else '?'
+    for table in _HASH_TABLES:
+        cursor.execute(
+            f"SELECT phone_key FROM {table} WHERE phone_hash = {placeholder} LIMIT 1",
+            (phone_hash,)
+        )
+        row = cursor.fetchone()
+        if row and row[0]:
+            return row[0]
+    return None
+
+
+def encode_cursor(message):
+    """Keyset cursor for the page after `message`."""
+    return f"{message['timestamp']}|{message['kind']}|{message['id']}"
+
+
+def decode_cursor(value):
+    """
+    Parse a cursor from encode_cursor().
+
+    Returns:
+        tuple or None: (timestamp, kind, id), or None if the value is malformed
+    """
+    try:
+        timestamp, kind, message_id = value.rsplit('|', 2)
+        if kind not in (KIND_OUTGOING, KIND_INCOMING):
+            return None
+        return timestamp, kind, int(message_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _page_filter(kind, timestamp_column, before, placeholder):
+    """WHERE clause (after phone_key) selecting rows that sort after the cursor, newest first."""
+    if before is None:
+        return '', ()
+    timestamp, cursor_kind, cursor_id = before
+    if kind == cursor_kind:
+        return f" AND ({timestamp_column}, id) < ({placeholder}, {placeholder})", (timestamp, cursor_id)
+    # On equal timestamps 'out' sorts before 'in' (kinds descending), as in the merge below
+    if kind < cursor_kind:
+        return f" AND {timestamp_column} <= {placeholder}", (timestamp,)
+    return f" AND {timestamp_column} < {placeholder}", (timestamp,)
+
+
+def get_conversation(conn, is_postgres, phone_key, before=None, limit=PAGE_SIZE):
+    """
+    One page of a number's messages, newest first.
+
+    Args:
+        conn: Database connection
+        is_postgres (bool): Database flavour
+        phone_key (str): E.164 number
+        before (tuple): Decoded cursor to continue from, or None for the newest page
+        limit (int): Messages per page
+    Returns:
+        tuple: (messages, next_cursor) where next_cursor is None on the last page
+    """
+    placeholder = '%s' if is_postgres else '?'
+    cursor = conn.cursor()
+    messages = []
+    for kind, table, timestamp_column, columns in _SOURCES:
+        page_filter, page_params = _page_filter(kind, timestamp_column, before, placeholder)
+        cursor.execute(
+            f"SELECT {columns} FROM {table} WHERE phone_key = {placeholder}{page_filter} "
+            f"ORDER BY {timestamp_column} DESC, id DESC LIMIT {int(limit) + 1}",
+            (phone_key,) + page_params
+        )
+        for row in cursor.fetchall():
+            message_id, timestamp, body, status, detail, sid = tuple(row)
+            messages.append({
+                'kind': kind,
+                'id': message_id,
+                'timestamp': str(timestamp),
+                'body': body,
+                'status': status,
+                # Landlord name on outbound rows, record type on inbound ones
+                'detail': detail,
+                'twilio_sid': sid,
+            })
+
+    messages.sort(key=lambda m: (m['timestamp'], m['kind'], m['id']), reverse=True)
+    page = messages[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(messages) > limit else None
+    return page, next_cursor
+
+
+def get_contact(conn, is_postgres, phone_key):
+    """
+    The landlord and tenant rows for a number (one each at most).
+
+    Returns:
+        dict: 'landlord' and 'tenant', each a dict of details or None
+    """
+    placeholder = '%s' if is_postgres else '?'
+    cursor = conn.cursor()
+    contact = {}
+    for role, table, address_column in (('landlord', 'landlord_record', 'home_address'),
+                                        ('tenant', 'tenants', 'address')):
+        cursor.execute(
+            f"SELECT name, email, {address_column}, status, reply, timestamp "
+            f"FROM {table} WHERE phone_key = {placeholder}",
+            (phone_key,)
+        )
+        row = cursor.fetchone()
+        contact[role] = dict(zip(('name', 'email', 'address', 'status', 'reply', 'timestamp'), tuple(row))) if row else None
+    return contact
@@ -0,0 +1,258 @@
+"""
+Dashboard Service - Column Projections and Row Types for dashboard.html
+
+Each table the dashboard lists has:
+- a projection selecting only the columns the page shows, narrowed by the
+  record filters (db_service.filter_conditions) when the page has any set
+- a namedtuple row type with exactly the fields the template reads
+- a make_row function turning one result tuple into that row type
+
+fetch_rows() installs make_row as the cursor's row factory on SQLite (and
+applies it while iterating on PostgreSQL), so every row is shaped in a
+single pass: the phone is masked, timestamps are stringified and nothing
+else is copied. Rows are immutable, so cached dashboards can be shared
+between requests safely.
+
+fetch_sections() runs the page's independent queries. On PostgreSQL they run
+concurrently on pooled connections, so a page costs one round trip plus the
+slowest query instead of one round trip per section. SQLite is local and
+runs them in turn on the request's connection.
+"""
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from services import db_service
+from services.phone import mask_phone
+from services.verification_service import format_duration
+
+# Rows per table on the dashboard
+DASHBOARD_LIMIT = 100
+
+# Threads running dashboard sections on their own pooled connections. The
+# dashboard cache is single-flight, so a worker process rarely loads more than
+# one dashboard at a time and needs about this many extra connections.
+SECTION_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Returned by a pooled section that could not get a connection
+_NO_CONNECTION = object()
+
+OutgoingMessage = namedtuple('OutgoingMessage', (
+    'name', 'phone', 'phone_hash', 'address', 'email', 'body', 'sent_at', 'status',
+    'verification', 'verification_id', 'reply_status', 'reply_time'
+))
+IncomingMessage = namedtuple('IncomingMessage', ('phone', 'phone_hash', 'body', 'status', 'received_at'))
+LandlordRecord = namedtuple('LandlordRecord', (
+    'name', 'phone', 'phone_hash', 'email', 'home_address', 'num_units', 'status'
+))
+TenantRecord = namedtuple('TenantRecord', (
+    'name', 'phone', 'phone_hash', 'email', 'address', 'rent_amount', 'status'
+))
+
+OUTGOING_SELECT = (
+    "SELECT o.landlord_name, o.landlord_phone, o.phone_hash, o.landlord_address, o.landlord_email, "
+    "o.message_body, o.sent_at, o.status, v.state, v.id, v.reply_status, v.opened_at, v.resolved_at "
+    "FROM outgoing_messages o LEFT JOIN verification_requests v ON v.outgoing_message_id = o.id"
+)
+INCOMING_SELECT = "SELECT landlord_phone, phone_hash, message_body, status, received_at FROM incoming_messages"
+LANDLORD_SELECT = (
+    "SELECT name, phone_number, phone_hash, email, home_address, num_units, status FROM landlord_record"
+)
+TENANT_SELECT = "SELECT name, phone_number, phone_hash, email, address, rent_amount, status FROM tenants"
+# CSV export: every reply, as recorded in incoming_messages
+EXPORT_SELECT = "SELECT landlord_phone, message_body, record_type, received_at FROM incoming_messages"
+
+
+def _section_query(select, conditions, order_by):
+    """Newest DASHBOARD_LIMIT rows of `select` matching `conditions`."""
+    if conditions:
+        select += ' WHERE ' + ' AND '.join(conditions)
+    return f"{select} ORDER BY {order_by} LIMIT {DASHBOARD_LIMIT}"
+
+
+def outgoing_query(filters, is_postgres):
+    """
+    Outgoing section query and parameters. Outbound messages only go to
+    landlords; their status is that of the reply they got (pending until
+    a YES/NO arrives).
+
+    Args:
+        filters (RecordFilters): From db_service.parse_filters()
+        is_postgres (bool): Database flavour
+    Returns:
+        tuple: (query, params)
+    """
+    conditions, params = db_service.filter_conditions(
+        filters, is_postgres, date_column='o.sent_at', status_column="COALESCE(v.reply_status, 'PENDING')",
+        phone_column='o.phone_key', implied_type='landlord'
+    )
+    return _section_query(OUTGOING_SELECT, conditions, 'o.sent_at DESC'), params
+
+
+def incoming_query(filters, is_postgres):
+    """Incoming section (landlord replies) query and parameters."""
+    conditions, params = db_service.filter_conditions(
+        filters, is_postgres, date_column='received_at', status_column='status',
+        phone_column='phone_key', implied_type='landlord'
+    )
+    return _section_query(INCOMING_SELECT, ["record_type = 'landlord'"] + conditions, 'received_at DESC'), params
+
+
+def landlord_query(filters, is_postgres):
+    """Landlord records section query and parameters."""
+    conditions, params = db_service.filter_conditions(
+        filters, is_postgres, date_column='created_at', status_column='status',
+        phone_column='phone_key', implied_type='landlord'
+    )
+    return _section_query(LANDLORD_SELECT, conditions, 'created_at DESC'), params
+
+
+def tenant_query(filters, is_postgres):
+    """Tenant records section query and parameters."""
+    conditions, params = db_service.filter_conditions(
+        filters, is_postgres, date_column='created_at', status_column='status',
+        phone_column='phone_key', implied_type='tenant'
+    )
+    return _section_query(TENANT_SELECT, conditions, 'created_at DESC'), params
+
+
+def export_query(filters, is_postgres):
+    """CSV export query (all matching replies, newest first) and parameters."""
+    conditions, params = db_service.filter_conditions(
+        filters, is_postgres, date_column='received_at', status_column='status',
+        type_column='record_type', phone_column='phone_key'
+    )
+    query = EXPORT_SELECT
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    return query + " ORDER BY received_at DESC", params
+
+
+def _reply_time(opened_at, resolved_at):
+    """Time from send to reply for one verification request ('' while open)."""
+    if not opened_at or not resolved_at:
+        return ''
+    if isinstance(opened_at, str):
+        # SQLite returns CURRENT_TIMESTAMP values as 'YYYY-MM-DD HH:MM:SS'
+        opened_at = datetime.fromisoformat(opened_at)
+        resolved_at = datetime.fromisoformat(resolved_at)
+    return format_duration((resolved_at - opened_at).total_seconds())
+
+
+def make_outgoing(values):
+    (name, phone, phone_hash, address, email, body, sent_at, status,
+     verification, verification_id, reply_status, opened_at, resolved_at) = values
+    return OutgoingMessage(
+        name, mask_phone(phone), phone_hash, address, email, body, str(sent_at), status,
+        verification, verification_id, reply_status, _reply_time(opened_at, resolved_at)
+    )
+
+
+def make_incoming(values):
+    # status is normalized at ingest (YES/NO/OTHER/PENDING)
+    phone, phone_hash, body, status, received_at = values
+    return IncomingMessage(mask_phone(phone, fallback='Unknown'), phone_hash, body, status, str(received_at))
+
+
+def make_landlord(values):
+    name, phone, phone_hash, email, home_address, num_units, status = values
+    return LandlordRecord(name, mask_phone(phone), phone_hash, email, home_address, num_units, status)
+
+
+def make_tenant(values):
+    name, phone, phone_hash, email, address, rent_amount, status = values
+    return TenantRecord(name, mask_phone(phone), phone_hash, email, address, rent_amount, status)
+
+
+def fetch_rows(conn, is_postgres, query, make_row, params=None):
+    """
+    Run a projection and shape each result row as it is read.
+
+    Args:
+        conn: Database connection
+        is_postgres (bool): Database flavour
+        query (str): SELECT whose columns match make_row's unpacking
+        make_row (func): Builds one row object from a tuple of column values
+        params (tuple): Query parameters
+    Returns:
+        list: Row objects
+    """
+    cursor = conn.cursor()
+    if is_postgres:
+        cursor.execute(query, params)
+        return [make_row(values) for values in cursor]
+    cursor.row_factory = lambda _, values: make_row(values)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def _get_executor():
+    """Section thread pool, created on first use (after any gunicorn fork)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix='dashboard')
+    return _executor
+
+
+def _run_section(conn, loader):
+    """Run one section loader; returns (result, error)."""
+    try:
+        return loader(conn), None
+    except Exception as e:
+        conn.rollback()
+        return None, e
+
+
+def _run_pooled(loader):
+    """Run one section loader on its own pooled connection, if one is free right now."""
+    try:
+        # Never wait: the request's own connection can run the section instead
+        conn = db_service.get_read_connection(timeout=0)
+    except Exception:
+        return _NO_CONNECTION, None
+    try:
+        return _run_section(conn, loader)
+    finally:
+        db_service.close_db_connection(conn)
+
+
+def fetch_sections(conn, is_postgres, loaders):
+    """
+    Run independent dashboard queries.
+
+    On PostgreSQL the first loader runs on `conn` while the others run
+    concurrently on pooled connections; any loader that finds no idle pooled
+    connection runs on `conn` afterwards, without waiting for one, so a busy
+    pool makes the page no slower than running the sections in turn.
+
+    Args:
+        conn: The request's connection
+        is_postgres (bool): Database flavour
+        loaders (dict): Section name -> func(conn) returning that section's data
+    Returns:
+        tuple: (results, errors) dicts keyed by section name; a failed
+            section appears only in errors
+    """
+    outcomes = {}
+    names = list(loaders)
+    if is_postgres and len(names) > 1:
+        executor = _get_executor()
+        futures = {name: executor.submit(_run_pooled, loaders[name]) for name in names[1:]}
+        outcomes[names[0]] = _run_section(conn, loaders[names[0]])
+        for name, future in futures.items():
+            outcomes[name] = future.result()
+        for name in names[1:]:
+            if outcomes[name][0] is _NO_CONNECTION:
+                outcomes[name] = _run_section(conn, loaders[name])
+    else:
+        for name in names:
+            outcomes[name] = _run_section(conn, loaders[name])
+
+    results = {name: result for name, (result, error) in outcomes.items() if error is None}
+    errors = {name: error for name, (result, error) in outcomes.items() if error is not None}
+    return results, errors
@@ -0,0 +1,93 @@
+"""
+Data Version - A Counter Bumped by Every Write the Dashboard Shows
+
+Cached dashboard data is keyed on this counter, so a cached copy is served
+until something is written and every worker sees the change on its next
+read (one primary-key/sequence lookup):
+- PostgreSQL: the data_version_seq sequence; nextval() never blocks
+  concurrent writers
+- SQLite: the single data_version row
+
+Writers bump after committing, so a reader can never cache pre-commit data
+under the new version. Writes that never bump (a failed bump, scripts run
+outside the app) are still picked up within DASHBOARD_CACHE_TTL, because
+version_tag() also changes once per TTL window.
+"""
+import time
+import logging
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def bump_version(conn):
+    """
+    Advance the data version after a committed write. Never raises; a failed
+    bump only means cached pages live until their TTL.
+
+    Args:
+        conn: Connection the write was committed on
+    Returns:
+        int or None: The new version, or None if the bump failed
+    """
+    try:
+        cursor = conn.cursor()
+        if get_settings().is_postgres:
+            cursor.execute("SELECT nextval('data_version_seq')")
+        else:
+            cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+            cursor.execute("SELECT version FROM data_version WHERE id = 1")
+        version = cursor.fetchone()[0]
+        conn.commit()
+        return version
+    except Exception as e:
+        logger.warning(f"Could not bump data version: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return None
+
+
+def current_version(conn):
+    """
+    Read the data version.
+
+    Returns:
+        int or None: The version, or None if it can't be read (caching is skipped)
+    """
+    try:
+        cursor = conn.cursor()
+        if get_settings().is_postgres:
+            cursor.execute("SELECT last_value, is_called FROM data_version_seq")
+            last_value, is_called = tuple(cursor.fetchone())
+            return last_value if is_called else 0
+        cursor.execute("SELECT version FROM data_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        logger.warning(f"Could not read data version: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return None
+
+
+
+def version_tag(version, ttl):
+    """
+    Validator part for data served under `version`: the version plus the
+    current `ttl`-second window, so a browser's copy is refetched at least
+    once per window even if a write never bumped the version.
+
+    Args:
+        version (int): current_version() result
+        ttl (float): DASHBOARD_CACHE_TTL
+    Returns:
+        str or None: e.g. 'v42-e57012'; None (send no ETag, so no 304s) when
+            the version is unknown or ttl is 0
+    """
+    if version is None or ttl <= 0:
+        return None
+    return f"v{version}-e{int(time.time() // ttl)}"
@@ -1,101 +1,784 @@
 """
 DB Service - Database Interaction Logic
 Supports both PostgreSQL (production) and SQLite (local development)
+
+Connections:
+- get_db_connection(): read-write connection (pooled on PostgreSQL)
+- get_read_connection(): for pages, exports and the API; a pooled read-only
+  connection on SQLite
+- write(fn): runs fn(conn) as one committed write; on SQLite every write
+  goes through this process's single writer thread
 """
 import os
+import re
+import time
+import queue
 import sqlite3
 import logging
-try:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-except Exception:  # psycopg2 may be unavailable in local dev (e.g., Python 3.14)
-    psycopg2 = None
-    RealDictCursor = None
+import threading
+from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import Future
+from datetime import date, timedelta
+from functools import lru_cache
+from utils import metrics
+from utils.settings import get_settings
+
+# psycopg2 is imported on first PostgreSQL use (see _load_psycopg2) so that
+# SQLite/local processes and cold starts don't pay for it.
+psycopg2 = None
+RealDictCursor = None
 
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
-    """
-    Get database connection.
-    Uses PostgreSQL if DATABASE_URL is set, otherwise SQLite for local development.
-    """
-    DATABASE_URL = os.getenv('DATABASE_URL')
-    
-    if DATABASE_URL:
-        # PostgreSQL (production)
-        if psycopg2 is None:
+
+def _load_psycopg2():
+    """Import psycopg2 on demand; raises a helpful error if it is unavailable."""
+    global psycopg2, RealDictCursor
+    if psycopg2 is None:
+        try:
+            import psycopg2 as _psycopg2
+            import psycopg2.pool
+            from psycopg2.extras import RealDictCursor as _RealDictCursor
+        except Exception:  # psycopg2 may be unavailable in local dev (e.g., Python 3.14)
             raise ModuleNotFoundError(
                 "psycopg2 is required for PostgreSQL mode but is not installed. "
                 "Unset DATABASE_URL for SQLite local dev, or install psycopg2-binary on a supported Python version."
             )
+        RealDictCursor = _RealDictCursor
+        psycopg2 = _psycopg2
+    return psycopg2
+
+# ==================== Statement Instrumentation ====================
+
+_STATEMENT_RE = re.compile(
+    r'^\s*(?:(SELECT|DELETE)\b.*?\bFROM|(INSERT)\s+INTO|(UPDATE)|(CREATE|ALTER|DROP)\s+\w+(?:\s+IF\s+(?:NOT\s+)?EXISTS)?|(PRAGMA))\s+"?(\w+)',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+@lru_cache(maxsize=512)
+def statement_name(query):
+    """
+    Derive a low-cardinality metric name from a SQL statement,
+    e.g. "select outgoing_messages" or "insert incoming_messages".
+    """
+    match = _STATEMENT_RE.match(query)
+    if not match:
+        return query.split(None, 1)[0].lower() if query.strip() else 'unknown'
+    verb = next(group for group in match.groups()[:-1] if group)
+    return f"{verb.split()[0].lower()} {match.group(6).lower()}"
+
+
+# Callables invoked as listener(cursor, query, params, seconds) after every
+# statement; used by request profiling and the slow-query log.
+_query_listeners = []
+
+
+def add_query_listener(listener):
+    """Register a callable to be notified after every executed statement."""
+    if listener not in _query_listeners:
+        _query_listeners.append(listener)
+
+
+def _record_statement(cursor, query, params, seconds):
+    metrics.observe_db_query(statement_name(query), seconds)
+    for listener in _query_listeners:
         try:
-            conn = psycopg2.connect(DATABASE_URL)
-            return conn
+            listener(cursor, query, params, seconds)
         except Exception as e:
-            logger.error(f"PostgreSQL connection error: {e}")
+            logger.warning(f"Query listener failed: {e}")
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times every statement."""
+
+    __slots__ = ('_cursor',)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            if params is None:
+                return self._cursor.execute(query)
+            return self._cursor.execute(query, params)
+        finally:
+            _record_statement(self._cursor, query, params, time.perf_counter() - started)
+
+    def executemany(self, query, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, seq_of_params)
+        finally:
+            _record_statement(self._cursor, query, None, time.perf_counter() - started)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # Attributes such as sqlite3's row_factory belong to the wrapped cursor
+        if name in InstrumentedCursor.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+
+class InstrumentedConnection:
+    """Connection proxy that hands out timed cursors and tracks checkout."""
+
+    __slots__ = ('_conn', '_release')
+
+    def __init__(self, conn, release):
+        self._conn = conn
+        self._release = release
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def close(self):
+        """Return the connection to the pool (PostgreSQL) or close it (SQLite)."""
+        conn = self._conn
+        if conn is None:
+            return
+        self._conn = None
+        metrics.connection_released()
+        self._release(conn)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise RuntimeError("Database connection used after close()")
+        return getattr(self._conn, name)
+
+
+# ==================== Connection Pool ====================
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within DB_POOL_TIMEOUT."""
+
+
+class ConnectionPool:
+    """
+    Process-local PostgreSQL pool.
+
+    psycopg2's ThreadedConnectionPool raises as soon as it is exhausted, so
+    checkouts are bounded by a semaphore instead and callers wait up to
+    `timeout` seconds for a connection to be returned.
+    """
+
+    def __init__(self, dsn, minconn, maxconn, timeout, connect_timeout):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn, maxconn, dsn, connect_timeout=connect_timeout
+        )
+
+    def acquire(self, timeout=None):
+        """
+        Check out a connection.
+
+        Args:
+            timeout (float): Seconds to wait for one to be returned
+                (default: the pool's timeout; 0 fails at once)
+        Returns:
+            tuple: (connection, waited: bool)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        waited = not self._slots.acquire(blocking=False)
+        if waited and (timeout <= 0 or not self._slots.acquire(timeout=timeout)):
+            raise PoolTimeout(f"No database connection available within {timeout}s")
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
             raise
+        with self._lock:
+            self._in_use += 1
+        return conn, waited
+
+    def release(self, conn):
+        """Return the connection (putconn rolls back any open transaction)."""
+        try:
+            self._pool.putconn(conn, close=bool(conn.closed))
+        except Exception:
+            self._pool.putconn(conn, close=True)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Return pool occupancy for health checks."""
+        with self._lock:
+            return {'size': self.maxconn, 'in_use': self._in_use}
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return this process's PostgreSQL pool, creating it on first use.
+    The pid check makes it safe to import before gunicorn forks workers.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _load_psycopg2()
+            settings = get_settings()
+            _pool = ConnectionPool(
+                settings.database_url,
+                minconn=settings.db_pool_min,
+                maxconn=settings.db_pool_max,
+                timeout=settings.db_pool_timeout,
+                connect_timeout=settings.db_connect_timeout
+            )
+            _pool_pid = pid
+    return _pool
+
+
+# ==================== SQLite Profile ====================
+#
+# Local/edge deployments run many request threads against one database file:
+# - every connection uses WAL (readers and the writer don't block each
+#   other), synchronous=NORMAL (no fsync per commit; WAL stays consistent),
+#   a larger page cache, memory-mapped reads and a busy timeout, so a
+#   briefly locked database is waited on rather than "database is locked"
+# - reads use a pool of read-only connections
+# - writes are queued to one writer thread, which runs whatever has queued
+#   up in a single transaction (one savepoint per job, so a failing job
+#   rolls back alone) and commits once for the whole batch
+
+SQLITE_PATH = Path(__file__).resolve().parent.parent / 'instance' / 'rent_data.db'
+
+# Most write() jobs committed together
+WRITE_BATCH_SIZE = 64
+
+
+def _sqlite_connect(read_only=False):
+    """Open a SQLite connection with the profile's pragmas."""
+    settings = get_settings()
+    timeout = settings.sqlite_busy_timeout_ms / 1000
+    if read_only:
+        # Handed between request threads by the reader pool, one at a time
+        conn = sqlite3.connect(f"{SQLITE_PATH.as_uri()}?mode=ro", uri=True, timeout=timeout,
+                               check_same_thread=False)
     else:
-        # SQLite (local development)
-        DB_PATH = os.path.join(os.path.dirname(__file__), '../instance/rent_data.db')
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        SQLITE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(SQLITE_PATH), timeout=timeout)
+        # Stored in the database file; a no-op once set
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{settings.sqlite_cache_size_kb}")
+    conn.execute(f"PRAGMA mmap_size = {settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    return conn
+
+
+_readers = []
+_readers_pid = None
+_readers_lock = threading.Lock()
+
+
+def _acquire_reader():
+    global _readers, _readers_pid
+    with _readers_lock:
+        if _readers_pid != os.getpid():
+            # Connections opened before a fork belong to the parent
+            _readers, _readers_pid = [], os.getpid()
+        if _readers:
+            return _readers.pop()
+    return _sqlite_connect(read_only=True)
+
+
+def _release_reader(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    with _readers_lock:
+        if _readers_pid == os.getpid() and len(_readers) < get_settings().sqlite_read_pool:
+            _readers.append(conn)
+            return
+    conn.close()
+
+
+class WriterConnection:
+    """
+    The connection a write() job receives on SQLite. commit() keeps the
+    job's work so far (the writer commits it with the rest of the batch),
+    rollback() undoes the job's statements since then, and close() is a
+    no-op. after_commit() callbacks run once the batch is on disk.
+    """
+
+    __slots__ = ('_conn', 'callbacks')
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.callbacks = []
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        self._conn.execute("RELEASE write_job")
+        self._conn.execute("SAVEPOINT write_job")
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK TO write_job")
+
+    def close(self):
+        pass
+
+    def after_commit(self, callback):
+        self.callbacks.append(callback)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+_WriteJob = namedtuple('_WriteJob', ('fn', 'future'))
+
+_writer = None
+_writer_queue = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer_queue():
+    """This process's write queue, starting the writer thread on first use (after any fork)."""
+    global _writer, _writer_queue, _writer_pid
+    pid = os.getpid()
+    if _writer_queue is not None and _writer_pid == pid:
+        return _writer_queue
+    with _writer_lock:
+        if _writer_queue is None or _writer_pid != pid:
+            jobs = queue.Queue()
+            _writer = threading.Thread(target=_write_forever, args=(jobs,), name='sqlite-writer', daemon=True)
+            _writer.start()
+            _writer_queue, _writer_pid = jobs, pid
+    return _writer_queue
+
+
+def _write_forever(jobs):
+    conn = None
+    while True:
+        batch = [jobs.get()]
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(jobs.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if conn is None:
+                conn = _sqlite_connect()
+                # Transactions are managed explicitly below
+                conn.isolation_level = None
+            _write_batch(conn, batch)
+        except Exception as e:
+            logger.error(f"SQLite write batch of {len(batch)} failed: {e}")
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+        # Jobs queued while this batch ran
+        metrics.set_queue_depth('sqlite_writer', jobs.qsize())
+
+
+def _write_batch(conn, batch):
+    """Run queued jobs in one transaction, then resolve their futures."""
+    outcomes = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for job in batch:
+            job_conn = WriterConnection(conn)
+            conn.execute("SAVEPOINT write_job")
+            try:
+                result = job.fn(job_conn)
+            except Exception as e:
+                conn.execute("ROLLBACK TO write_job")
+                outcomes.append((job, None, e, ()))
+            else:
+                outcomes.append((job, result, None, job_conn.callbacks))
+            conn.execute("RELEASE write_job")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    for job, result, error, callbacks in outcomes:
+        if error is not None:
+            job.future.set_exception(error)
+            continue
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"after_commit callback failed: {e}")
+        job.future.set_result(result)
+
+
+def write(fn):
+    """
+    Run fn(conn) as one write and commit it before returning.
+
+    On SQLite, fn runs on this process's writer thread, batched with other
+    queued writes; fn may call conn.commit()/conn.rollback() as usual, and
+    anything it registers with conn.after_commit() runs after the batch
+    commits. On PostgreSQL, fn runs on a pooled connection. fn must not
+    close the connection.
+
+    Args:
+        fn (func): Takes a connection; its return value is returned
+    Returns:
+        Whatever fn returned
+    Raises:
+        Exception: Whatever fn raised (its uncommitted statements are rolled back)
+    """
+    if get_settings().is_postgres:
+        conn = get_db_connection()
+        try:
+            result = fn(conn)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    if threading.current_thread() is _writer:
+        raise RuntimeError("write() called from inside a write job")
+    future = Future()
+    jobs = _get_writer_queue()
+    jobs.put(_WriteJob(fn, future))
+    metrics.set_queue_depth('sqlite_writer', jobs.qsize())
+    return future.result()
+
+
+# ==================== Connections ====================
+
+def get_db_connection(timeout=None):
+    """
+    Get database connection.
+    Uses PostgreSQL if DATABASE_URL is set, otherwise SQLite for local development.
+    PostgreSQL connections come from the process pool; closing the returned
+    connection hands it back. Statement latency is reported to /metrics.
+
+    Args:
+        timeout (float): PostgreSQL only: seconds to wait for a free pooled
+            connection (default DB_POOL_TIMEOUT; 0 raises PoolTimeout at once)
+    """
+    started = time.perf_counter()
+    if get_settings().is_postgres:
+        pool = get_pool()
+        try:
+            conn, waited = pool.acquire(timeout)
+        except Exception as e:
+            # A non-blocking miss is expected; the caller falls back
+            if not (timeout == 0 and isinstance(e, PoolTimeout)):
+                logger.error(f"PostgreSQL connection error: {e}")
+            raise
+        metrics.connection_acquired(time.perf_counter() - started, waited)
+        return InstrumentedConnection(conn, pool.release)
+    conn = _connect()
+    metrics.connection_acquired(time.perf_counter() - started)
+    return InstrumentedConnection(conn, _close_raw)
+
+
+def _close_raw(conn):
+    conn.close()
+
+
+def _connect():
+    """Open a raw read-write SQLite connection (local development)."""
+    return _sqlite_connect()
+
+
+def get_read_connection(timeout=None):
+    """
+    Connection for read-only work: pages, exports and the API.
+    On SQLite it comes from the read-only pool (closing returns it);
+    on PostgreSQL it is an ordinary pooled connection (see get_db_connection
+    for `timeout`).
+    """
+    if get_settings().is_postgres:
+        return get_db_connection(timeout)
+    started = time.perf_counter()
+    conn = _acquire_reader()
+    metrics.connection_acquired(time.perf_counter() - started)
+    return InstrumentedConnection(conn, _release_reader)
+
+
+def prewarm_pool(count):
+    """
+    Open and verify up to `count` connections so the first requests reuse them.
+
+    Returns:
+        int: Number of connections opened and checked
+    """
+    if get_settings().is_postgres:
+        count = max(1, min(count, get_pool().maxconn))
+    else:
+        # Readers for the pool, and the writer thread ready for the first webhook
+        count = max(1, min(count, get_settings().sqlite_read_pool))
+        _get_writer_queue()
+    conns = []
+    try:
+        for _ in range(count):
+            conn = get_read_connection()
+            conns.append(conn)
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+def close_pool():
+    """Close this process's pooled connections (e.g. in the gunicorn master before fork)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+
 
 def close_db_connection(conn):
-    """Close database connection."""
+    """Close database connection (returns pooled connections to the pool)."""
     if conn:
         conn.close()
 
+
+def get_schema_version(conn):
+    """Return the highest applied schema version, or 0 if none is recorded."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return (row[0] if row else None) or 0
+
 def execute_query(query, params=None, fetch=False):
     """
     Execute a database query with automatic parameter style detection.
-    Returns cursor for PostgreSQL, or executes and returns results for SQLite.
+    With fetch=True the query is a read on a pooled read-only connection and
+    its rows are returned; otherwise it is run as a write() and None is returned.
     """
-    DATABASE_URL = os.getenv('DATABASE_URL')
-    conn = get_db_connection()
-    
-    try:
-        if DATABASE_URL:
-            # PostgreSQL - use %s placeholders
+    is_postgres = get_settings().is_postgres
+    if params and not is_postgres:
+        # Convert %s to ? for SQLite
+        query = query.replace('%s', '?')
+
+    def run(conn):
+        if is_postgres:
+            # PostgreSQL - dict rows
             cursor = conn.cursor(cursor_factory=RealDictCursor)  # type: ignore[arg-type]
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            if fetch:
-                results = cursor.fetchall()
-                conn.commit()
-                cursor.close()
-                conn.close()
-                return results
-            else:
-                conn.commit()
-                cursor.close()
-                conn.close()
-                return None
         else:
-            # SQLite - use ? placeholders
-            if params:
-                # Convert %s to ? for SQLite
-                query = query.replace('%s', '?')
             cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            if fetch:
-                results = cursor.fetchall()
-                conn.commit()
-                conn.close()
-                return results
-            else:
-                conn.commit()
-                conn.close()
-                return None
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        results = cursor.fetchall() if fetch else None
+        cursor.close()
+        return results
+
+    try:
+        if not fetch:
+            return write(run)
+        conn = get_read_connection()
+        try:
+            return run(conn)
+        finally:
+            conn.close()
     except Exception as e:
         logger.error(f"Query execution error: {e}")
-        if conn:
-            conn.rollback()
-            conn.close()
         raise
+
+
+# ==================== Record Filters ====================
+#
+# The dashboard, CSV export and /api/v1 share one set of filters. They are
+# parsed from the query string once and turned into parameterized WHERE
+# conditions here; the columns they touch are covered by the composite and
+# expression indexes from schema version 10 (test_query_plans.py checks
+# every combination against SQLite's query planner).
+
+# ?status= value -> status column values it matches. "pending" is anything
+# that isn't a YES or NO yet, as on the dashboard's counters.
+FILTER_STATUSES = {
+    'yes': ('YES',),
+    'no': ('NO',),
+    'pending': ('PENDING', 'OTHER'),
+}
+
+RECORD_TYPES = ('landlord', 'tenant')
+
+# Phone suffixes are looked up by the number's last digits, which have an
+# expression index; longer suffixes are then checked against the full number
+PHONE_SUFFIX_DIGITS = 4
+MAX_PHONE_SUFFIX_DIGITS = 15
+
+# Query string name of each filter
+FILTER_ARGS = ('from', 'to', 'status', 'type', 'phone')
+
+RecordFilters = namedtuple('RecordFilters', ('date_from', 'date_to', 'status', 'record_type', 'phone_suffix'))
+NO_FILTERS = RecordFilters(None, None, None, None, None)
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def parse_filters(args):
+    """
+    Read the record filters from a query string.
+
+    Args:
+        args (Mapping): request.args; ?from= and ?to= (inclusive dates,
+            YYYY-MM-DD), ?status= (yes/no/pending), ?type= (landlord/tenant)
+            and ?phone= (trailing digits of the number). Empty values are ignored.
+    Returns:
+        RecordFilters: Parsed filters (NO_FILTERS if none are set)
+    Raises:
+        ValueError: If a value is malformed
+    """
+    values = {name: (args.get(name) or '').strip() for name in FILTER_ARGS}
+    date_from = _parse_date(values['from'], 'from') if values['from'] else None
+    date_to = _parse_date(values['to'], 'to') if values['to'] else None
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("from must not be after to")
+    status = values['status'].lower() or None
+    if status and status not in FILTER_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(FILTER_STATUSES)}")
+    record_type = values['type'].lower() or None
+    if record_type and record_type not in RECORD_TYPES:
+        raise ValueError(f"type must be one of: {', '.join(RECORD_TYPES)}")
+    phone_suffix = re.sub(r'\D', '', values['phone']) or None
+    if values['phone'] and not (phone_suffix and PHONE_SUFFIX_DIGITS <= len(phone_suffix) <= MAX_PHONE_SUFFIX_DIGITS):
+        raise ValueError(f"phone must be the last {PHONE_SUFFIX_DIGITS} or more digits of a number")
+    return RecordFilters(date_from, date_to, status, record_type, phone_suffix)
+
+
+def filter_args(filters):
+    """Query string arguments for `filters` (the inverse of parse_filters())."""
+    values = (
+        filters.date_from.isoformat() if filters.date_from else None,
+        filters.date_to.isoformat() if filters.date_to else None,
+        filters.status, filters.record_type, filters.phone_suffix,
+    )
+    return {name: value for name, value in zip(FILTER_ARGS, values) if value}
+
+
+def phone_suffix_sql(column, is_postgres):
+    """
+    Indexed expression for a number's last PHONE_SUFFIX_DIGITS digits. Queries
+    must use exactly this expression for the planner to match the index.
+    """
+    if is_postgres:
+        return f"right({column}, {PHONE_SUFFIX_DIGITS})"
+    return f"substr({column}, -{PHONE_SUFFIX_DIGITS})"
+
+
+def filter_conditions(filters, is_postgres, date_column=None, status_column=None,
+                      type_column=None, phone_column=None, implied_type=None):
+    """
+    Parameterized WHERE conditions for `filters` on one table.
+
+    Args:
+        filters (RecordFilters): From parse_filters()
+        is_postgres (bool): Database flavour (placeholder style, expressions)
+        date_column (str): Timestamp the date range applies to
+        status_column (str): YES/NO/PENDING/OTHER status expression
+        type_column (str): record_type column, for tables holding both types
+        phone_column (str): phone_key (E.164) column
+        implied_type (str): Record type of every row, for single-type tables;
+            filtering on the other type matches nothing
+    Returns:
+        tuple: (conditions, params) - SQL fragments to AND together and their
+            parameters, in order
+    Raises:
+        ValueError: If a filter is set that this table can't apply
+    """
+    placeholder = '%s' if is_postgres else '?'
+    conditions, params = [], []
+
+    def unsupported(name):
+        return ValueError(f"This list can't be filtered by {name}")
+
+    if filters.date_from or filters.date_to:
+        if not date_column:
+            raise unsupported('date')
+        # Dates are inclusive; compare against the start of the next day so
+        # the timestamp index is range-scanned (SQLite stores them as text)
+        if filters.date_from:
+            conditions.append(f"{date_column} >= {placeholder}")
+            params.append(filters.date_from if is_postgres else filters.date_from.isoformat())
+        if filters.date_to:
+            end = filters.date_to + timedelta(days=1)
+            conditions.append(f"{date_column} < {placeholder}")
+            params.append(end if is_postgres else end.isoformat())
+    if filters.status:
+        if not status_column:
+            raise unsupported('status')
+        statuses = FILTER_STATUSES[filters.status]
+        if len(statuses) == 1:
+            conditions.append(f"{status_column} = {placeholder}")
+        else:
+            conditions.append(f"{status_column} IN ({', '.join([placeholder] * len(statuses))})")
+        params.extend(statuses)
+    if filters.record_type:
+        if type_column:
+            conditions.append(f"{type_column} = {placeholder}")
+            params.append(filters.record_type)
+        elif implied_type:
+            if filters.record_type != implied_type:
+                conditions.append("1 = 0")
+        else:
+            raise unsupported('type')
+    if filters.phone_suffix:
+        if not phone_column:
+            raise unsupported('phone')
+        conditions.append(f"{phone_suffix_sql(phone_column, is_postgres)} = {placeholder}")
+        params.append(filters.phone_suffix[-PHONE_SUFFIX_DIGITS:])
+        if len(filters.phone_suffix) > PHONE_SUFFIX_DIGITS:
+            # Digits only, so there is nothing to escape
+            conditions.append(f"{phone_column} LIKE {placeholder}")
+            params.append('%' + filters.phone_suffix)
+    return conditions, params
@@ -0,0 +1,195 @@
+"""
+Event Bus - Live Dashboard Updates
+
+Writers publish small JSON events after they commit ('reply' when an SMS is
+ingested, 'sent' when a message goes out); /events streams them to open
+dashboards as Server-Sent Events.
+
+- In-process: each stream subscribes a bounded queue; publish() fans an
+  event out to every queue in this worker. A subscriber that falls behind
+  loses its oldest events and is told to resync.
+- Across workers (PostgreSQL): publish_event() sends NOTIFY on the
+  rentverify_events channel. Every worker with an open stream runs one
+  listener thread holding a LISTEN connection and republishes what it
+  receives in-process, including its own notifications, so each event is
+  delivered exactly once per worker.
+- SQLite (local development, one process): publish_event() delivers
+  in-process directly, after the writer thread commits the write.
+
+Events carry the data version after the write, so a stream that (re)connects
+can tell whether the page it is patching has missed anything.
+"""
+import json
+import queue
+import time
+import select
+import logging
+import threading
+from utils import metrics
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'rentverify_events'
+
+# Events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+# Listener reconnect delay after a dropped LISTEN connection (seconds)
+LISTEN_RETRY_SECONDS = 5
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class Subscriber:
+    """One stream's queue of pending events."""
+
+    def __init__(self):
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Too slow to keep up: drop the oldest and make the page resync
+            self.overflowed = True
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                pass
+            self.put(event)
+
+    def get(self, timeout):
+        """Next event, or None after `timeout` seconds."""
+        try:
+            event = self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        _report_depth()
+        return event
+
+
+def _report_depth():
+    """Publish how many events this worker's streams have yet to send."""
+    with _subscribers_lock:
+        depth = sum(subscriber.events.qsize() for subscriber in _subscribers)
+    metrics.set_queue_depth('event_streams', depth)
+
+
+def subscribe():
+    """Register a new stream; starts this worker's LISTEN thread on PostgreSQL."""
+    if get_settings().is_postgres:
+        _ensure_listener()
+    subscriber = Subscriber()
+    with _subscribers_lock:
+        _subscribers.add(subscriber)
+    return subscriber
+
+
+def unsubscribe(subscriber):
+    with _subscribers_lock:
+        _subscribers.discard(subscriber)
+    _report_depth()
+
+
+def subscriber_count():
+    with _subscribers_lock:
+        return len(_subscribers)
+
+
+def publish(event):
+    """Deliver an event to every stream in this worker."""
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        subscriber.put(event)
+    _report_depth()
+
+
+def publish_event(conn, event_type, data):
+    """
+    Announce a committed write to every worker's streams. Never raises; a
+    lost event only means pages patch themselves at their next resync.
+
+    Args:
+        conn: Connection the write was committed on
+        event_type (str): SSE event name ('reply', 'sent')
+        data (dict): JSON-serialisable payload
+    """
+    event = {'type': event_type, 'data': data}
+    if not get_settings().is_postgres:
+        # Inside a db_service.write() job: deliver once the batch is committed
+        after_commit = getattr(conn, 'after_commit', None)
+        if after_commit is not None:
+            after_commit(lambda: publish(event))
+        else:
+            publish(event)
+        return
+    payload = json.dumps(event, separators=(',', ':'), default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        # Too big to NOTIFY: send only the version so pages resync
+        payload = json.dumps({'type': 'resync', 'data': {'version': data.get('version')}})
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+        conn.commit()
+    except Exception as e:
+        logger.warning(f"Could not publish {event_type} event: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+
+# ==================== PostgreSQL Listener ====================
+
+def _ensure_listener():
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen_forever, name='event-listener', daemon=True)
+            _listener.start()
+
+
+def _listen_forever():
+    """LISTEN on a dedicated connection (not from the pool) and republish locally."""
+    from services import db_service
+    while True:
+        conn = None
+        try:
+            psycopg2 = db_service._load_psycopg2()
+            settings = get_settings()
+            conn = psycopg2.connect(settings.database_url, connect_timeout=settings.db_connect_timeout)
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CHANNEL}")
+            logger.info("Event listener connected")
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        publish(json.loads(notify.payload))
+                    except ValueError:
+                        logger.warning("Ignoring malformed event payload")
+        except Exception as e:
+            logger.warning(f"Event listener disconnected: {e}; retrying in {LISTEN_RETRY_SECONDS}s")
+            # Pages may have missed events while we were away
+            publish({'type': 'resync', 'data': {}})
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(LISTEN_RETRY_SECONDS)
@@ -0,0 +1,104 @@
+"""
+Phone Service - Phone Number Normalization
+
+Every table that stores a phone number also stores:
+- phone_key: the number in E.164 form, so "+1 (555) 123-4567", "5551234567"
+  and "+15551234567" all match (entity rows are unique on it)
+- phone_hash: a keyed HMAC of phone_key, for lookups and correlation where
+  the number itself shouldn't appear (logs, URLs, exports)
+
+Numbers are stored unmasked; masking happens only on the way out, with
+mask_phone() as each page row, API item, export line or log line is built.
+Normalization and hashing are cached in bounded LRUs, since the same few
+numbers (active landlords and tenants) arrive over and over.
+"""
+import re
+import hmac
+import hashlib
+from functools import lru_cache
+from utils.settings import get_settings
+
+_NON_DIGITS_RE = re.compile(r'\D')
+
+# Numbers without a country code are assumed to be North American
+DEFAULT_COUNTRY_CODE = '1'
+
+# Distinct numbers kept in each cache
+PHONE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def normalize_phone(raw):
+    """
+    Normalize a phone number to E.164 (e.g. '+15551234567').
+
+    Args:
+        raw (str): Phone number as typed or as received from Twilio
+    Returns:
+        str or None: E.164 number, or None if it can't be normalized
+            (empty, masked like '******1234', or the wrong length)
+    """
+    if not raw or '*' in raw:
+        return None
+    digits = _NON_DIGITS_RE.sub('', raw)
+    if not raw.strip().startswith('+'):
+        if len(digits) == 10:
+            digits = DEFAULT_COUNTRY_CODE + digits
+        elif digits.startswith('00'):
+            digits = digits[2:]
+    if not 8 <= len(digits) <= 15:
+        return None
+    return '+' + digits
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _hash_key(phone_key, secret):
+    return hmac.new(secret.encode(), phone_key.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def phone_hash(phone_key):
+    """
+    Keyed hash of an E.164 number (PHONE_HASH_KEY, falling back to SECRET_KEY).
+
+    Args:
+        phone_key (str): Output of normalize_phone()
+    Returns:
+        str or None: 32 hex characters, or None if phone_key is None
+    """
+    if not phone_key:
+        return None
+    return _hash_key(phone_key, get_settings().phone_hash_key)
+
+
+def phone_columns(raw):
+    """
+    Canonical values to store alongside a phone number.
+
+    Returns:
+        tuple: (phone_key, phone_hash), both None if the number can't be normalized
+    """
+    phone_key = normalize_phone(raw)
+    return phone_key, phone_hash(phone_key)
+
+
+# Digits left visible when a number is shown on a page
+VISIBLE_DIGITS = 4
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def mask_phone(raw, fallback=None):
+    """
+    Display form of a phone number: '******' plus its last four digits.
+
+    Args:
+        raw (str): Stored (or already masked) phone number
+        fallback (str): Shown when the number has fewer than four digits;
+            None shows the value as stored
+    Returns:
+        str: Masked number
+    """
+    digits = _NON_DIGITS_RE.sub('', str(raw)) if raw is not None else ''
+    if len(digits) < VISIBLE_DIGITS:
+        return fallback if fallback is not None else ('' if raw is None else str(raw))
+    return '******' + digits[-VISIBLE_DIGITS:]
+
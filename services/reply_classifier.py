@@ -0,0 +1,105 @@
+"""
+Reply Classifier - decides what an inbound SMS is
+
+Determines whether a message comes from a landlord or a tenant and its
+normalized status (YES/NO/OTHER, or PENDING before any reply), which is
+stored in the status column at ingest. Keyword lists are compiled into a single regex once
+per process (see get_classifier), which the warm-up routine builds ahead of
+the first webhook.
+"""
+import re
+import threading
+from utils.settings import get_settings
+
+LANDLORD_KEYWORDS = ('LANDLORD', 'OWNER', 'LL', 'PROPERTY OWNER', 'RENTAL OWNER')
+TENANT_KEYWORDS = ('TENANT', 'RENTER', 'RESIDENT', 'TT')
+YES_REPLIES = frozenset(('YES', 'Y', '1'))
+NO_REPLIES = frozenset(('NO', 'N', '0'))
+
+# Values of the status column on landlord_record, tenants and incoming_messages
+STATUS_YES = 'YES'
+STATUS_NO = 'NO'
+STATUS_PENDING = 'PENDING'
+STATUS_OTHER = 'OTHER'
+
+
+def reply_status(reply):
+    """Normalize a reply body to YES, NO, OTHER, or PENDING when there is none."""
+    if not reply or not reply.strip():
+        return STATUS_PENDING
+    reply_upper = reply.upper().strip()
+    if reply_upper in YES_REPLIES:
+        return STATUS_YES
+    if reply_upper in NO_REPLIES:
+        return STATUS_NO
+    return STATUS_OTHER
+
+
+def status_sql(column):
+    """SQL CASE expression computing reply_status() from a column (used by backfills)."""
+    yes = ', '.join(f"'{value}'" for value in sorted(YES_REPLIES))
+    no = ', '.join(f"'{value}'" for value in sorted(NO_REPLIES))
+    return (
+        f"CASE WHEN {column} IS NULL OR TRIM({column}) = '' THEN '{STATUS_PENDING}' "
+        f"WHEN UPPER(TRIM({column})) IN ({yes}) THEN '{STATUS_YES}' "
+        f"WHEN UPPER(TRIM({column})) IN ({no}) THEN '{STATUS_NO}' "
+        f"ELSE '{STATUS_OTHER}' END"
+    )
+
+
+class Classification:
+    """Result of classifying one reply."""
+
+    __slots__ = ('record_type', 'status', 'is_yes', 'is_no')
+
+    def __init__(self, record_type, status, is_yes, is_no):
+        self.record_type = record_type
+        self.status = status
+        self.is_yes = is_yes
+        self.is_no = is_no
+
+
+class ReplyClassifier:
+    """Precompiled keyword matcher for inbound replies."""
+
+    def __init__(self, default_type='landlord'):
+        self.default_type = default_type if default_type in ('tenant', 'landlord') else 'landlord'
+        # Keywords match anywhere in the message, as substrings
+        self._landlord_re = re.compile('|'.join(re.escape(k) for k in LANDLORD_KEYWORDS))
+        self._tenant_re = re.compile('|'.join(re.escape(k) for k in TENANT_KEYWORDS))
+
+    def classify(self, reply):
+        """
+        Classify a reply body.
+
+        Args:
+            reply (str): Message body as received
+        Returns:
+            Classification: record type, normalized status and YES/NO flags (landlords only)
+        """
+        reply_upper = reply.upper().strip()
+        if self._landlord_re.search(reply_upper):
+            record_type = 'landlord'
+        elif self._tenant_re.search(reply_upper):
+            record_type = 'tenant'
+        else:
+            record_type = self.default_type
+        status = reply_status(reply)
+        is_yes = record_type == 'landlord' and status == STATUS_YES
+        is_no = record_type == 'landlord' and status == STATUS_NO
+        return Classification(record_type, status, is_yes, is_no)
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """Return the process-wide classifier, building it on first use."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                # Default to landlord (can be overridden via environment variable DEFAULT_RECORD_TYPE)
+                _classifier = ReplyClassifier(get_settings().default_record_type)
+    return _classifier
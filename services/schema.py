@@ -0,0 +1,854 @@
+"""
+Schema Service - Versioned Database Schema
+Creates and upgrades the PostgreSQL (production) and SQLite (local development)
+schemas. The applied version is recorded in the schema_version table, so
+ensure_schema() is a single SELECT once the database is current.
+
+To change the schema: add a migration function, register it in MIGRATIONS
+under the next version number and bump SCHEMA_VERSION.
+"""
+import logging
+from services import db_service
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 10
+
+# Arbitrary key for pg_advisory_lock so concurrent workers don't race the DDL
+_MIGRATION_LOCK_ID = 0x72656e74
+
+
+# ==================== Version 1: Baseline Tables ====================
+
+def _baseline_postgres(cursor):
+    """Tables and columns that were previously created by app.py at startup."""
+    # Create rent_records table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rent_records (
+            id SERIAL PRIMARY KEY,
+            phone_number TEXT NOT NULL,
+            reply TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            record_type TEXT DEFAULT 'tenant'
+        )
+    ''')
+    
+    # Add record_type column if it doesn't exist (for existing databases)
+    cursor.execute('''
+        DO $$ 
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='rent_records' AND column_name='record_type'
+            ) THEN
+                ALTER TABLE rent_records ADD COLUMN record_type TEXT DEFAULT 'tenant';
+            END IF;
+        END $$;
+    ''')
+    
+    # Create payments table (if needed)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS payments (
+            id SERIAL PRIMARY KEY,
+            phone_number TEXT NOT NULL,
+            status TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create tenants table - simplified for credit reporting
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tenants (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            address TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            email TEXT,
+            rent_amount DECIMAL(10, 2) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create landlords table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS landlords (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            address TEXT NOT NULL,
+            email TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create outgoing_messages table - messages sent from dashboard/system to landlords
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outgoing_messages (
+            id SERIAL PRIMARY KEY,
+            landlord_name TEXT NOT NULL,
+            landlord_phone TEXT NOT NULL,
+            landlord_address TEXT NOT NULL,
+            landlord_email TEXT,
+            message_body TEXT NOT NULL,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            twilio_message_sid TEXT,
+            status TEXT DEFAULT 'sent'
+        )
+    ''')
+    
+    # Create incoming_messages table - landlord replies (yes/no) from Twilio
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS incoming_messages (
+            id SERIAL PRIMARY KEY,
+            landlord_phone TEXT NOT NULL,
+            message_body TEXT NOT NULL,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            twilio_message_sid TEXT,
+            is_yes BOOLEAN DEFAULT FALSE,
+            is_no BOOLEAN DEFAULT FALSE
+        )
+    ''')
+    
+    # Create landlord_record table - landlord payment records
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS landlord_record (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            email TEXT,
+            home_address TEXT NOT NULL,
+            num_units INTEGER DEFAULT 0,
+            reply TEXT,
+            timestamp TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Add new columns to existing landlord_record table if they don't exist
+    cursor.execute('''
+        DO $$ 
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='landlord_record' AND column_name='name'
+            ) THEN
+                ALTER TABLE landlord_record ADD COLUMN name TEXT;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='landlord_record' AND column_name='email'
+            ) THEN
+                ALTER TABLE landlord_record ADD COLUMN email TEXT;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='landlord_record' AND column_name='home_address'
+            ) THEN
+                ALTER TABLE landlord_record ADD COLUMN home_address TEXT;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='landlord_record' AND column_name='num_units'
+            ) THEN
+                ALTER TABLE landlord_record ADD COLUMN num_units INTEGER DEFAULT 0;
+            END IF;
+        END $$;
+    ''')
+    
+    # Update tenants table structure to also store payment records
+    # Check if reply and timestamp columns exist in tenants table
+    cursor.execute('''
+        DO $$ 
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='tenants' AND column_name='reply'
+            ) THEN
+                ALTER TABLE tenants ADD COLUMN reply TEXT;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns 
+                WHERE table_name='tenants' AND column_name='timestamp'
+            ) THEN
+                ALTER TABLE tenants ADD COLUMN timestamp TEXT;
+            END IF;
+        END $$;
+    ''')
+
+def _baseline_sqlite(cursor):
+    """Tables and columns that were previously created by app_local.py at startup."""
+    # Create payments table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_number TEXT NOT NULL,
+            status TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create rent_records table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rent_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_number TEXT NOT NULL,
+            reply TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        )
+    ''')
+    
+    # Create tenants table - simplified for credit reporting
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tenants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            address TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            email TEXT,
+            rent_amount REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create landlords table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS landlords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            address TEXT NOT NULL,
+            email TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create outgoing_messages table - messages sent from dashboard/system to landlords
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outgoing_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            landlord_name TEXT NOT NULL,
+            landlord_phone TEXT NOT NULL,
+            landlord_address TEXT NOT NULL,
+            landlord_email TEXT,
+            message_body TEXT NOT NULL,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            twilio_message_sid TEXT,
+            status TEXT DEFAULT 'sent'
+        )
+    ''')
+    
+    # Create incoming_messages table - landlord replies (yes/no) from Twilio
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS incoming_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            landlord_phone TEXT NOT NULL,
+            message_body TEXT NOT NULL,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            twilio_message_sid TEXT,
+            is_yes INTEGER DEFAULT 0,
+            is_no INTEGER DEFAULT 0
+        )
+    ''')
+    
+    # Create landlord_record table - landlord payment records
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS landlord_record (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            email TEXT,
+            home_address TEXT NOT NULL,
+            num_units INTEGER DEFAULT 0,
+            reply TEXT,
+            timestamp TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Add new columns to existing landlord_record table if they don't exist
+    cursor.execute("PRAGMA table_info(landlord_record)")
+    landlord_cols = [col[1] for col in cursor.fetchall()]
+    if 'name' not in landlord_cols:
+        cursor.execute("ALTER TABLE landlord_record ADD COLUMN name TEXT")
+    if 'email' not in landlord_cols:
+        cursor.execute("ALTER TABLE landlord_record ADD COLUMN email TEXT")
+    if 'home_address' not in landlord_cols:
+        cursor.execute("ALTER TABLE landlord_record ADD COLUMN home_address TEXT")
+    if 'num_units' not in landlord_cols:
+        cursor.execute("ALTER TABLE landlord_record ADD COLUMN num_units INTEGER DEFAULT 0")
+    
+    # Update tenants table - add reply and timestamp columns if they don't exist
+    cursor.execute("PRAGMA table_info(tenants)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'reply' not in columns:
+        cursor.execute("ALTER TABLE tenants ADD COLUMN reply TEXT")
+    if 'timestamp' not in columns:
+        cursor.execute("ALTER TABLE tenants ADD COLUMN timestamp TEXT")
+
+
+def _migrate_v1(cursor, is_postgres):
+    if is_postgres:
+        _baseline_postgres(cursor)
+    else:
+        _baseline_sqlite(cursor)
+
+
+# ==================== Version 2: Normalized Reply Status ====================
+
+# Rows updated per backfill transaction, so large tables aren't locked in one go
+BACKFILL_BATCH_SIZE = 5000
+
+# table -> (column the status is derived from, columns of the PENDING partial index)
+_STATUS_TABLES = {
+    'landlord_record': ('reply', 'created_at, phone_number'),
+    'tenants': ('reply', 'created_at, phone_number'),
+    'incoming_messages': ('message_body', 'received_at, landlord_phone'),
+}
+
+
+def _add_column(cursor, is_postgres, table, column, definition):
+    """Add a column unless it already exists."""
+    if is_postgres:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+        return
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _backfill_in_batches(cursor, is_postgres, table, assignment):
+    """
+    Run `UPDATE table SET <assignment>` over id ranges of BACKFILL_BATCH_SIZE,
+    committing after each range. The update is idempotent, so an interrupted
+    backfill is simply redone by the next ensure_schema().
+    """
+    placeholder = '%s' if is_postgres else '?'
+    cursor.execute(f"SELECT MAX(id) FROM {table}")
+    row = cursor.fetchone()
+    max_id = (row[0] if row else None) or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        cursor.execute(
+            f"UPDATE {table} SET {assignment} WHERE id > {placeholder} AND id <= {placeholder}",
+            (start, start + BACKFILL_BATCH_SIZE)
+        )
+        cursor.connection.commit()
+    if max_id:
+        logger.info(f"Backfilled {table} up to id {max_id}")
+
+
+def _migrate_v2(cursor, is_postgres):
+    """status column (YES/NO/PENDING/OTHER) with a partial index on the PENDING rows."""
+    from services.reply_classifier import status_sql
+    for table, (source, index_columns) in _STATUS_TABLES.items():
+        # A constant default doesn't rewrite the table (PostgreSQL 11+, SQLite)
+        _add_column(cursor, is_postgres, table, 'status', "TEXT NOT NULL DEFAULT 'PENDING'")
+        _backfill_in_batches(cursor, is_postgres, table, f"status = {status_sql(source)}")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_pending ON {table} ({index_columns}) "
+            f"WHERE status = 'PENDING'"
+        )
+
+
+# ==================== Version 3: One Entity Row per Phone ====================
+
+# table -> (phone column, detail columns to carry over when folding duplicates)
+_ENTITY_TABLES = {
+    'landlord_record': ('phone_number', ('name', 'email', 'home_address', 'num_units')),
+    'tenants': ('phone_number', ('name', 'email', 'address', 'rent_amount')),
+}
+
+# Placeholder values written for senders we had no details for
+_PLACEHOLDERS = (None, '', 'Unknown', 'N/A', 0)
+
+
+def _backfill_phone_keys(cursor, is_postgres, table, phone_column):
+    """Set phone_key from the stored phone number, BACKFILL_BATCH_SIZE rows per commit."""
+    from services.phone import normalize_phone
+    placeholder = '%s' if is_postgres else '?'
+    cursor.execute(f"SELECT MAX(id) FROM {table}")
+    row = cursor.fetchone()
+    max_id = (row[0] if row else None) or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        cursor.execute(
+            f"SELECT id, {phone_column} FROM {table} "
+            f"WHERE id > {placeholder} AND id <= {placeholder} AND phone_key IS NULL",
+            (start, start + BACKFILL_BATCH_SIZE)
+        )
+        updates = []
+        for row_id, phone in cursor.fetchall():
+            key = normalize_phone(phone)
+            if key:
+                updates.append((key, row_id))
+        if updates:
+            cursor.executemany(f"UPDATE {table} SET phone_key = {placeholder} WHERE id = {placeholder}", updates)
+        cursor.connection.commit()
+
+
+def _fold_group(cursor, is_postgres, table, detail_columns, phone_key):
+    """Merge every row for one phone_key into its best-populated row and delete the rest."""
+    placeholder = '%s' if is_postgres else '?'
+    columns = ('id', 'reply', 'timestamp', 'status') + detail_columns
+    cursor.execute(
+        f"SELECT {', '.join(columns)} FROM {table} WHERE phone_key = {placeholder} ORDER BY id",
+        (phone_key,)
+    )
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    if len(rows) < 2:
+        return 0
+
+    # Keep the oldest row with real details (e.g. added from the dashboard)
+    survivor = next((row for row in rows if row['name'] not in _PLACEHOLDERS), rows[0])
+    merged = {}
+    for column in detail_columns:
+        if survivor[column] in _PLACEHOLDERS:
+            value = next((row[column] for row in reversed(rows) if row[column] not in _PLACEHOLDERS), None)
+            if value is not None:
+                merged[column] = value
+    # Latest reply wins
+    replied = [row for row in rows if row['reply']]
+    if replied:
+        latest = replied[-1]
+        merged.update(reply=latest['reply'], timestamp=latest['timestamp'], status=latest['status'])
+
+    if merged:
+        assignments = ', '.join(f"{column} = {placeholder}" for column in merged)
+        cursor.execute(
+            f"UPDATE {table} SET {assignments} WHERE id = {placeholder}",
+            tuple(merged.values()) + (survivor['id'],)
+        )
+    cursor.execute(
+        f"DELETE FROM {table} WHERE phone_key = {placeholder} AND id <> {placeholder}",
+        (phone_key, survivor['id'])
+    )
+    return len(rows) - 1
+
+
+def fold_duplicate_entities(cursor, is_postgres, table, detail_columns, batch_size=500):
+    """
+    Fold rows sharing a phone_key into one, committing every `batch_size` phone numbers.
+
+    Returns:
+        int: Number of duplicate rows removed
+    """
+    cursor.execute(
+        f"SELECT phone_key FROM {table} WHERE phone_key IS NOT NULL "
+        f"GROUP BY phone_key HAVING COUNT(*) > 1"
+    )
+    keys = [row[0] for row in cursor.fetchall()]
+    removed = 0
+    for start in range(0, len(keys), batch_size):
+        for phone_key in keys[start:start + batch_size]:
+            removed += _fold_group(cursor, is_postgres, table, detail_columns, phone_key)
+        cursor.connection.commit()
+    if removed:
+        logger.info(f"Folded {removed} duplicate {table} rows into {len(keys)} phone numbers")
+    return removed
+
+
+def _migrate_v3(cursor, is_postgres):
+    """
+    phone_key (E.164) on the entity tables, unique so replies upsert onto one
+    row per sender; incoming_messages becomes the full inbound history.
+    Rows whose stored number is masked can't be keyed and are left as they are.
+    """
+    _add_column(cursor, is_postgres, 'incoming_messages', 'record_type', "TEXT NOT NULL DEFAULT 'landlord'")
+    _add_column(cursor, is_postgres, 'incoming_messages', 'phone_key', 'TEXT')
+    _backfill_phone_keys(cursor, is_postgres, 'incoming_messages', 'landlord_phone')
+
+    for table, (phone_column, detail_columns) in _ENTITY_TABLES.items():
+        _add_column(cursor, is_postgres, table, 'phone_key', 'TEXT')
+        _backfill_phone_keys(cursor, is_postgres, table, phone_column)
+        fold_duplicate_entities(cursor, is_postgres, table, detail_columns)
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_phone_key ON {table} (phone_key)")
+
+
+# ==================== Version 4: Hashed Phone Lookups ====================
+
+# Every table that stores a phone number (and, from v3/v4, its phone_key)
+_PHONE_TABLES = ('landlord_record', 'tenants', 'incoming_messages', 'outgoing_messages')
+
+
+def _backfill_phone_hashes(cursor, is_postgres, table):
+    """Set phone_hash from phone_key, BACKFILL_BATCH_SIZE rows per commit."""
+    from services.phone import phone_hash
+    placeholder = '%s' if is_postgres else '?'
+    cursor.execute(f"SELECT MAX(id) FROM {table}")
+    row = cursor.fetchone()
+    max_id = (row[0] if row else None) or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        cursor.execute(
+            f"SELECT id, phone_key FROM {table} "
+            f"WHERE id > {placeholder} AND id <= {placeholder} "
+            f"AND phone_hash IS NULL AND phone_key IS NOT NULL",
+            (start, start + BACKFILL_BATCH_SIZE)
+        )
+        updates = [(phone_hash(key), row_id) for row_id, key in cursor.fetchall()]
+        if updates:
+            cursor.executemany(f"UPDATE {table} SET phone_hash = {placeholder} WHERE id = {placeholder}", updates)
+        cursor.connection.commit()
+
+
+def _migrate_v4(cursor, is_postgres):
+    """
+    phone_hash (keyed HMAC of phone_key) on every table holding a number, and
+    phone_key on outgoing_messages, each indexed for lookups.
+    """
+    _add_column(cursor, is_postgres, 'outgoing_messages', 'phone_key', 'TEXT')
+    _backfill_phone_keys(cursor, is_postgres, 'outgoing_messages', 'landlord_phone')
+    for table in ('incoming_messages', 'outgoing_messages'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_phone_key ON {table} (phone_key)")
+
+    for table in _PHONE_TABLES:
+        _add_column(cursor, is_postgres, table, 'phone_hash', 'TEXT')
+        _backfill_phone_hashes(cursor, is_postgres, table)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_phone_hash ON {table} (phone_hash)")
+
+
+# ==================== Version 5: Verification Requests ====================
+
+def _backfill_verification_requests(cursor, is_postgres):
+    """
+    Pair past outbound messages with the first YES/NO reply from the same
+    number before the next send; unanswered sends are superseded by the
+    next one, and the latest unanswered send per number stays open.
+    """
+    placeholder = '%s' if is_postgres else '?'
+    cursor.execute(
+        "SELECT id, phone_key, phone_hash, sent_at FROM outgoing_messages "
+        "WHERE phone_key IS NOT NULL ORDER BY phone_key, sent_at, id"
+    )
+    sends = [tuple(row) for row in cursor.fetchall()]
+    by_phone = {}
+    for send in sends:
+        by_phone.setdefault(send[1], []).append(send)
+
+    for phone_key, phone_sends in by_phone.items():
+        cursor.execute(
+            f"SELECT id, received_at, status FROM incoming_messages "
+            f"WHERE phone_key = {placeholder} AND status IN ('YES', 'NO') ORDER BY received_at, id",
+            (phone_key,)
+        )
+        replies = [tuple(row) for row in cursor.fetchall()]
+        for index, (outgoing_id, _, phone_hash, sent_at) in enumerate(phone_sends):
+            next_sent_at = phone_sends[index + 1][3] if index + 1 < len(phone_sends) else None
+            reply = next(
+                (r for r in replies if r[1] >= sent_at and (next_sent_at is None or r[1] < next_sent_at)),
+                None
+            )
+            if reply:
+                state, incoming_id, reply_status, resolved_at = 'resolved', reply[0], reply[2], reply[1]
+            else:
+                state = 'open' if next_sent_at is None else 'superseded'
+                incoming_id = reply_status = resolved_at = None
+            cursor.execute(
+                "INSERT INTO verification_requests (outgoing_message_id, phone_key, phone_hash, state, "
+                "opened_at, incoming_message_id, reply_status, resolved_at) "
+                f"VALUES ({', '.join([placeholder] * 8)})",
+                (outgoing_id, phone_key, phone_hash, state, sent_at, incoming_id, reply_status, resolved_at)
+            )
+        cursor.connection.commit()
+    if sends:
+        logger.info(f"Backfilled {len(sends)} verification requests")
+
+
+def _migrate_v5(cursor, is_postgres):
+    """
+    verification_requests: opened by an outbound message, resolved by the
+    reply that answers it. At most one open request per phone_key.
+    """
+    id_column = 'SERIAL PRIMARY KEY' if is_postgres else 'INTEGER PRIMARY KEY AUTOINCREMENT'
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS verification_requests (
+            id {id_column},
+            outgoing_message_id INTEGER NOT NULL,
+            phone_key TEXT NOT NULL,
+            phone_hash TEXT,
+            state TEXT NOT NULL DEFAULT 'open',
+            opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            incoming_message_id INTEGER,
+            reply_status TEXT,
+            resolved_at TIMESTAMP
+        )
+    ''')
+    cursor.execute("SELECT COUNT(*) FROM verification_requests")
+    if cursor.fetchone()[0] == 0:
+        _backfill_verification_requests(cursor, is_postgres)
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_verification_requests_open "
+        "ON verification_requests (phone_key) WHERE state = 'open'"
+    )
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_verification_requests_outgoing "
+        "ON verification_requests (outgoing_message_id)"
+    )
+
+
+# ==================== Version 6: Analytics Rollups ====================
+
+def _migrate_v6(cursor, is_postgres):
+    """
+    Rollup tables behind the analytics page (services/analytics_service.py):
+    one row per day the requests were opened, and one row per phone_key.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verification_daily (
+            day TEXT PRIMARY KEY,
+            sent INTEGER NOT NULL DEFAULT 0,
+            yes_count INTEGER NOT NULL DEFAULT 0,
+            no_count INTEGER NOT NULL DEFAULT 0,
+            no_reply INTEGER NOT NULL DEFAULT 0,
+            reply_seconds_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            under_1h INTEGER NOT NULL DEFAULT 0,
+            under_6h INTEGER NOT NULL DEFAULT 0,
+            under_24h INTEGER NOT NULL DEFAULT 0,
+            under_72h INTEGER NOT NULL DEFAULT 0,
+            over_72h INTEGER NOT NULL DEFAULT 0,
+            rolled_up_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verification_phone_rollup (
+            phone_key TEXT PRIMARY KEY,
+            sent INTEGER NOT NULL DEFAULT 0,
+            answered INTEGER NOT NULL DEFAULT 0,
+            yes_count INTEGER NOT NULL DEFAULT 0,
+            no_count INTEGER NOT NULL DEFAULT 0,
+            avg_reply_seconds DOUBLE PRECISION,
+            last_sent_at TIMESTAMP,
+            rolled_up_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Rollups only revisit requests opened or resolved since the refresh cutoff,
+    # and the numbers they touched
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_verification_requests_phone_key ON verification_requests (phone_key)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_verification_requests_opened_at ON verification_requests (opened_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_verification_requests_resolved_at ON verification_requests (resolved_at)"
+    )
+
+
+# ==================== Version 7: Conversation Indexes ====================
+
+def _migrate_v7(cursor, is_postgres):
+    """
+    (phone_key, timestamp, id) on both message tables for the per-number
+    conversation view; they replace the plain phone_key indexes from v4.
+    """
+    for table, timestamp_column in (('incoming_messages', 'received_at'), ('outgoing_messages', 'sent_at')):
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_phone_key_time "
+            f"ON {table} (phone_key, {timestamp_column}, id)"
+        )
+        cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_phone_key")
+
+
+# ==================== Version 8: Full-Text Search ====================
+
+def _search_postgres(cursor, table, columns):
+    """tsvector column + trigger + GIN index for one table."""
+    from services.search_service import TS_CONFIG, document_sql
+    vector = f"to_tsvector('{TS_CONFIG}', {document_sql(columns)})"
+    new_vector = f"to_tsvector('{TS_CONFIG}', {document_sql(f'NEW.{c}' for c in columns)})"
+    _add_column(cursor, True, table, 'search_vector', 'tsvector')
+    cursor.execute(f'''
+        CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {new_vector};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+    cursor.execute(
+        f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {', '.join(columns)} "
+        f"ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()"
+    )
+    _backfill_in_batches(cursor, True, table, f"search_vector = {vector}")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN (search_vector)")
+
+
+def _search_sqlite(cursor, code, table, columns):
+    """Triggers copying one table into search_index, then a batched backfill."""
+    from services.search_service import SEARCH_SOURCES, document_sql
+    sources = len(SEARCH_SOURCES)
+    new_document = document_sql(f"new.{c}" for c in columns)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO search_index (rowid, body) VALUES (new.id * {sources} + {code}, {new_document});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * {sources} + {code};
+            INSERT INTO search_index (rowid, body) VALUES (new.id * {sources} + {code}, {new_document});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * {sources} + {code};
+        END
+    ''')
+    cursor.execute(f"SELECT MAX(id) FROM {table}")
+    row = cursor.fetchone()
+    max_id = (row[0] if row else None) or 0
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        cursor.execute(
+            f"INSERT OR REPLACE INTO search_index (rowid, body) "
+            f"SELECT id * {sources} + {code}, {document_sql(columns)} FROM {table} WHERE id > ? AND id <= ?",
+            (start, start + BACKFILL_BATCH_SIZE)
+        )
+        cursor.connection.commit()
+
+
+def _migrate_v8(cursor, is_postgres):
+    """
+    Full-text search over records and messages (services/search_service.py):
+    tsvector columns with GIN indexes on PostgreSQL, one FTS5 table on SQLite.
+    """
+    from services.search_service import SEARCH_SOURCES
+    if not is_postgres:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(body, tokenize = 'unicode61')")
+    for kind, code, table, columns in SEARCH_SOURCES:
+        if is_postgres:
+            _search_postgres(cursor, table, columns)
+        else:
+            _search_sqlite(cursor, code, table, columns)
+
+
+# ==================== Version 9: Data Version ====================
+
+def _migrate_v9(cursor, is_postgres):
+    """Counter bumped by every write the dashboard shows (services/data_version.py)."""
+    if is_postgres:
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS data_version_seq")
+        return
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+
+
+# ==================== Version 10: Filter Indexes ====================
+
+# table -> (timestamp its lists are ordered by, {index suffix: columns}) for
+# the record filters (db_service.filter_conditions). Lists are newest first,
+# so the timestamp comes last and a filtered page is read in index order.
+_FILTER_INDEXES = {
+    'incoming_messages': ('received_at', {
+        # The dashboard lists one record type, optionally by status
+        'type_time': 'record_type, received_at',
+        'type_status_time': 'record_type, status, received_at',
+        # Export and API filters without a type
+        'status_time': 'status, received_at',
+        'received_at': 'received_at',
+    }),
+    'landlord_record': ('created_at', {'status_created': 'status, created_at', 'created_at': 'created_at'}),
+    'tenants': ('created_at', {'status_created': 'status, created_at', 'created_at': 'created_at'}),
+    'outgoing_messages': ('sent_at', {'sent_at': 'sent_at'}),
+}
+
+
+def _migrate_v10(cursor, is_postgres):
+    """
+    Composite indexes for the dashboard/export/API filters, plus one on each
+    phone_key's last digits (db_service.phone_suffix_sql) for phone lookups.
+    """
+    for table, (time_column, indexes) in _FILTER_INDEXES.items():
+        for suffix, columns in indexes.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix} ON {table} ({columns})")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_phone_suffix "
+            f"ON {table} ({db_service.phone_suffix_sql('phone_key', is_postgres)}, {time_column})"
+        )
+
+
+# version -> migration(cursor, is_postgres)
+MIGRATIONS = {
+    1: _migrate_v1,
+    2: _migrate_v2,
+    3: _migrate_v3,
+    4: _migrate_v4,
+    5: _migrate_v5,
+    6: _migrate_v6,
+    7: _migrate_v7,
+    8: _migrate_v8,
+    9: _migrate_v9,
+    10: _migrate_v10,
+}
+
+
+# ==================== Apply ====================
+
+def _create_version_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def ensure_schema():
+    """
+    Bring the database up to SCHEMA_VERSION.
+
+    Returns:
+        int: The schema version after applying any pending migrations
+    """
+    is_postgres = get_settings().is_postgres
+    conn = db_service.get_db_connection()
+    try:
+        try:
+            current = db_service.get_schema_version(conn)
+        except Exception:
+            conn.rollback()
+            current = 0
+        if current >= SCHEMA_VERSION:
+            return current
+
+        cursor = conn.cursor()
+        if is_postgres:
+            # Serialize migrations across workers, then re-check inside the lock.
+            # Session-level, because batched backfills commit part-way through.
+            cursor.execute("SELECT pg_advisory_lock(%s)", (_MIGRATION_LOCK_ID,))
+        try:
+            _create_version_table(cursor)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            row = cursor.fetchone()
+            current = (row[0] if row else None) or 0
+
+            placeholder = '%s' if is_postgres else '?'
+            for version in range(current + 1, SCHEMA_VERSION + 1):
+                logger.info(f"Applying schema migration {version}")
+                MIGRATIONS[version](cursor, is_postgres)
+                cursor.execute(f"INSERT INTO schema_version (version) VALUES ({placeholder})", (version,))
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if is_postgres:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (_MIGRATION_LOCK_ID,))
+                conn.commit()
+            cursor.close()
+        logger.info(f"Database schema is at version {SCHEMA_VERSION}")
+        return SCHEMA_VERSION
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,170 @@
+"""
+Search Service - Full-Text Search over Records and Messages
+
+Indexed text per source:
+- landlord_record: name, email, home_address
+- tenants: name, email, address
+- outgoing_messages: landlord_name, landlord_address, message_body
+- incoming_messages: message_body
+
+PostgreSQL: each table has a search_vector tsvector column with a GIN index,
+kept current by a trigger when the indexed columns change. Words match by
+prefix ('gree' finds 'Green'), so partial matches still use the index.
+
+SQLite: one FTS5 table, search_index, holds every source; triggers on the
+source tables keep it current. Its rowid encodes the source row as
+id * len(SEARCH_SOURCES) + source code.
+
+Results are ranked (ts_rank / bm25) and paginated; only the rows on the
+requested page are loaded for display.
+"""
+import re
+from markupsafe import Markup, escape
+
+# kind, source code (SQLite rowid encoding), table, indexed columns
+SEARCH_SOURCES = (
+    ('landlord', 0, 'landlord_record', ('name', 'email', 'home_address')),
+    ('tenant', 1, 'tenants', ('name', 'email', 'address')),
+    ('outgoing', 2, 'outgoing_messages', ('landlord_name', 'landlord_address', 'message_body')),
+    ('incoming', 3, 'incoming_messages', ('message_body',)),
+)
+
+# Text search configuration: no stemming or stop words, so names match as typed
+TS_CONFIG = 'simple'
+
+PAGE_SIZE = 20
+MAX_PAGES = 50
+MAX_TERMS = 8
+
+# What each source shows in results: (title column, timestamp column, phone column)
+_DISPLAY = {
+    'landlord': ('name', 'created_at', 'phone_number'),
+    'tenant': ('name', 'created_at', 'phone_number'),
+    'outgoing': ('landlord_name', 'sent_at', 'landlord_phone'),
+    'incoming': ('record_type', 'received_at', 'landlord_phone'),
+}
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def document_sql(columns):
+    """SQL expression concatenating the indexed columns into one document."""
+    return " || ' ' || ".join(f"COALESCE({column}, '')" for column in columns)
+
+
+def search_terms(query):
+    """Words from a search box query (punctuation and operators dropped)."""
+    return _TERM_RE.findall(query or '')[:MAX_TERMS]
+
+
+def _pg_tsquery(terms):
+    return ' & '.join(f"{term}:*" for term in terms)
+
+
+def _fts5_query(terms):
+    return ' '.join('"' + term.replace('"', '') + '"*' for term in terms)
+
+
+def _ranked_hits(cursor, is_postgres, terms, limit, offset):
+    """Page of (kind, id) for the best matches across all sources."""
+    if is_postgres:
+        parts = []
+        for kind, _, table, _ in SEARCH_SOURCES:
+            parts.append(
+                f"(SELECT '{kind}' AS kind, id, ts_rank(search_vector, q) AS rank "
+                f"FROM {table}, to_tsquery('{TS_CONFIG}', %s) q WHERE search_vector @@ q "
+                f"ORDER BY rank DESC LIMIT {limit + offset})"
+            )
+        cursor.execute(
+            " UNION ALL ".join(parts) + f" ORDER BY rank DESC, kind, id DESC LIMIT {limit} OFFSET {offset}",
+            (_pg_tsquery(terms),) * len(parts)
+        )
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
+    sources = len(SEARCH_SOURCES)
+    kinds = {code: kind for kind, code, _, _ in SEARCH_SOURCES}
+    cursor.execute(
+        "SELECT rowid FROM search_index WHERE search_index MATCH ? "
+        f"ORDER BY bm25(search_index), rowid DESC LIMIT {limit} OFFSET {offset}",
+        (_fts5_query(terms),)
+    )
+    return [(kinds[row[0] % sources], row[0] // sources) for row in cursor.fetchall()]
+
+
+def _highlight(text, terms, width=160):
+    """Escaped excerpt of `text` around the first matching word, matches in <mark>."""
+    text = ' '.join((text or '').split())
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')\w*', re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - width // 3) if match else 0
+    excerpt = text[start:start + width]
+    parts = []
+    last = 0
+    for found in pattern.finditer(excerpt):
+        parts.append(escape(excerpt[last:found.start()]))
+        parts.append(Markup('<mark>') + escape(found.group(0)) + Markup('</mark>'))
+        last = found.end()
+    parts.append(escape(excerpt[last:]))
+    prefix = '…' if start else ''
+    suffix = '…' if start + width < len(text) else ''
+    return Markup(prefix) + Markup('').join(parts) + Markup(suffix)
+
+
+def search(conn, is_postgres, query, page=1, page_size=PAGE_SIZE):
+    """
+    Ranked full-text search across records and messages.
+
+    Args:
+        conn: Database connection
+        is_postgres (bool): Database flavour
+        query (str): Search box text
+        page (int): 1-based page number (capped at MAX_PAGES)
+        page_size (int): Results per page
+    Returns:
+        dict: results (kind, id, title, snippet, timestamp, phone, phone_key,
+            phone_hash), page and has_more
+    """
+    terms = search_terms(query)
+    page = max(1, min(int(page), MAX_PAGES))
+    if not terms:
+        return {'results': [], 'page': page, 'has_more': False}
+
+    cursor = conn.cursor()
+    # One extra hit tells us whether there is a next page
+    hits = _ranked_hits(cursor, is_postgres, terms, page_size + 1, (page - 1) * page_size)
+    has_more = len(hits) > page_size
+    hits = hits[:page_size]
+
+    placeholder = '%s' if is_postgres else '?'
+    rows = {}
+    for kind, _, table, columns in SEARCH_SOURCES:
+        ids = [hit_id for hit_kind, hit_id in hits if hit_kind == kind]
+        if not ids:
+            continue
+        title_column, timestamp_column, phone_column = _DISPLAY[kind]
+        cursor.execute(
+            f"SELECT id, {title_column}, {timestamp_column}, {phone_column}, phone_key, phone_hash, "
+            f"{document_sql(columns)} FROM {table} WHERE id IN ({', '.join([placeholder] * len(ids))})",
+            ids
+        )
+        for row in cursor.fetchall():
+            row = tuple(row)
+            rows[(kind, row[0])] = row
+
+    results = []
+    for kind, hit_id in hits:
+        row = rows.get((kind, hit_id))
+        if row is None:
+            continue
+        _, title, timestamp, phone, phone_key, phone_hash, document = row
+        results.append({
+            'kind': kind,
+            'id': hit_id,
+            'title': title,
+            'timestamp': str(timestamp) if timestamp is not None else '',
+            'phone': phone,
+            'phone_key': phone_key,
+            'phone_hash': phone_hash,
+            'snippet': _highlight(document, terms),
+        })
+    return {'results': results, 'page': page, 'has_more': has_more}
@@ -2,15 +2,160 @@
 Twilio Service - SMS Processing Logic
 """
 
-import os
-from datetime import datetime
-from twilio.rest import Client
+import time
+import threading
+from datetime import datetime, timezone
+from utils import metrics
+from utils.settings import get_settings
+from services.reply_classifier import get_classifier, STATUS_YES, STATUS_NO
+from services.phone import phone_columns, mask_phone
+from services import verification_service, event_bus
+from services.data_version import bump_version
+
+_client_lock = threading.Lock()
+_client_cache = {}
+
+
+def get_twilio_client(account_sid, auth_token):
+    """
+    Return a Twilio REST client for these credentials, built once per process.
+    twilio.rest is imported here rather than at module load because it is
+    slow to import and only needed for outbound sends.
+    """
+    key = (account_sid, auth_token)
+    client = _client_cache.get(key)
+    if client is None:
+        with _client_lock:
+            client = _client_cache.get(key)
+            if client is None:
+                from twilio.rest import Client
+                client = _client_cache[key] = Client(account_sid, auth_token)
+    return client
+
+# One entity row per phone_key: an inbound reply refreshes the latest reply and
+# status on the sender's row (creating a placeholder row on first contact).
+# Written with %s placeholders; SQLite runs them with '?' (same UPSERT syntax).
+LANDLORD_REPLY_UPSERT = """
+    INSERT INTO landlord_record (name, phone_number, home_address, reply, timestamp, status, phone_key, phone_hash)
+    VALUES ('Unknown', %s, 'Unknown', %s, %s, %s, %s, %s)
+    ON CONFLICT (phone_key) DO UPDATE SET
+        reply = excluded.reply, timestamp = excluded.timestamp,
+        status = excluded.status, updated_at = CURRENT_TIMESTAMP
+"""
+
+TENANT_REPLY_UPSERT = """
+    INSERT INTO tenants (name, phone_number, address, rent_amount, reply, timestamp, status, phone_key, phone_hash)
+    VALUES ('Unknown', %s, 'Unknown', 0, %s, %s, %s, %s, %s)
+    ON CONFLICT (phone_key) DO UPDATE SET
+        reply = excluded.reply, timestamp = excluded.timestamp,
+        status = excluded.status, updated_at = CURRENT_TIMESTAMP
+"""
+
+LANDLORD_DETAILS_UPSERT = """
+    INSERT INTO landlord_record (name, phone_number, email, home_address, phone_key, phone_hash)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (phone_key) DO UPDATE SET
+        name = excluded.name, email = excluded.email,
+        home_address = excluded.home_address, updated_at = CURRENT_TIMESTAMP
+"""
+
+# Numbers that don't normalize have no phone_key, and NULLs never conflict, so
+# for those the row holding the same raw number is updated first and the
+# upsert above only inserts when there is none
+LANDLORD_REPLY_UPDATE_UNKEYED = """
+    UPDATE landlord_record SET reply = %s, timestamp = %s, status = %s, updated_at = CURRENT_TIMESTAMP
+    WHERE phone_key IS NULL AND phone_number = %s
+"""
+
+TENANT_REPLY_UPDATE_UNKEYED = """
+    UPDATE tenants SET reply = %s, timestamp = %s, status = %s, updated_at = CURRENT_TIMESTAMP
+    WHERE phone_key IS NULL AND phone_number = %s
+"""
+
+LANDLORD_DETAILS_UPDATE_UNKEYED = """
+    UPDATE landlord_record SET name = %s, email = %s, home_address = %s, updated_at = CURRENT_TIMESTAMP
+    WHERE phone_key IS NULL AND phone_number = %s
+"""
+
+
+def _sql(query, is_postgres):
+    return query if is_postgres else query.replace('%s', '?')
+
+
+def upsert_entity(cursor, is_postgres, phone_key, upsert, upsert_params, update_unkeyed, update_params):
+    """
+    Write a landlord_record / tenants row, one per phone_key.
+
+    Without a phone_key the ON CONFLICT never fires, so the row holding the
+    same raw number is updated instead when there is one.
+
+    Args:
+        cursor: Cursor on the write connection
+        is_postgres (bool): Database flavour
+        phone_key (str): E.164 number, or None
+        upsert (str): INSERT ... ON CONFLICT (phone_key) statement (%s placeholders)
+        upsert_params (tuple): Its parameters
+        update_unkeyed (str): UPDATE ... WHERE phone_key IS NULL AND phone_number = %s
+        update_params (tuple): Its parameters
+    """
+    if phone_key is None:
+        cursor.execute(_sql(update_unkeyed, is_postgres), update_params)
+        if cursor.rowcount > 0:
+            return
+    cursor.execute(_sql(upsert, is_postgres), upsert_params)
+
+
+def _insert_returning_id(cursor, is_postgres, query, params):
+    if is_postgres:
+        cursor.execute(query + " RETURNING id", params)
+        return cursor.fetchone()[0]
+    cursor.execute(_sql(query, is_postgres), params)
+    return cursor.lastrowid
+
+
+# Message text carried in live-update events (the dashboard shows the start)
+EVENT_BODY_CHARS = 1000
+
+
+def _utc_now():
+    """Timestamp in the format CURRENT_TIMESTAMP is displayed in."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _reply_event(version, phone, phone_hash, body, status, record_type, resolved_id):
+    """
+    'reply' event for live dashboards: the new inbound row (the dashboard lists
+    landlord replies only), the counters it moves and any request it resolved.
+    """
+    counters = {}
+    if record_type == 'landlord':
+        counters['incoming_total'] = 1
+        counters[{STATUS_YES: 'incoming_yes', STATUS_NO: 'incoming_no'}.get(status, 'incoming_pending')] = 1
+    if resolved_id is not None:
+        counters['verification_open'] = -1
+        counters['verification_resolved'] = 1
+    return {
+        'version': version,
+        'message': {
+            'phone': mask_phone(phone, fallback='Unknown'),
+            'phone_hash': phone_hash,
+            'body': body[:EVENT_BODY_CHARS],
+            'status': status,
+            'record_type': record_type,
+            'received_at': _utc_now(),
+        },
+        'resolved': {'verification_id': resolved_id, 'reply_status': status} if resolved_id is not None else None,
+        'counters': counters,
+    }
+
 
 def process_incoming_sms(phone_number, reply, timestamp, db_service, mask_phone_number, logger):
     """
     Process an incoming SMS and store it in the database.
-    For landlord replies (yes/no), store in incoming_messages table.
-    Also keep legacy rent_records table for backward compatibility.
+    Every reply is appended to the incoming_messages history; the sender's
+    landlord_record or tenants row (one per phone_key) is upserted with the
+    latest reply and status, and a YES/NO resolves the open verification
+    request for that number.
     
     Args:
         phone_number (str): Sender's phone number
@@ -24,113 +169,65 @@ def process_incoming_sms(phone_number, reply, timestamp, db_service, mask_phone_
     """
     masked_phone = mask_phone_number(phone_number)
     try:
-        conn = db_service.get_db_connection()
-        DATABASE_URL = os.getenv('DATABASE_URL')
-        
-        # Determine record type based on message content
-        # Default to landlord (can be overridden via environment variable DEFAULT_RECORD_TYPE)
-        default_type = os.getenv('DEFAULT_RECORD_TYPE', 'landlord').lower()
-        record_type = default_type if default_type in ['tenant', 'landlord'] else 'landlord'
-        
-        reply_upper = reply.upper().strip()
-        
-        # Check for landlord keywords
-        landlord_keywords = ['LANDLORD', 'OWNER', 'LL', 'PROPERTY OWNER', 'RENTAL OWNER']
-        tenant_keywords = ['TENANT', 'RENTER', 'RESIDENT', 'TT']
-        
-        # If message contains landlord keywords, set to landlord
-        if any(keyword in reply_upper for keyword in landlord_keywords):
-            record_type = 'landlord'
-        # If message contains tenant keywords, set to tenant
-        elif any(keyword in reply_upper for keyword in tenant_keywords):
-            record_type = 'tenant'
+        is_postgres = get_settings().is_postgres
+        phone_key, phone_hash = phone_columns(phone_number)
         
-        # Check if message is yes/no for landlords
-        is_yes = False
-        is_no = False
-        if record_type == 'landlord':
-            if reply_upper in ['YES', 'Y', '1']:
-                is_yes = True
-            elif reply_upper in ['NO', 'N', '0']:
-                is_no = True
+        # Determine record type and YES/NO from the message content
+        classification = get_classifier().classify(reply)
+        record_type = classification.record_type
+        status = classification.status
+        is_yes = classification.is_yes
+        is_no = classification.is_no
         
-        # Store in incoming_messages table for landlord replies
-        if record_type == 'landlord':
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                # Use CURRENT_TIMESTAMP for received_at
-                cursor.execute(
-                    "INSERT INTO incoming_messages (landlord_phone, message_body, received_at, is_yes, is_no) VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s)",
-                    (phone_number, reply, is_yes, is_no)
-                )
-            else:
-                # SQLite
-                cursor = conn.cursor()
-                # Convert boolean to integer for SQLite
-                cursor.execute(
-                    "INSERT INTO incoming_messages (landlord_phone, message_body, received_at, is_yes, is_no) VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?)",
-                    (phone_number, reply, 1 if is_yes else 0, 1 if is_no else 0)
-                )
-        
-        # Store in appropriate table based on record type
-        if record_type == 'landlord':
-            # Store in landlord_record table
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                cursor.execute(
-                    "INSERT INTO landlord_record (phone_number, reply, timestamp) VALUES (%s, %s, %s)",
-                    (masked_phone, reply, timestamp)
-                )
-            else:
-                # SQLite
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO landlord_record (phone_number, reply, timestamp) VALUES (?, ?, ?)",
-                    (masked_phone, reply, timestamp)
-                )
-        else:
-            # Store in tenants table for tenant records
-            # Note: tenants table requires name and rent_amount, so we use defaults
-            if DATABASE_URL:
-                # PostgreSQL
-                from psycopg2.extras import RealDictCursor
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                # Insert with default values for required fields
-                cursor.execute(
-                    "INSERT INTO tenants (phone_number, reply, timestamp, name, address, rent_amount) VALUES (%s, %s, %s, %s, %s, %s)",
-                    (masked_phone, reply, timestamp, 'Unknown', 'Unknown', 0.00)
-                )
+        def store(conn):
+            cursor = conn.cursor()
+            # Message history: one row per inbound SMS
+            incoming_id = _insert_returning_id(
+                cursor, is_postgres,
+                "INSERT INTO incoming_messages (landlord_phone, message_body, received_at, is_yes, is_no, status, record_type, phone_key, phone_hash) "
+                "VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s, %s, %s, %s, %s)",
+                # SQLite stores booleans as 0/1
+                (phone_number, reply, is_yes if is_postgres else int(is_yes), is_no if is_postgres else int(is_no),
+                 status, record_type, phone_key, phone_hash)
+            )
+            
+            # A YES/NO answers the verification request sent to this number
+            resolved_id = None
+            if status in (STATUS_YES, STATUS_NO):
+                resolved_id = verification_service.resolve_request(cursor, is_postgres, phone_key, incoming_id, status)
+            
+            # Latest reply and status on the sender's entity row. The number is
+            # stored unmasked (canonical form when it normalizes); pages mask it.
+            if record_type == 'landlord':
+                upsert, update_unkeyed = LANDLORD_REPLY_UPSERT, LANDLORD_REPLY_UPDATE_UNKEYED
             else:
-                # SQLite
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO tenants (phone_number, reply, timestamp, name, address, rent_amount) VALUES (?, ?, ?, ?, ?, ?)",
-                    (masked_phone, reply, timestamp, 'Unknown', 'Unknown', 0.0)
-                )
+                upsert, update_unkeyed = TENANT_REPLY_UPSERT, TENANT_REPLY_UPDATE_UNKEYED
+            upsert_entity(
+                cursor, is_postgres, phone_key,
+                upsert, (phone_key or phone_number, reply, timestamp, status, phone_key, phone_hash),
+                update_unkeyed, (reply, timestamp, status, phone_number)
+            )
+            
+            conn.commit()
+            version = bump_version(conn)
+            event_bus.publish_event(conn, 'reply', _reply_event(
+                version, phone_key or phone_number, phone_hash, reply, status, record_type, resolved_id
+            ))
         
-        conn.commit()
-        conn.close()
+        # Serialized with every other write (batched on SQLite)
+        db_service.write(store)
         logger.info(f"Message recorded in database for {masked_phone} (type: {record_type})")
         return True
     except Exception as e:
         logger.error(f"Error in SMS handler: {e}")
-        if conn:
-            try:
-                conn.rollback()
-                conn.close()
-            except:
-                pass
         return False
 
 
 def send_sms_to_landlord(landlord_name, landlord_phone, landlord_address, landlord_email, 
                          message_body, db_service, logger):
     """
-    Send SMS message to landlord via Twilio and store in outgoing_messages table.
+    Send SMS message to landlord via Twilio, store it in outgoing_messages and
+    open a verification request for the reply.
     
     Args:
         landlord_name (str): Landlord's name
@@ -146,102 +243,109 @@ def send_sms_to_landlord(landlord_name, landlord_phone, landlord_address, landlo
     """
     try:
         # Get Twilio credentials
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        twilio_phone = os.getenv('TWILIO_PHONE_NUMBER')
+        settings = get_settings()
+        account_sid = settings.twilio_account_sid
+        auth_token = settings.twilio_auth_token
+        twilio_phone = settings.twilio_phone_number
         
-        if not all([account_sid, auth_token, twilio_phone]):
+        if not settings.twilio_configured:
             error_msg = "Twilio credentials not configured"
             logger.error(error_msg)
+            metrics.observe_twilio_send(error='not_configured')
             return False, None, error_msg
         
-        # Initialize Twilio client
-        client = Client(account_sid, auth_token)
+        # Reuse this process's Twilio client
+        client = get_twilio_client(account_sid, auth_token)
         
         # Send SMS via Twilio
-        message = client.messages.create(
-            body=message_body,
-            from_=twilio_phone,
-            to=landlord_phone
-        )
+        send_started = time.perf_counter()
+        try:
+            message = client.messages.create(
+                body=message_body,
+                from_=twilio_phone,
+                to=landlord_phone
+            )
+        except Exception:
+            metrics.observe_twilio_send(time.perf_counter() - send_started, error='api_error')
+            raise
+        metrics.observe_twilio_send(time.perf_counter() - send_started)
         
         message_sid = message.sid
-        logger.info(f"SMS sent to {landlord_phone} (SID: {message_sid})")
+        logger.info(f"SMS sent to {mask_phone(landlord_phone)} (SID: {message_sid})")
         
         # Store in outgoing_messages table
-        conn = db_service.get_db_connection()
-        DATABASE_URL = os.getenv('DATABASE_URL')
+        is_postgres = settings.is_postgres
+        phone_key, phone_hash = phone_columns(landlord_phone)
+        # Canonical form when it normalizes, as the reply path stores it
+        stored_phone = phone_key or landlord_phone
         
-        if DATABASE_URL:
-            # PostgreSQL
-            from psycopg2.extras import RealDictCursor
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(
-                """INSERT INTO outgoing_messages 
-                   (landlord_name, landlord_phone, landlord_address, landlord_email, 
-                    message_body, sent_at, twilio_message_sid, status) 
-                   VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s, 'sent')""",
-                (landlord_name, landlord_phone, landlord_address, landlord_email, 
-                 message_body, message_sid)
-            )
-        else:
-            # SQLite
+        def store(conn):
             cursor = conn.cursor()
-            cursor.execute(
+            outgoing_id = _insert_returning_id(
+                cursor, is_postgres,
                 """INSERT INTO outgoing_messages 
                    (landlord_name, landlord_phone, landlord_address, landlord_email, 
-                    message_body, sent_at, twilio_message_sid, status) 
-                   VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, 'sent')""",
-                (landlord_name, landlord_phone, landlord_address, landlord_email, 
-                 message_body, message_sid)
-            )
-        
-        conn.commit()
-        
-        # Also create/update landlord_record entry
-        try:
-            # Check if landlord already exists by phone number
-            cursor.execute(
-                "SELECT id FROM landlord_record WHERE phone_number = %s" if DATABASE_URL else 
-                "SELECT id FROM landlord_record WHERE phone_number = ?",
-                (landlord_phone,)
+                    message_body, sent_at, twilio_message_sid, status, phone_key, phone_hash) 
+                   VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s, 'sent', %s, %s)""",
+                (landlord_name, stored_phone, landlord_address, landlord_email, 
+                 message_body, message_sid, phone_key, phone_hash)
             )
-            existing = cursor.fetchone()
             
-            if existing:
-                # Update existing landlord record
-                cursor.execute(
-                    """UPDATE landlord_record 
-                       SET name = %s, email = %s, home_address = %s, updated_at = CURRENT_TIMESTAMP
-                       WHERE phone_number = %s""" if DATABASE_URL else
-                    """UPDATE landlord_record 
-                       SET name = ?, email = ?, home_address = ?, updated_at = CURRENT_TIMESTAMP
-                       WHERE phone_number = ?""",
-                    (landlord_name, landlord_email or None, landlord_address, landlord_phone)
-                )
-            else:
-                # Insert new landlord record
-                cursor.execute(
-                    "INSERT INTO landlord_record (name, phone_number, email, home_address) VALUES (%s, %s, %s, %s)" if DATABASE_URL else
-                    "INSERT INTO landlord_record (name, phone_number, email, home_address) VALUES (?, ?, ?, ?)",
-                    (landlord_name, landlord_phone, landlord_email or None, landlord_address)
-                )
             conn.commit()
-        except Exception as e:
-            logger.warning(f"Could not update landlord_record: {e}")
-            # Continue even if this fails
+            
+            # Open a verification request for the landlord's reply to resolve
+            request_id, superseded = None, False
+            try:
+                superseded = verification_service.has_open_request(cursor, is_postgres, phone_key)
+                request_id = verification_service.open_request(cursor, is_postgres, outgoing_id, phone_key, phone_hash)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                request_id, superseded = None, False
+                logger.warning(f"Could not open verification request: {e}")
+            
+            # Also create/update the landlord's entity row (one per phone_key)
+            try:
+                upsert_entity(
+                    cursor, is_postgres, phone_key,
+                    LANDLORD_DETAILS_UPSERT,
+                    (landlord_name, stored_phone, landlord_email or None, landlord_address, phone_key, phone_hash),
+                    LANDLORD_DETAILS_UPDATE_UNKEYED,
+                    (landlord_name, landlord_email or None, landlord_address, stored_phone)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Could not update landlord_record: {e}")
+                # Continue even if this fails
+            
+            version = bump_version(conn)
+            counters = {'outgoing_total': 1}
+            if request_id is not None and not superseded:
+                counters['verification_open'] = 1
+            event_bus.publish_event(conn, 'sent', {
+                'version': version,
+                'message': {
+                    'name': landlord_name,
+                    'phone': mask_phone(stored_phone),
+                    'phone_hash': phone_hash,
+                    'address': landlord_address,
+                    'email': landlord_email,
+                    'body': message_body[:EVENT_BODY_CHARS],
+                    'sent_at': _utc_now(),
+                    'status': 'sent',
+                    'verification_id': request_id,
+                },
+                'superseded': superseded,
+                'counters': counters,
+            })
         
-        conn.close()
-        logger.info(f"Outgoing message stored in database for {landlord_name} ({landlord_phone})")
+        # Serialized with every other write (batched on SQLite)
+        db_service.write(store)
+        logger.info(f"Outgoing message stored in database for {landlord_name} ({mask_phone(landlord_phone)})")
         return True, message_sid, None
         
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error sending SMS to landlord: {e}")
-        if 'conn' in locals():
-            try:
-                conn.rollback()
-                conn.close()
-            except:
-                pass
         return False, None, error_msg
@@ -0,0 +1,203 @@
+"""
+Verification Service - Linking Outbound Requests to Their Replies
+
+Each SMS sent to a landlord opens a verification request; the landlord's
+YES/NO reply resolves it. There is at most one open request per phone_key
+(a new send supersedes the previous one), enforced by a partial unique index.
+
+Each worker keeps a map of phone_key -> open request id, so resolving a reply
+is a dictionary hit. The map is only a hint: the resolving UPDATE re-checks
+that the request is still open, and falls back to an indexed lookup when the
+map is missing the number or another worker already moved it on.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+STATE_OPEN = 'open'
+STATE_RESOLVED = 'resolved'
+STATE_SUPERSEDED = 'superseded'
+
+# Open requests remembered per worker; older ones fall back to the database
+OPEN_CACHE_SIZE = 10000
+
+_open_requests = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def _remember(phone_key, request_id):
+    with _open_lock:
+        _open_requests[phone_key] = request_id
+        _open_requests.move_to_end(phone_key)
+        while len(_open_requests) > OPEN_CACHE_SIZE:
+            _open_requests.popitem(last=False)
+
+
+def _forget(phone_key):
+    with _open_lock:
+        _open_requests.pop(phone_key, None)
+
+
+def load_open_requests(conn):
+    """
+    Fill this worker's map from the database (run during warm-up).
+
+    Returns:
+        int: Number of open requests loaded
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT phone_key, id FROM verification_requests WHERE state = 'open' "
+        f"ORDER BY id DESC LIMIT {OPEN_CACHE_SIZE}"
+    )
+    rows = [tuple(row) for row in cursor.fetchall()]
+    with _open_lock:
+        _open_requests.clear()
+        for phone_key, request_id in reversed(rows):
+            _open_requests[phone_key] = request_id
+    return len(rows)
+
+
+def has_open_request(cursor, is_postgres, phone_key):
+    """True if a request is open for this number (a new send would supersede it)."""
+    if not phone_key:
+        return False
+    placeholder = '%s' if is_postgres else '?'
+    cursor.execute(
+        f"SELECT 1 FROM verification_requests WHERE phone_key = {placeholder} AND state = 'open'",
+        (phone_key,)
+    )
+    return cursor.fetchone() is not None
+
+
+def open_request(cursor, is_postgres, outgoing_message_id, phone_key, phone_hash):
+    """
+    Open a verification request for an outbound message, superseding any
+    request still open for the same number. The caller commits.
+
+    Args:
+        cursor: Cursor on the connection that stored the outgoing message
+        is_postgres (bool): Database flavour
+        outgoing_message_id (int): outgoing_messages.id
+        phone_key (str): E.164 number the message was sent to
+        phone_hash (str): Keyed hash of phone_key
+    Returns:
+        int or None: The new request id, or None if the number has no phone_key
+    """
+    if not phone_key:
+        return None
+    placeholder = '%s' if is_postgres else '?'
+    cursor.execute(
+        f"UPDATE verification_requests SET state = '{STATE_SUPERSEDED}' "
+        f"WHERE phone_key = {placeholder} AND state = 'open'",
+        (phone_key,)
+    )
+    query = (
+        "INSERT INTO verification_requests (outgoing_message_id, phone_key, phone_hash, state) "
+        f"VALUES ({placeholder}, {placeholder}, {placeholder}, 'open')"
+    )
+    params = (outgoing_message_id, phone_key, phone_hash)
+    if is_postgres:
+        cursor.execute(query + " RETURNING id", params)
+        request_id = cursor.fetchone()[0]
+    else:
+        cursor.execute(query, params)
+        request_id = cursor.lastrowid
+    # Remembered before commit; a rolled-back id is caught by the open re-check
+    _remember(phone_key, request_id)
+    return request_id
+
+
+def resolve_request(cursor, is_postgres, phone_key, incoming_message_id, reply_status):
+    """
+    Resolve the open request for a number with the reply that answers it.
+    The caller commits.
+
+    Args:
+        cursor: Cursor on the connection that stored the incoming message
+        is_postgres (bool): Database flavour
+        phone_key (str): E.164 number the reply came from
+        incoming_message_id (int): incoming_messages.id of the reply
+        reply_status (str): YES or NO
+    Returns:
+        int or None: The resolved request id, or None if no request was open
+    """
+    if not phone_key:
+        return None
+    placeholder = '%s' if is_postgres else '?'
+    update = (
+        f"UPDATE verification_requests SET state = '{STATE_RESOLVED}', "
+        f"incoming_message_id = {placeholder}, reply_status = {placeholder}, resolved_at = CURRENT_TIMESTAMP "
+        f"WHERE id = {placeholder} AND state = 'open'"
+    )
+    with _open_lock:
+        request_id = _open_requests.get(phone_key)
+    if request_id is not None:
+        cursor.execute(update, (incoming_message_id, reply_status, request_id))
+        if cursor.rowcount == 1:
+            _forget(phone_key)
+            return request_id
+
+    # Not in this worker's map, or stale: use the partial index on open requests
+    cursor.execute(
+        f"SELECT id FROM verification_requests WHERE phone_key = {placeholder} AND state = 'open'",
+        (phone_key,)
+    )
+    row = cursor.fetchone()
+    _forget(phone_key)
+    if not row:
+        return None
+    request_id = row[0]
+    cursor.execute(update, (incoming_message_id, reply_status, request_id))
+    return request_id if cursor.rowcount == 1 else None
+
+
+def elapsed_seconds_sql(is_postgres):
+    """SQL expression for a request's time to reply, in seconds (NULL while unresolved)."""
+    if is_postgres:
+        return "EXTRACT(EPOCH FROM resolved_at - opened_at)"
+    return "(julianday(resolved_at) - julianday(opened_at)) * 86400"
+
+
+def verification_stats(cursor, is_postgres):
+    """
+    Open/resolved counts and reply times over all verification requests.
+
+    Returns:
+        dict: open, resolved, avg_reply_seconds and max_reply_seconds
+            (reply times are None until something has been resolved)
+    """
+    elapsed = elapsed_seconds_sql(is_postgres)
+    cursor.execute(
+        "SELECT "
+        "SUM(CASE WHEN state = 'open' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN state = 'resolved' THEN 1 ELSE 0 END), "
+        f"AVG(CASE WHEN state = 'resolved' THEN {elapsed} END), "
+        f"MAX(CASE WHEN state = 'resolved' THEN {elapsed} END) "
+        "FROM verification_requests"
+    )
+    open_count, resolved_count, avg_seconds, max_seconds = tuple(cursor.fetchone())
+    return {
+        'open': int(open_count or 0),
+        'resolved': int(resolved_count or 0),
+        'avg_reply_seconds': float(avg_seconds) if avg_seconds is not None else None,
+        'max_reply_seconds': float(max_seconds) if max_seconds is not None else None,
+    }
+
+
+def format_duration(seconds):
+    """Render a duration in seconds as e.g. '45s', '12m' or '3h 20m' ('-' for None)."""
+    if seconds is None:
+        return '-'
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes = seconds // 60
+    if minutes < 60:
+        return f"{minutes}m"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 48:
+        return f"{hours}h {minutes}m"
+    return f"{hours // 24}d {hours % 24}h"
@@ -0,0 +1,270 @@
+/*
+ * RentVerify dashboard page script (loaded by templates/dashboard.html).
+ *
+ * Reads its settings from the <script> tag's data attributes:
+ *   data-version           data version the page shell was rendered at
+ *   data-filtered          '1' when the sections are narrowed by filters
+ *   data-events-url        /events live update stream
+ *   data-conversation-url  conversation link with a __hash__ placeholder
+ */
+
+// Sections load as fragments from /dashboard/section/<name>: those on
+// screen straight away, the rest as they scroll into view.
+// Live updates then patch the loaded tables and counters from /events;
+// anything they can't patch is refetched (a cheap 304 or cache hit
+// unless the data changed). Filtered sections can't tell whether a new row
+// matches, so they are refetched on every update instead.
+// Without a stream, refetch every 30 seconds.
+(function() {
+    var config = document.currentScript.dataset;
+    var latestVersion = config.version ? parseInt(config.version, 10) : null;
+    var filtered = config.filtered === '1';
+    var conversationUrl = config.conversationUrl;
+    var maxRows = 100;
+    var indicator = document.getElementById('refresh-indicator');
+    var sections = Array.prototype.slice.call(document.querySelectorAll('.section-body[data-src]'));
+    var fallback = null;
+
+    // ----- Sections -----
+
+    function loadSection(section) {
+        section.setAttribute('data-requested', '1');
+        return fetch(section.getAttribute('data-src'), {credentials: 'same-origin'})
+            .then(function(response) {
+                if (response.redirected) {
+                    // Session expired: go through the login page
+                    location.reload();
+                }
+                return response.text();
+            })
+            .then(function(html) {
+                section.innerHTML = html;
+                section.setAttribute('data-loaded', '1');
+                var fragment = section.querySelector('.section-fragment');
+                var version = fragment ? parseInt(fragment.getAttribute('data-version'), 10) : NaN;
+                section.setAttribute('data-version', isNaN(version) ? '' : version);
+                // Rendered before a write this page has already heard about
+                if (!isNaN(version) && latestVersion !== null && version < latestVersion) {
+                    return loadSection(section);
+                }
+            })
+            .catch(function() {
+                section.innerHTML = '<div class="section-loading">Could not load this section.</div>';
+            });
+    }
+
+    function refreshLoaded() {
+        sections.forEach(function(section) {
+            if (section.getAttribute('data-requested')) {
+                loadSection(section);
+            }
+        });
+    }
+
+    if (window.IntersectionObserver) {
+        var observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    loadSection(entry.target);
+                }
+            });
+        }, {rootMargin: '200px'});
+        sections.forEach(function(section) { observer.observe(section); });
+    } else {
+        sections.forEach(loadSection);
+    }
+
+    function startFallback() {
+        indicator.textContent = '🔄 Auto-refreshing every 30 seconds';
+        if (!fallback) {
+            fallback = setInterval(refreshLoaded, 30000);
+        }
+    }
+
+    if (!window.EventSource) {
+        startFallback();
+        return;
+    }
+
+    // ----- Live updates -----
+
+    function cell(row, text) {
+        var td = document.createElement('td');
+        td.textContent = text;
+        row.appendChild(td);
+        return td;
+    }
+
+    function badge(td, kind, text) {
+        var span = document.createElement('span');
+        span.className = 'badge ' + kind;
+        span.textContent = text;
+        td.textContent = '';
+        td.appendChild(span);
+    }
+
+    function phoneCell(row, msg) {
+        var td = cell(row, msg.phone + ' ');
+        if (msg.phone_hash) {
+            var link = document.createElement('a');
+            link.href = conversationUrl.replace('__hash__', msg.phone_hash);
+            link.title = 'View conversation';
+            link.textContent = '💬';
+            td.appendChild(link);
+        }
+    }
+
+    // True if an event at `version` is newer than what `section` shows.
+    // Sections not loaded yet (or still loading) will be fetched fresh.
+    function needsPatch(section, version) {
+        if (!section || !section.getAttribute('data-loaded')) {
+            return false;
+        }
+        var shown = parseInt(section.getAttribute('data-version'), 10);
+        return version === null || version === undefined || isNaN(shown) || shown < version;
+    }
+
+    function prepend(sectionId, tbodyId, row, version) {
+        var section = document.getElementById(sectionId);
+        if (!needsPatch(section, version)) {
+            return;
+        }
+        var tbody = document.getElementById(tbodyId);
+        if (!tbody) {
+            // Section still shows its empty state; let the server render the table
+            loadSection(section);
+            return;
+        }
+        tbody.insertBefore(row, tbody.firstChild);
+        while (tbody.rows.length > maxRows) {
+            tbody.deleteRow(-1);
+        }
+    }
+
+    function applyCounters(counters, version) {
+        Object.keys(counters || {}).forEach(function(name) {
+            var element = document.querySelector('[data-counter="' + name + '"]');
+            if (element && needsPatch(element.closest('.section-body'), version)) {
+                element.textContent = (parseInt(element.textContent, 10) || 0) + counters[name];
+            }
+        });
+    }
+
+    // Refetch the sections if a write reached the server without reaching this page
+    function advance(version) {
+        if (version === null || version === undefined) {
+            return;
+        }
+        var missed = latestVersion !== null && version !== latestVersion + 1;
+        latestVersion = Math.max(version, latestVersion === null ? version : latestVersion);
+        if (missed) {
+            refreshLoaded();
+        }
+    }
+
+    var source = new EventSource(config.eventsUrl);
+
+    source.addEventListener('hello', function(e) {
+        var data = JSON.parse(e.data);
+        clearInterval(fallback);
+        fallback = null;
+        indicator.textContent = '🟢 Live updates';
+        if (data.version !== null && latestVersion !== null && data.version !== latestVersion) {
+            latestVersion = data.version;
+            refreshLoaded();
+        }
+    });
+
+    // Filtered view: bring the loaded sections up to `version` from the server
+    function refetch(version) {
+        if (version !== null && version !== undefined) {
+            latestVersion = Math.max(version, latestVersion === null ? version : latestVersion);
+        }
+        refreshLoaded();
+    }
+
+    source.addEventListener('reply', function(e) {
+        var data = JSON.parse(e.data);
+        if (filtered) {
+            refetch(data.version);
+            return;
+        }
+        var msg = data.message;
+        if (msg.record_type === 'landlord') {
+            var row = document.createElement('tr');
+            phoneCell(row, msg);
+            cell(row, msg.body);
+            var status = cell(row, '');
+            if (msg.status === 'YES') {
+                badge(status, 'yes', 'YES');
+            } else if (msg.status === 'NO') {
+                badge(status, 'no', 'NO');
+            } else {
+                badge(status, 'pending', 'Pending');
+            }
+            cell(row, msg.received_at);
+            prepend('section-incoming', 'incoming-rows', row, data.version);
+        }
+        if (data.resolved) {
+            var reply = document.querySelector('[data-verification-id="' + data.resolved.verification_id + '"]');
+            if (reply && needsPatch(reply.closest('.section-body'), data.version)) {
+                badge(reply, data.resolved.reply_status === 'YES' ? 'yes' : 'no', data.resolved.reply_status);
+                reply.setAttribute('data-state', 'resolved');
+            }
+        }
+        applyCounters(data.counters, data.version);
+        advance(data.version);
+    });
+
+    source.addEventListener('sent', function(e) {
+        var data = JSON.parse(e.data);
+        if (filtered) {
+            refetch(data.version);
+            return;
+        }
+        var msg = data.message;
+        if (data.superseded && msg.phone_hash) {
+            document.querySelectorAll('#outgoing-rows tr[data-phone-hash="' + msg.phone_hash + '"] [data-state="open"]').forEach(function(td) {
+                td.textContent = '-';
+                td.setAttribute('data-state', 'superseded');
+            });
+        }
+        var row = document.createElement('tr');
+        row.setAttribute('data-phone-hash', msg.phone_hash || '');
+        cell(row, msg.name);
+        phoneCell(row, msg);
+        cell(row, msg.address);
+        cell(row, msg.email || '-');
+        cell(row, msg.body.length > 50 ? msg.body.slice(0, 50) + '...' : msg.body);
+        cell(row, msg.sent_at);
+        badge(cell(row, ''), 'yes', msg.status);
+        var reply = cell(row, '-');
+        if (msg.verification_id) {
+            reply.setAttribute('data-verification-id', msg.verification_id);
+            reply.setAttribute('data-state', 'open');
+            badge(reply, 'pending', 'Awaiting');
+        }
+        prepend('section-outgoing', 'outgoing-rows', row, data.version);
+        applyCounters(data.counters, data.version);
+        advance(data.version);
+    });
+
+    source.addEventListener('resync', refreshLoaded);
+
+    source.addEventListener('error', startFallback);
+})();
+
+// Auto-hide flash messages after 5 seconds
+document.addEventListener('DOMContentLoaded', function() {
+    const flashMessages = document.querySelectorAll('.flash-message');
+    flashMessages.forEach(function(msg) {
+        setTimeout(function() {
+            msg.style.transition = 'opacity 0.5s ease-out';
+            msg.style.opacity = '0';
+            setTimeout(function() {
+                msg.style.display = 'none';
+            }, 500);
+        }, 5000);
+    });
+});
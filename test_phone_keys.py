@@ -0,0 +1,105 @@
+"""
+Entity row test for inbound SMS (one landlord_record / tenants row per sender)
+
+Runs process_incoming_sms() against a temporary SQLite database:
+- replies from one number in different formats land on a single row
+- replies from a number that can't be normalized (no phone_key, e.g. a
+  short code) also land on a single row, updated with the latest reply
+- dashboard form saves (/add-landlord-record, /add-tenant-record) keep the
+  canonical number and don't add a row per submit either
+
+Run with: python test_phone_keys.py  (or pytest test_phone_keys.py)
+"""
+import os
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+os.environ['DATABASE_URL'] = ''
+
+from flask import Flask
+from services import db_service, schema
+from services.phone import mask_phone
+from services.twilio_service import process_incoming_sms
+from routes.dashboard import dashboard_bp
+from utils.extensions import register_services
+
+logger = logging.getLogger('test_phone_keys')
+
+
+# The writer thread and reader pool keep their connections, so every test
+# shares one database and uses its own numbers
+db_service.SQLITE_PATH = Path(tempfile.mkdtemp()) / 'rent_data.db'
+schema.ensure_schema()
+
+
+def _client():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    register_services(app, logger)
+    app.register_blueprint(dashboard_bp)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    return client
+
+
+def _receive(phone, body):
+    assert process_incoming_sms(phone, body, '2024-01-01 12:00:00', db_service, mask_phone, logger)
+
+
+def _rows(query, params=()):
+    conn = db_service.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return [tuple(row) for row in cursor.fetchall()]
+    finally:
+        db_service.close_db_connection(conn)
+
+
+def test_formats_share_a_row():
+    _receive('+15551234567', 'YES')
+    _receive('(555) 123-4567', 'NO')
+    rows = _rows("SELECT phone_key, reply FROM landlord_record WHERE phone_key = ?", ('+15551234567',))
+    assert rows == [('+15551234567', 'NO')], rows
+    print("[OK] one landlord row for a number in two formats")
+
+
+def test_unnormalizable_number_shares_a_row():
+    _receive('72345', 'YES')
+    _receive('72345', 'NO')
+    rows = _rows("SELECT phone_key, reply, status FROM landlord_record WHERE phone_number = ?", ('72345',))
+    assert rows == [(None, 'NO', 'NO')], rows
+    assert _rows("SELECT COUNT(*) FROM incoming_messages WHERE landlord_phone = ?", ('72345',)) == [(2,)]
+    print("[OK] one landlord row for a number without a phone_key")
+
+
+def test_form_saves_share_a_row():
+    client = _client()
+    _receive('+15552223333', 'YES')
+    client.post('/add-landlord-record', data={'name': 'Bo', 'phone_number': '(555) 222-3333', 'home_address': '2 Elm St'})
+    rows = _rows("SELECT name, phone_number, reply FROM landlord_record WHERE phone_key = ?", ('+15552223333',))
+    assert rows == [('Bo', '+15552223333', 'YES')], rows
+
+    for name in ('Cy', 'Di'):
+        client.post('/add-landlord-record', data={'name': name, 'phone_number': '82345', 'home_address': '3 Oak St'})
+        client.post('/add-tenant-record', data={
+            'name': name, 'phone_number': '82345', 'address': '4 Ash St', 'rent_amount': '900'
+        })
+    for table in ('landlord_record', 'tenants'):
+        rows = _rows(f"SELECT name FROM {table} WHERE phone_number = ?", ('82345',))
+        assert rows == [('Di',)], (table, rows)
+    print("[OK] form saves keep the canonical number and one row per sender")
+
+
+if __name__ == '__main__':
+    failed = False
+    for test in (test_formats_share_a_row, test_unnormalizable_number_shares_a_row, test_form_saves_share_a_row):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
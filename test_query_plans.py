@@ -0,0 +1,121 @@
+"""
+Query plan test for the record filters (?from=, ?to=, ?status=, ?type=, ?phone=)
+
+Builds the schema in an in-memory SQLite database and runs EXPLAIN QUERY PLAN
+on the dashboard section, CSV export and /api/v1 list queries for every
+combination of filters:
+- no filtered query may scan a whole table (unfiltered lists walk their
+  primary key or timestamp index newest first and stop at the page size)
+- API lists are keyset-paged by id, so for a date range alone the planner
+  may walk the primary key newest first instead; that is allowed as long as
+  nothing is sorted
+- dashboard sections filtered by a single status (or none) must read rows in
+  index order, so a page stops after DASHBOARD_LIMIT rows instead of sorting
+  every match
+
+Run with: python test_query_plans.py  (or pytest test_query_plans.py)
+"""
+import sys
+import sqlite3
+import itertools
+from datetime import date
+
+from services import schema, dashboard_service, api_service
+from services.db_service import RecordFilters, NO_FILTERS, filter_conditions
+
+# Values tried for each filter (None = not set)
+FILTER_VALUES = RecordFilters(
+    date_from=(None, date(2024, 1, 1)),
+    date_to=(None, date(2024, 2, 1)),
+    status=(None, 'yes', 'no', 'pending'),
+    record_type=(None, 'landlord', 'tenant'),
+    phone_suffix=(None, '1234', '5551234'),
+)
+
+SECTION_QUERIES = {
+    'outgoing': dashboard_service.outgoing_query,
+    'incoming': dashboard_service.incoming_query,
+    'landlords': dashboard_service.landlord_query,
+    'tenants': dashboard_service.tenant_query,
+}
+
+
+def _database():
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    for version in sorted(schema.MIGRATIONS):
+        schema.MIGRATIONS[version](cursor, False)
+    conn.commit()
+    return conn
+
+
+def _combinations():
+    for values in itertools.product(*FILTER_VALUES):
+        yield RecordFilters(*values)
+
+
+def _plan(conn, query, params):
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + query, params)]
+
+
+def _full_scans(plan):
+    # "SCAN t USING INDEX i" walks an index in order; a bare "SCAN t" reads the table
+    return [step for step in plan if step.startswith('SCAN ') and ' USING ' not in step]
+
+
+def test_dashboard_sections():
+    conn = _database()
+    checked = 0
+    for filters in _combinations():
+        for name, build_query in SECTION_QUERIES.items():
+            plan = _plan(conn, *build_query(filters, False))
+            assert not _full_scans(plan), f"{name} {filters}: {plan}"
+            if filters.status != 'pending':
+                assert not any('TEMP B-TREE' in step for step in plan), f"{name} {filters} sorts: {plan}"
+            checked += 1
+    conn.close()
+    print(f"[OK] {checked} dashboard section queries use indexes")
+
+
+def test_export():
+    conn = _database()
+    checked = 0
+    for filters in _combinations():
+        plan = _plan(conn, *dashboard_service.export_query(filters, False))
+        if filters != NO_FILTERS:
+            assert not _full_scans(plan), f"export {filters}: {plan}"
+        checked += 1
+    conn.close()
+    print(f"[OK] {checked} export queries use indexes")
+
+
+def test_api_lists():
+    conn = _database()
+    checked = 0
+    for filters in _combinations():
+        for resource in api_service.RESOURCES:
+            try:
+                conditions, _ = filter_conditions(filters, False, **api_service.FILTER_COLUMNS[resource])
+            except ValueError:
+                continue
+            query, params = api_service.resource_query(False, resource, ['id'], None, 50, filters)
+            plan = _plan(conn, query, params)
+            matches = filters.status or filters.phone_suffix or (filters.record_type and resource == 'incoming')
+            if matches and conditions != ['1 = 0']:
+                assert not _full_scans(plan), f"{resource} {filters}: {plan}"
+            elif _full_scans(plan):
+                assert not any('TEMP B-TREE' in step for step in plan), f"{resource} {filters} sorts: {plan}"
+            checked += 1
+    conn.close()
+    print(f"[OK] {checked} API list queries use indexes")
+
+
+if __name__ == '__main__':
+    failed = False
+    for test in (test_dashboard_sections, test_export, test_api_lists):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
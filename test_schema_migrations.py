@@ -0,0 +1,97 @@
+"""
+Migration test for schema version 3 (one entity row per phone_key)
+
+Builds a version 2 database in memory, fills it with the duplicates that
+per-SMS inserts used to leave behind, and applies migration 3:
+- rows for the same number in any format fold into one row
+- the survivor is the oldest row with real details (e.g. added from the
+  dashboard), placeholder details are filled from the other rows, and the
+  latest reply wins
+- rows whose number can't be normalized are left as they are
+- phone_key is unique afterwards
+
+Run with: python test_schema_migrations.py  (or pytest test_schema_migrations.py)
+"""
+import sys
+import sqlite3
+
+from services import schema
+
+
+def _version_2():
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    for version in (1, 2):
+        schema.MIGRATIONS[version](cursor, False)
+    conn.commit()
+    return conn
+
+
+def test_v3_folds_duplicate_landlords():
+    conn = _version_2()
+    conn.executemany(
+        "INSERT INTO landlord_record (name, phone_number, email, home_address, num_units, reply, timestamp, status) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ('Unknown', '+15551234567', None, 'Unknown', 0, 'YES', '2024-01-01 09:00:00', 'YES'),
+            ('Ada Landlord', '(555) 123-4567', None, '1 Main St', 4, None, None, 'PENDING'),
+            ('Unknown', '5551234567', 'ada@example.com', 'Unknown', 0, 'NO', '2024-01-02 09:00:00', 'NO'),
+            ('Unknown', '72345', None, 'Unknown', 0, 'YES', '2024-01-01 10:00:00', 'YES'),
+            ('Unknown', '72345', None, 'Unknown', 0, 'NO', '2024-01-02 10:00:00', 'NO'),
+        ]
+    )
+    conn.commit()
+
+    schema.MIGRATIONS[3](conn.cursor(), False)
+    conn.commit()
+
+    rows = conn.execute(
+        "SELECT id, name, email, home_address, num_units, reply, status FROM landlord_record "
+        "WHERE phone_key = '+15551234567'"
+    ).fetchall()
+    assert rows == [(2, 'Ada Landlord', 'ada@example.com', '1 Main St', 4, 'NO', 'NO')], rows
+    unkeyed = conn.execute("SELECT COUNT(*) FROM landlord_record WHERE phone_key IS NULL").fetchone()[0]
+    assert unkeyed == 2, unkeyed
+    try:
+        conn.execute(
+            "INSERT INTO landlord_record (name, phone_number, home_address, phone_key) "
+            "VALUES ('Unknown', '+15551234567', 'Unknown', '+15551234567')"
+        )
+    except sqlite3.IntegrityError:
+        pass
+    else:
+        raise AssertionError("phone_key is not unique after migration 3")
+    conn.close()
+    print("[OK] migration 3 folds duplicate landlord rows into one per phone_key")
+
+
+def test_v3_folds_duplicate_tenants():
+    conn = _version_2()
+    conn.executemany(
+        "INSERT INTO tenants (name, address, phone_number, rent_amount, reply, timestamp, status) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            ('Unknown', 'Unknown', '+15559876543', 0, 'paid YES', '2024-01-01 09:00:00', 'YES'),
+            ('Unknown', 'Unknown', '555-987-6543', 0, 'not yet', '2024-01-03 09:00:00', 'NO'),
+        ]
+    )
+    conn.commit()
+
+    schema.MIGRATIONS[3](conn.cursor(), False)
+    conn.commit()
+
+    rows = conn.execute("SELECT id, reply, status FROM tenants").fetchall()
+    assert rows == [(1, 'not yet', 'NO')], rows
+    conn.close()
+    print("[OK] migration 3 folds duplicate tenant rows into one per phone_key")
+
+
+if __name__ == '__main__':
+    failed = False
+    for test in (test_v3_folds_duplicate_landlords, test_v3_folds_duplicate_tenants):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,150 @@
+"""
+Single-writer test for db_service.write() on SQLite
+
+Runs write() jobs against a temporary SQLite database:
+- jobs queued while the writer is busy are committed together, each in its
+  own savepoint: a job that raises is rolled back alone and the rest of its
+  batch is committed
+- conn.rollback() inside a job undoes only that job's work since its last
+  conn.commit()
+- after_commit() callbacks run once the batch is committed (a read-only
+  connection already sees the row), and not at all for a job that raised
+- write() from inside a write job raises RuntimeError instead of deadlocking
+
+Run with: python test_write_queue.py  (or pytest test_write_queue.py)
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+os.environ['DATABASE_URL'] = ''
+
+from services import db_service, schema
+
+# The writer thread and reader pool keep their connections, so every test
+# shares one database and uses its own names
+db_service.SQLITE_PATH = Path(tempfile.mkdtemp()) / 'rent_data.db'
+schema.ensure_schema()
+
+
+def _insert(name):
+    def job(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO landlord_record (name, phone_number, home_address) VALUES (?, ?, 'Unknown')",
+            (name, name)
+        )
+        return cursor.lastrowid
+    return job
+
+
+def _names(prefix):
+    conn = db_service.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM landlord_record WHERE name LIKE ? ORDER BY name", (prefix + '%',))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        db_service.close_db_connection(conn)
+
+
+def _write_in_thread(fn, outcomes, key):
+    def run():
+        try:
+            outcomes[key] = db_service.write(fn)
+        except Exception as e:
+            outcomes[key] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_failing_job_rolls_back_alone():
+    # Hold the writer so the next jobs queue up and run as one batch
+    started, release = threading.Event(), threading.Event()
+
+    def hold(conn):
+        started.set()
+        release.wait(5)
+
+    def fail(conn):
+        _insert('batch-b')(conn)
+        raise ValueError('boom')
+
+    outcomes = {}
+    threads = [_write_in_thread(hold, outcomes, 'hold')]
+    assert started.wait(5)
+    threads += [_write_in_thread(fn, outcomes, key) for key, fn in
+                (('a', _insert('batch-a')), ('b', fail), ('c', _insert('batch-c')))]
+    while db_service._get_writer_queue().qsize() < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert isinstance(outcomes['b'], ValueError), outcomes
+    assert isinstance(outcomes['a'], int) and isinstance(outcomes['c'], int), outcomes
+    assert _names('batch-') == ['batch-a', 'batch-c']
+    print("[OK] a failing job rolls back alone; the rest of its batch commits")
+
+
+def test_rollback_undoes_only_since_commit():
+    def job(conn):
+        _insert('partial-kept')(conn)
+        conn.commit()
+        _insert('partial-dropped')(conn)
+        conn.rollback()
+
+    db_service.write(job)
+    assert _names('partial-') == ['partial-kept']
+    print("[OK] conn.rollback() undoes the job's work since its last commit")
+
+
+def test_after_commit_runs_after_commit():
+    seen = []
+
+    def job(conn):
+        _insert('callback-a')(conn)
+        # A read-only connection only sees committed rows
+        conn.after_commit(lambda: seen.append(_names('callback-')))
+
+    def fail(conn):
+        conn.after_commit(lambda: seen.append('failed job'))
+        raise ValueError('boom')
+
+    db_service.write(job)
+    try:
+        db_service.write(fail)
+    except ValueError:
+        pass
+    assert seen == [['callback-a']], seen
+    print("[OK] after_commit callbacks run after COMMIT, and not for failed jobs")
+
+
+def test_nested_write_raises():
+    def job(conn):
+        db_service.write(_insert('nested'))
+
+    try:
+        db_service.write(job)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("write() inside a write job did not raise")
+    assert _names('nested') == []
+    print("[OK] write() from the writer thread raises RuntimeError")
+
+
+if __name__ == '__main__':
+    failed = False
+    for test in (test_failing_job_rolls_back_alone, test_rollback_undoes_only_since_commit,
+                 test_after_commit_runs_after_commit, test_nested_write_raises):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,164 @@
+"""
+Static Assets and Response Compression for RentVerify
+
+register_assets(app) fingerprints everything under static/ once at startup:
+- templates link assets with asset_url('dashboard.css'), which resolves to
+  /assets/dashboard.<content hash>.css
+- /assets/<name> serves those files with Cache-Control: immutable; the name
+  changes whenever the content does, so browsers never re-request a file
+  they already hold
+- text assets are compressed once, at startup (gzip, plus brotli when the
+  optional brotli package is installed), and each request gets the best
+  variant it accepts
+
+It also gzips HTML and JSON responses of at least COMPRESS_MIN_BYTES on the
+fly. Streams (/events) and already-encoded responses are left alone.
+
+In debug mode asset_url() returns plain /static URLs, so edited files show
+up without a restart.
+"""
+import os
+import gzip
+import hashlib
+import mimetypes
+from flask import Blueprint, Response, abort, current_app, request, url_for
+from utils.settings import get_settings
+
+try:
+    import brotli
+except Exception:  # brotli is optional; assets are then gzip-only
+    brotli = None
+
+# Fingerprinted URLs never change content, so they can be cached for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Static files worth precompressing
+COMPRESSIBLE_ASSETS = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# Response types gzipped on the fly
+COMPRESSIBLE_RESPONSES = frozenset(('text/html', 'application/json'))
+GZIP_LEVEL = 6
+
+# Content-Encoding preference when a client accepts several
+ENCODINGS = ('br', 'gzip')
+
+assets_bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+class Asset:
+    """One static file: its content type, validator and encoded variants."""
+
+    __slots__ = ('mimetype', 'etag', 'variants')
+
+    def __init__(self, mimetype, etag, variants):
+        self.mimetype = mimetype
+        self.etag = etag
+        self.variants = variants
+
+
+class AssetManifest:
+    """Fingerprinted names and precompressed bodies for a static folder."""
+
+    def __init__(self, folder):
+        self.urls = {}      # 'dashboard.css' -> 'dashboard.3f9a1c2e7b.css'
+        self.assets = {}    # 'dashboard.3f9a1c2e7b.css' -> Asset
+        if folder and os.path.isdir(folder):
+            for root, _, files in os.walk(folder):
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    self._add(os.path.relpath(path, folder).replace(os.sep, '/'), path)
+
+    def _add(self, name, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{digest}{ext}"
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        variants = {'identity': data}
+        if mimetype.startswith(COMPRESSIBLE_ASSETS):
+            variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                variants['br'] = brotli.compress(data)
+            # Keep only encodings that actually save bytes
+            variants = {encoding: body for encoding, body in variants.items()
+                        if encoding == 'identity' or len(body) < len(data)}
+        self.urls[name] = hashed
+        self.assets[hashed] = Asset(mimetype, digest, variants)
+
+
+def asset_url(filename):
+    """URL of a static file, fingerprinted outside debug mode."""
+    manifest = current_app.extensions.get('assets')
+    if manifest is None or current_app.debug or filename not in manifest.urls:
+        return url_for('static', filename=filename)
+    return url_for('assets.asset', name=manifest.urls[filename])
+
+
+def _negotiate(asset):
+    """Best encoding of `asset` the client accepts ('identity' if none)."""
+    for encoding in ENCODINGS:
+        if encoding in asset.variants and request.accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+
+# ==================== Fingerprinted Assets ====================
+@assets_bp.route('/<path:name>')
+def asset(name):
+    """A fingerprinted static file, cached by browsers for a year."""
+    asset = current_app.extensions['assets'].assets.get(name)
+    if asset is None:
+        abort(404)
+    encoding = _negotiate(asset)
+    etag = asset.etag if encoding == 'identity' else f"{asset.etag}-{encoding}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+
+# ==================== Response Compression ====================
+def _compress_response(response):
+    """Gzip HTML/JSON bodies of at least COMPRESS_MIN_BYTES for clients that accept it."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_RESPONSES
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+    data = response.get_data()
+    if len(data) < get_settings().compress_min_bytes:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    # The bytes differ from the identity encoding; keep the validator but weaken it
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def register_assets(app):
+    """
+    Fingerprint and precompress app.static_folder, and add asset_url() to
+    templates, /assets/<name> and on-the-fly HTML/JSON compression.
+
+    Args:
+        app (Flask): Application being built
+    Returns:
+        AssetManifest: The manifest (also in app.extensions['assets'])
+    """
+    manifest = AssetManifest(app.static_folder)
+    app.extensions['assets'] = manifest
+    app.add_template_global(asset_url)
+    app.register_blueprint(assets_bp)
+    app.after_request(_compress_response)
+    return manifest
@@ -0,0 +1,56 @@
+"""
+Admin Authentication for RentVerify
+
+Credentials come from ADMIN_USERNAME and either ADMIN_PASSWORD_HASH (a
+precomputed werkzeug hash, preferred) or ADMIN_PASSWORD. Without a
+precomputed hash the password is hashed on the first login attempt instead
+of during startup, since the KDF is deliberately slow.
+
+Generate a hash with:
+    python -c "from werkzeug.security import generate_password_hash; print(generate_password_hash('your-password'))"
+"""
+import os
+import hmac
+import threading
+from functools import wraps
+from flask import session, flash, redirect, url_for
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_ADMIN_USERNAME = 'amina'
+DEFAULT_ADMIN_PASSWORD = 'amina0000'
+
+_hash_lock = threading.Lock()
+_password_hash = []
+
+
+def admin_username():
+    return os.getenv('ADMIN_USERNAME', DEFAULT_ADMIN_USERNAME)
+
+
+def admin_password_hash():
+    """Return the configured hash, deriving it once if only a password is set."""
+    if not _password_hash:
+        with _hash_lock:
+            if not _password_hash:
+                precomputed = os.getenv('ADMIN_PASSWORD_HASH')
+                _password_hash.append(
+                    precomputed or generate_password_hash(os.getenv('ADMIN_PASSWORD', DEFAULT_ADMIN_PASSWORD))
+                )
+    return _password_hash[0]
+
+
+def check_admin_credentials(username, password):
+    """Return True if the username and password match the admin account."""
+    username_ok = hmac.compare_digest(username.encode(), admin_username().encode())
+    return check_password_hash(admin_password_hash(), password) and username_ok
+
+
+def login_required(f):
+    """Decorator to protect routes - requires login."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'logged_in' not in session:
+            flash('Please log in to access this page.', 'warning')
+            return redirect(url_for('login'))
+        return f(*args, **kwargs)
+    return decorated_function
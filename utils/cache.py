@@ -0,0 +1,91 @@
+"""
+In-Process Cache for RentVerify
+
+A small thread-safe LRU with a per-entry TTL. get_or_load() is single-flight:
+when several requests miss the same key at once, one runs the loader and the
+others wait for its result instead of all querying the database.
+
+Entries are per worker process; cross-worker invalidation comes from putting
+a shared version in the key (see services/data_version.py).
+"""
+import time
+import threading
+from collections import OrderedDict
+from utils import metrics
+
+
+class TTLCache:
+    """Bounded LRU whose entries expire `ttl` seconds after they are stored."""
+
+    def __init__(self, name, maxsize=8, ttl=30.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Return the cached value for `key`, calling loader() once on a miss.
+
+        Args:
+            key (hashable): Cache key
+            loader (func): Builds the value; exceptions propagate and nothing is cached
+            ttl (float): Override the cache's TTL (0 disables caching)
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            metrics.observe_cache(self.name, hit=True)
+            return value
+        with self._lock:
+            event = self._loading.get(key)
+            leader = event is None
+            if leader:
+                event = self._loading[key] = threading.Event()
+        if not leader:
+            # Another thread is loading this key; use its result if it succeeds
+            event.wait()
+            value = self.get(key)
+            if value is not None:
+                metrics.observe_cache(self.name, hit=True)
+                return value
+        metrics.observe_cache(self.name, hit=False)
+        try:
+            value = loader()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            if leader:
+                with self._lock:
+                    self._loading.pop(key, None)
+                event.set()
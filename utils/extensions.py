@@ -0,0 +1,66 @@
+"""
+Application Services Registry for RentVerify
+
+Whichever factory built the app (app.py or app_local.py) calls
+register_services() once. The logger, phone masking function, auth decorator
+and database backend are resolved there and stored on
+app.extensions['rentverify']; blueprints read them with get_services()
+instead of importing from app/app_local inside every request.
+"""
+from flask import current_app
+from services import db_service
+from utils.auth import login_required
+from services.phone import mask_phone
+
+EXTENSION_KEY = 'rentverify'
+
+
+class AppServices:
+    """Helpers shared by the blueprints, fixed when the app is built."""
+
+    __slots__ = ('logger', 'mask_phone_number', 'login_required', 'db', 'is_postgres', 'dev_tools')
+
+    def __init__(self, logger, mask_phone_number, login_required, db, is_postgres, dev_tools):
+        self.logger = logger
+        self.mask_phone_number = mask_phone_number
+        self.login_required = login_required
+        self.db = db
+        self.is_postgres = is_postgres
+        self.dev_tools = dev_tools
+
+    def cursor(self, conn):
+        """Open a cursor whose rows can be read by column name on either backend."""
+        if self.is_postgres:
+            return conn.cursor(cursor_factory=db_service.RealDictCursor)
+        return conn.cursor()
+
+
+def register_services(app, logger, mask_phone_number=None, is_postgres=False, dev_tools=False):
+    """
+    Resolve and store the per-app services used by the blueprints.
+
+    Args:
+        app (Flask): Application being built
+        logger (Logger): Application logger
+        mask_phone_number (func): Masking for logs and exports; None uses
+            services.phone.mask_phone, as the pages do
+        is_postgres (bool): True when DATABASE_URL selects PostgreSQL
+        dev_tools (bool): Enable development-only routes such as /add-test-data
+    Returns:
+        AppServices: The registered services
+    """
+    services = AppServices(
+        logger=logger,
+        mask_phone_number=mask_phone_number or mask_phone,
+        login_required=login_required,
+        db=db_service,
+        is_postgres=is_postgres,
+        dev_tools=dev_tools
+    )
+    app.extensions[EXTENSION_KEY] = services
+    return services
+
+
+def get_services():
+    """Return the services registered for the current app."""
+    return current_app.extensions[EXTENSION_KEY]
@@ -0,0 +1,147 @@
+"""
+Health Probes for RentVerify
+
+/health/live   - the process is up; no I/O at all
+/health/ready  - result of the last background check (database, schema version
+                 and any registered checks); 503 until the first check passes
+/health        - kept for existing Azure/Render probe settings, same as ready
+
+A daemon thread per worker runs the checks every HEALTH_PROBE_INTERVAL
+seconds, so a slow database delays the prober rather than the probe request.
+"""
+import os
+import time
+import logging
+import threading
+from flask import jsonify
+from services import db_service, schema
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """Runs readiness checks on an interval and caches the result."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._checks = {}
+        self._result = {'status': 'starting', 'checks': {}, 'checked_at': None}
+        self._ready = False
+        self._checked_at = 0.0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.add_check('database', check_database)
+
+    def add_check(self, name, check):
+        """
+        Register a readiness check.
+
+        Args:
+            name (str): Key reported in the probe response
+            check (func): Returns a dict of details; raises to mark the app not ready
+        """
+        self._checks[name] = check
+
+    def ensure_running(self):
+        """Start the probe thread in this process if it isn't running (fork-safe)."""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != pid or self._thread is None or not self._thread.is_alive():
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+                self._thread.start()
+
+    def refresh(self):
+        """Wake the prober to re-check now (e.g. after warm-up)."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self.run_checks()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_checks(self):
+        """Run every check once and cache the outcome."""
+        results = {}
+        ready = True
+        for name, check in list(self._checks.items()):
+            started = time.perf_counter()
+            try:
+                details = check() or {}
+                details['ok'] = True
+            except Exception as e:
+                details = {'ok': False, 'error': str(e)}
+                ready = False
+            details['ms'] = round((time.perf_counter() - started) * 1000, 1)
+            results[name] = details
+        if not ready and self._ready:
+            logger.warning(f"Readiness check failed: {results}")
+        self._ready = ready
+        self._checked_at = time.time()
+        self._result = {
+            'status': 'ready' if ready else 'not_ready',
+            'checks': results,
+            'checked_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._checked_at))
+        }
+
+    def snapshot(self):
+        """
+        Return the cached readiness result.
+
+        Returns:
+            tuple: (ready: bool, result: dict)
+        """
+        result = self._result
+        if self._checked_at and time.time() - self._checked_at > self.interval * 3:
+            return False, dict(result, status='stale')
+        return self._ready, result
+
+
+def check_database():
+    """Run SELECT 1 on a pooled read connection and compare the schema version."""
+    is_postgres = get_settings().is_postgres
+    conn = db_service.get_read_connection()
+    try:
+        cursor = conn.cursor()
+        if is_postgres:
+            cursor.execute("SET LOCAL statement_timeout = 2000")
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        version = db_service.get_schema_version(conn)
+    finally:
+        conn.close()
+    if version < schema.SCHEMA_VERSION:
+        raise RuntimeError(f"Schema version {version} is older than required {schema.SCHEMA_VERSION}")
+    details = {'schema_version': version}
+    if is_postgres:
+        details['pool'] = db_service.get_pool().stats()
+    return details
+
+
+def register_health(app):
+    """Add the probe endpoints and start this process's prober."""
+    prober = HealthProber(get_settings().health_probe_interval)
+    app.extensions['health_prober'] = prober
+    prober.ensure_running()
+
+    @app.route('/health/live')
+    def health_live():
+        """Liveness: the worker can answer HTTP."""
+        return jsonify({'status': 'alive'}), 200
+
+    @app.route('/health/ready')
+    def health_ready():
+        """Readiness: cached result of the background checks."""
+        prober.ensure_running()
+        ready, result = prober.snapshot()
+        return jsonify(result), 200 if ready else 503
+
+    app.add_url_rule('/health', 'health_check', health_ready)
+    return prober
@@ -0,0 +1,219 @@
+"""
+Prometheus Metrics for RentVerify
+
+Exposes request, database, Twilio and queue metrics on /metrics.
+
+When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py), prometheus_client
+writes each worker's values to memory-mapped files in that directory and the
+/metrics view aggregates them, so every gunicorn worker is reported.
+
+If prometheus_client is not installed, every helper in this module is a no-op
+and /metrics returns 503.
+
+/metrics answers a scraper sending "Authorization: Bearer <METRICS_TOKEN>" or
+a logged-in admin. Without METRICS_TOKEN it is open only in debug mode.
+"""
+import os
+import time
+import hmac
+from flask import request, session, current_app, g, Response
+from utils.settings import get_settings
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram,
+        REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+    )
+except Exception:  # prometheus_client is optional
+    Counter = Gauge = Histogram = None
+
+# Database statements are much faster than whole requests
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+if Histogram is not None:
+    REQUEST_LATENCY = Histogram(
+        'rentverify_request_duration_seconds',
+        'HTTP request latency by blueprint and endpoint',
+        ['blueprint', 'endpoint', 'method']
+    )
+    REQUEST_COUNT = Counter(
+        'rentverify_requests_total',
+        'HTTP requests by endpoint and status code',
+        ['endpoint', 'status']
+    )
+    DB_QUERY_LATENCY = Histogram(
+        'rentverify_db_query_duration_seconds',
+        'Database statement latency by statement name',
+        ['statement'],
+        buckets=DB_BUCKETS
+    )
+    DB_CONNECTIONS_IN_USE = Gauge(
+        'rentverify_db_connections_in_use',
+        'Database connections currently checked out',
+        multiprocess_mode='livesum'
+    )
+    DB_CONNECTION_WAIT = Histogram(
+        'rentverify_db_connection_wait_seconds',
+        'Time spent waiting to obtain a database connection',
+        buckets=DB_BUCKETS
+    )
+    DB_CONNECTION_WAITS = Counter(
+        'rentverify_db_connection_waits_total',
+        'Connection requests that had to wait for a new or free connection'
+    )
+    TWILIO_SEND_LATENCY = Histogram(
+        'rentverify_twilio_send_duration_seconds',
+        'Twilio messages.create latency'
+    )
+    TWILIO_SEND_ERRORS = Counter(
+        'rentverify_twilio_send_errors_total',
+        'Failed Twilio sends by reason',
+        ['reason']
+    )
+    QUEUE_DEPTH = Gauge(
+        'rentverify_queue_depth',
+        'Items waiting in in-process queues',
+        ['queue'],
+        multiprocess_mode='livesum'
+    )
+    CACHE_LOOKUPS = Counter(
+        'rentverify_cache_lookups_total',
+        'In-process cache lookups by cache and result',
+        ['cache', 'result']
+    )
+
+# Labelled children are cached so the hot path skips prometheus_client's
+# label validation after the first request to each endpoint.
+_request_children = {}
+_count_children = {}
+_statement_children = {}
+
+
+def metrics_enabled():
+    """Return True when prometheus_client is available."""
+    return Histogram is not None
+
+
+# ==================== Recording Helpers ====================
+
+def observe_request(blueprint, endpoint, method, status, seconds):
+    """Record one HTTP request."""
+    if Histogram is None:
+        return
+    key = (blueprint, endpoint, method)
+    child = _request_children.get(key)
+    if child is None:
+        child = _request_children[key] = REQUEST_LATENCY.labels(*key)
+    child.observe(seconds)
+    key = (endpoint, status)
+    child = _count_children.get(key)
+    if child is None:
+        child = _count_children[key] = REQUEST_COUNT.labels(*key)
+    child.inc()
+
+
+def observe_db_query(statement, seconds):
+    """Record one database statement."""
+    if Histogram is None:
+        return
+    child = _statement_children.get(statement)
+    if child is None:
+        child = _statement_children[statement] = DB_QUERY_LATENCY.labels(statement)
+    child.observe(seconds)
+
+
+def connection_acquired(wait_seconds, waited=True):
+    """Record a connection checkout and how long it took."""
+    if Histogram is None:
+        return
+    DB_CONNECTIONS_IN_USE.inc()
+    DB_CONNECTION_WAIT.observe(wait_seconds)
+    if waited:
+        DB_CONNECTION_WAITS.inc()
+
+
+def connection_released():
+    """Record a connection being returned or closed."""
+    if Histogram is None:
+        return
+    DB_CONNECTIONS_IN_USE.dec()
+
+
+def observe_twilio_send(seconds=None, error=None):
+    """
+    Record a Twilio send attempt.
+
+    Args:
+        seconds (float): API call latency, or None if no call was made
+        error (str): Failure reason label, or None on success
+    """
+    if Histogram is None:
+        return
+    if seconds is not None:
+        TWILIO_SEND_LATENCY.observe(seconds)
+    if error:
+        TWILIO_SEND_ERRORS.labels(error).inc()
+
+
+def set_queue_depth(queue, depth):
+    """
+    Publish the current depth of a named in-process queue
+    ('sqlite_writer': pending write() jobs; 'event_streams': live events
+    waiting to be sent to this worker's streams).
+    """
+    if Histogram is None:
+        return
+    QUEUE_DEPTH.labels(queue).set(depth)
+
+
+def observe_cache(cache, hit):
+    """Record one lookup in a named in-process cache."""
+    if Histogram is None:
+        return
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+# ==================== Flask Integration ====================
+
+def register_metrics(app):
+    """Attach request timing hooks and the /metrics endpoint to the app."""
+    # gunicorn.conf.py sets this before any worker imports prometheus_client
+    multiprocess_mode = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            observe_request(
+                request.blueprint or 'app',
+                request.endpoint or 'unmatched',
+                request.method,
+                str(response.status_code),
+                time.perf_counter() - started
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus scrape endpoint (METRICS_TOKEN bearer, admin session, or debug mode)."""
+        token = get_settings().metrics_token
+        supplied = request.headers.get('Authorization', '')
+        authorized = (
+            (token and hmac.compare_digest(supplied, f"Bearer {token}"))
+            or 'logged_in' in session
+            or (not token and current_app.debug)
+        )
+        if not authorized:
+            return Response("Unauthorized\n", status=401, mimetype='text/plain')
+        if Histogram is None:
+            return Response("prometheus_client not installed\n", status=503, mimetype='text/plain')
+        if multiprocess_mode:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,164 @@
+"""
+On-demand Request Profiling for RentVerify
+
+A request is profiled with cProfile when any of these apply:
+- PROFILE_REQUESTS=1 (every request)
+- PROFILE_SAMPLE_RATE (fraction of requests, e.g. 0.01)
+- the "X-Profile-Request: 1" header is sent by a logged-in admin
+
+Each capture is written to <instance>/profiles as a pstats dump plus a JSON
+summary with the SQL statements and their timings. Only the newest
+PROFILE_KEEP captures are kept. Admins can browse them at /admin/profiles.
+"""
+import os
+import io
+import json
+import time
+import random
+import pstats
+import cProfile
+from datetime import datetime
+from flask import request, session, g, has_request_context, render_template, abort, Response
+from services import db_service
+from utils.settings import get_settings
+
+PROFILE_HEADER = 'X-Profile-Request'
+
+
+def _should_profile():
+    """Decide whether the current request gets a profiler."""
+    settings = get_settings()
+    if settings.profile_requests:
+        return True
+    if request.headers.get(PROFILE_HEADER) == '1' and 'logged_in' in session:
+        return True
+    rate = settings.profile_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def _collect_query(cursor, query, params, seconds):
+    """Query listener: attach SQL timings to the request being profiled."""
+    if has_request_context():
+        queries = g.get('_profile_queries')
+        if queries is not None:
+            queries.append({
+                'statement': db_service.statement_name(query),
+                'sql': ' '.join(query.split())[:500],
+                'ms': round(seconds * 1000, 3)
+            })
+
+
+def _rotate(profile_dir, keep):
+    """Delete the oldest captures beyond the newest `keep`."""
+    summaries = sorted(
+        (name for name in os.listdir(profile_dir) if name.endswith('.json')),
+        reverse=True
+    )
+    for name in summaries[keep:]:
+        base = name[:-len('.json')]
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(profile_dir, base + suffix))
+            except OSError:
+                pass
+
+
+def load_profiles(profile_dir):
+    """Return capture summaries, slowest first."""
+    profiles = []
+    if not os.path.isdir(profile_dir):
+        return profiles
+    for name in os.listdir(profile_dir):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(profile_dir, name)) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summary['id'] = name[:-len('.json')]
+        profiles.append(summary)
+    profiles.sort(key=lambda p: p.get('duration_ms', 0), reverse=True)
+    return profiles
+
+
+def register_profiling(app, login_required):
+    """
+    Attach the profiling hooks and admin pages to the app.
+
+    Args:
+        app (Flask): Application to instrument
+        login_required (func): Decorator protecting the admin pages
+    """
+    profile_dir = os.path.join(app.instance_path, 'profiles')
+    db_service.add_query_listener(_collect_query)
+
+    @app.before_request
+    def _start_profiler():
+        if request.endpoint in ('static', 'metrics', 'health_live', 'health_ready', 'health_check') or not _should_profile():
+            return
+        g._profile_queries = []
+        g._profile_started = time.perf_counter()
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+
+    @app.after_request
+    def _finish_profiler(response):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        duration_ms = (time.perf_counter() - g.pop('_profile_started')) * 1000
+        queries = g.pop('_profile_queries', [])
+        try:
+            os.makedirs(profile_dir, exist_ok=True)
+            endpoint = (request.endpoint or 'unmatched').replace('.', '-')
+            base = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{endpoint}"
+            profiler.dump_stats(os.path.join(profile_dir, base + '.prof'))
+            summary = {
+                'endpoint': request.endpoint,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 2),
+                'sql_ms': round(sum(q['ms'] for q in queries), 2),
+                'captured_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'pid': os.getpid(),
+                'queries': queries
+            }
+            with open(os.path.join(profile_dir, base + '.json'), 'w') as f:
+                json.dump(summary, f)
+            _rotate(profile_dir, get_settings().profile_keep)
+            app.logger.info(f"Profiled {request.method} {request.path}: {duration_ms:.1f} ms, {len(queries)} queries")
+        except Exception as e:
+            app.logger.warning(f"Could not save request profile: {e}")
+        return response
+
+    @login_required
+    def profiles():
+        """List captured profiles, slowest first."""
+        return render_template('profiles.html', profiles=load_profiles(profile_dir))
+
+    @login_required
+    def profile_detail(profile_id):
+        """Show the cProfile report and SQL timings for one capture."""
+        if not all(c.isalnum() or c in '-_' for c in profile_id):
+            abort(404)
+        summary_path = os.path.join(profile_dir, profile_id + '.json')
+        stats_path = os.path.join(profile_dir, profile_id + '.prof')
+        if not os.path.exists(summary_path) or not os.path.exists(stats_path):
+            abort(404)
+        with open(summary_path) as f:
+            summary = json.load(f)
+        out = io.StringIO()
+        stats = pstats.Stats(stats_path, stream=out)
+        sort = request.args.get('sort', 'cumulative')
+        stats.sort_stats(sort if sort in ('cumulative', 'tottime', 'calls') else 'cumulative').print_stats(40)
+        report = [f"{summary['method']} {summary['path']} -> {summary['status']}",
+                  f"Total {summary['duration_ms']} ms, SQL {summary['sql_ms']} ms", '', 'SQL statements:']
+        report += [f"  {q['ms']:>9.3f} ms  {q['sql']}" for q in summary['queries']] or ['  (none)']
+        report += ['', out.getvalue()]
+        return Response('\n'.join(report), mimetype='text/plain')
+
+    app.add_url_rule('/admin/profiles', 'profiles', profiles)
+    app.add_url_rule('/admin/profiles/<profile_id>', 'profile_detail', profile_detail)
@@ -0,0 +1,264 @@
+"""
+Settings for RentVerify
+
+All configuration is parsed and validated once per process into a frozen
+Settings object; request handlers and services call get_settings() instead
+of reading os.environ on every request.
+
+The app factories call init_settings() after loading .env. Sending SIGHUP to
+a process re-reads the environment (and .env) and applies the tunables listed
+in RELOADABLE; anything else (database URL, pool sizes, credentials) keeps
+its startup value until the process restarts. Under gunicorn, send SIGHUP to
+a worker pid to retune it live; SIGHUP to the master restarts all workers.
+"""
+import os
+import signal
+import logging
+import threading
+import dataclasses
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    # Database
+    database_url: Optional[str] = None
+    db_pool_min: int = 1
+    db_pool_max: int = 5
+    db_pool_timeout: float = 10.0
+    db_connect_timeout: int = 5
+    # SQLite profile (local/edge; see services/db_service.py)
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 16384
+    sqlite_mmap_size_mb: int = 256
+    sqlite_read_pool: int = 8
+
+    # Twilio
+    twilio_account_sid: Optional[str] = None
+    twilio_auth_token: Optional[str] = None
+    twilio_phone_number: Optional[str] = None
+
+    # SMS handling
+    default_record_type: str = 'landlord'
+    # Key for phone_hash columns; changing it orphans stored hashes
+    phone_hash_key: str = 'rentverify-phone-hash'
+
+    # Relay endpoints (routes/relay.py)
+    azure_webhook_url: str = 'https://rentverify-app-fbbbazaagbd8e0hn.canadacentral-01.azurewebsites.net/sms'
+    render_webhook_url: str = 'https://rent-verify-bot.onrender.com/sms'
+    relay_timeout: float = 10.0
+
+    # Diagnostics
+    metrics_token: Optional[str] = None
+    profile_requests: bool = False
+    profile_sample_rate: float = 0.0
+    profile_keep: int = 50
+    slow_query_ms: float = 200.0
+    slow_query_explain_rate: float = 0.1
+    slow_query_log_bytes: int = 5 * 1024 * 1024
+
+    # Dashboard cache lifetime in seconds (0 disables it)
+    dashboard_cache_ttl: float = 30.0
+
+    # Smallest HTML/JSON response gzipped on the fly (bytes)
+    compress_min_bytes: int = 1024
+
+    # Startup, health and warm-up
+    health_probe_interval: float = 15.0
+    startup_target_ms: float = 2000.0
+    warmup_db_connections: int = 2
+    warmup_timeout: float = 30.0
+
+    @property
+    def is_postgres(self):
+        return bool(self.database_url)
+
+    @property
+    def twilio_configured(self):
+        return bool(self.twilio_account_sid and self.twilio_auth_token and self.twilio_phone_number)
+
+
+# field -> (environment variable, parser)
+_ENV = {
+    'database_url': ('DATABASE_URL', str),
+    'db_pool_min': ('DB_POOL_MIN', int),
+    'db_pool_max': ('DB_POOL_MAX', int),
+    'db_pool_timeout': ('DB_POOL_TIMEOUT', float),
+    'db_connect_timeout': ('DB_CONNECT_TIMEOUT', int),
+    'sqlite_busy_timeout_ms': ('SQLITE_BUSY_TIMEOUT_MS', int),
+    'sqlite_cache_size_kb': ('SQLITE_CACHE_SIZE_KB', int),
+    'sqlite_mmap_size_mb': ('SQLITE_MMAP_SIZE_MB', int),
+    'sqlite_read_pool': ('SQLITE_READ_POOL', int),
+    'twilio_account_sid': ('TWILIO_ACCOUNT_SID', str),
+    'twilio_auth_token': ('TWILIO_AUTH_TOKEN', str),
+    'twilio_phone_number': ('TWILIO_PHONE_NUMBER', str),
+    'default_record_type': ('DEFAULT_RECORD_TYPE', lambda value: value.strip().lower()),
+    'phone_hash_key': ('PHONE_HASH_KEY', str),
+    'azure_webhook_url': ('AZURE_WEBHOOK_URL', str),
+    'render_webhook_url': ('RENDER_WEBHOOK_URL', str),
+    'relay_timeout': ('RELAY_TIMEOUT', float),
+    'metrics_token': ('METRICS_TOKEN', str),
+    'profile_requests': ('PROFILE_REQUESTS', lambda value: value.strip().lower() in _TRUE_VALUES),
+    'profile_sample_rate': ('PROFILE_SAMPLE_RATE', float),
+    'profile_keep': ('PROFILE_KEEP', int),
+    'slow_query_ms': ('SLOW_QUERY_MS', float),
+    'slow_query_explain_rate': ('SLOW_QUERY_EXPLAIN_RATE', float),
+    'slow_query_log_bytes': ('SLOW_QUERY_LOG_BYTES', int),
+    'dashboard_cache_ttl': ('DASHBOARD_CACHE_TTL', float),
+    'compress_min_bytes': ('COMPRESS_MIN_BYTES', int),
+    'health_probe_interval': ('HEALTH_PROBE_INTERVAL', float),
+    'startup_target_ms': ('STARTUP_TARGET_MS', float),
+    'warmup_db_connections': ('WARMUP_DB_CONNECTIONS', int),
+    'warmup_timeout': ('WARMUP_TIMEOUT', float),
+}
+
+# Tunables that take effect without a restart when SIGHUP re-reads the environment
+RELOADABLE = frozenset((
+    'relay_timeout', 'azure_webhook_url', 'render_webhook_url',
+    'metrics_token', 'profile_requests', 'profile_sample_rate', 'profile_keep',
+    'slow_query_ms', 'slow_query_explain_rate', 'startup_target_ms',
+    'dashboard_cache_ttl', 'compress_min_bytes',
+))
+
+
+def _validate(settings):
+    errors = []
+    if settings.db_pool_min < 0:
+        errors.append("DB_POOL_MIN must be 0 or more")
+    if settings.db_pool_max < 1 or settings.db_pool_max < settings.db_pool_min:
+        errors.append("DB_POOL_MAX must be at least 1 and not less than DB_POOL_MIN")
+    for name in ('sqlite_busy_timeout_ms', 'sqlite_cache_size_kb', 'sqlite_mmap_size_mb'):
+        if getattr(settings, name) < 0:
+            errors.append(f"{_ENV[name][0]} must be 0 or more")
+    if settings.sqlite_read_pool < 1:
+        errors.append("SQLITE_READ_POOL must be at least 1")
+    for name in ('db_pool_timeout', 'db_connect_timeout', 'relay_timeout',
+                 'health_probe_interval', 'warmup_timeout'):
+        if getattr(settings, name) <= 0:
+            errors.append(f"{_ENV[name][0]} must be greater than 0")
+    for name in ('profile_sample_rate', 'slow_query_explain_rate'):
+        if not 0 <= getattr(settings, name) <= 1:
+            errors.append(f"{_ENV[name][0]} must be between 0 and 1")
+    if settings.dashboard_cache_ttl < 0:
+        errors.append("DASHBOARD_CACHE_TTL must be 0 or more")
+    if settings.compress_min_bytes < 0:
+        errors.append("COMPRESS_MIN_BYTES must be 0 or more")
+    if settings.default_record_type not in ('landlord', 'tenant'):
+        errors.append("DEFAULT_RECORD_TYPE must be 'landlord' or 'tenant'")
+    if errors:
+        raise ValueError("Invalid configuration: " + "; ".join(errors))
+
+
+def load_settings(environ=None):
+    """
+    Parse and validate settings from the environment.
+
+    Args:
+        environ (dict): Mapping to read instead of os.environ
+    Returns:
+        Settings: Validated, immutable settings
+    Raises:
+        ValueError: If a value can't be parsed or is out of range
+    """
+    environ = os.environ if environ is None else environ
+    values = {}
+    # PHONE_HASH_KEY falls back to SECRET_KEY, so rotating the session secret
+    # would silently orphan every stored phone_hash; say so at startup
+    if not environ.get('PHONE_HASH_KEY'):
+        if environ.get('SECRET_KEY'):
+            values['phone_hash_key'] = environ['SECRET_KEY']
+            logger.warning("PHONE_HASH_KEY is not set; phone hashes are keyed on SECRET_KEY, "
+                           "so changing SECRET_KEY will unlink every stored phone_hash")
+        else:
+            logger.warning("PHONE_HASH_KEY and SECRET_KEY are not set; phone hashes use a built-in key")
+    errors = []
+    for field, (env_name, parse) in _ENV.items():
+        raw = environ.get(env_name)
+        if raw is None or raw == '':
+            continue
+        try:
+            values[field] = parse(raw)
+        except ValueError:
+            errors.append(f"{env_name} has an invalid value {raw!r}")
+    if errors:
+        raise ValueError("Invalid configuration: " + "; ".join(errors))
+    settings = Settings(**values)
+    _validate(settings)
+    return settings
+
+
+# ==================== Process Settings ====================
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def init_settings():
+    """Build this process's settings (called by the app factories after load_dotenv)."""
+    global _settings
+    with _settings_lock:
+        _settings = load_settings()
+    return _settings
+
+
+def get_settings():
+    """Return this process's settings, loading them on first use."""
+    settings = _settings
+    if settings is None:
+        settings = init_settings()
+    return settings
+
+
+def reload_settings():
+    """
+    Re-read the environment and apply the RELOADABLE tunables.
+
+    Returns:
+        Settings: The settings now in effect (unchanged if the new values are invalid)
+    """
+    global _settings
+    from dotenv import load_dotenv
+    env_path = BASE_DIR / '.env'
+    if env_path.exists():
+        load_dotenv(dotenv_path=env_path, override=True)
+    current = get_settings()
+    try:
+        fresh = load_settings()
+    except ValueError as e:
+        logger.error(f"Settings reload rejected, keeping current values: {e}")
+        return current
+
+    changes = {}
+    for field in dataclasses.fields(Settings):
+        old, new = getattr(current, field.name), getattr(fresh, field.name)
+        if old == new:
+            continue
+        if field.name in RELOADABLE:
+            changes[field.name] = new
+        else:
+            logger.warning(f"{_ENV[field.name][0]} changed; restart to apply it")
+    if changes:
+        with _settings_lock:
+            _settings = dataclasses.replace(_settings, **changes)
+        logger.info(f"Settings reloaded: {', '.join(sorted(changes))}")
+    return _settings
+
+
+def _handle_sighup(signum, frame):
+    # Run outside the signal frame so logging/dotenv never re-enter a held lock
+    threading.Thread(target=reload_settings, name='settings-reload', daemon=True).start()
+
+
+def install_reload_handler():
+    """Reload tunables on SIGHUP (main thread only; no-op where SIGHUP doesn't exist)."""
+    if not hasattr(signal, 'SIGHUP') or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGHUP, _handle_sighup)
+    return True
@@ -0,0 +1,185 @@
+"""
+Slow Query Log for RentVerify
+
+Every statement run through db_service is timed. Statements slower than
+SLOW_QUERY_MS are appended as JSON lines to <instance>/slow_queries.jsonl
+(rotated by size) with their normalized SQL, parameter count, row count
+and the Flask endpoint that issued them.
+
+A sampled subset (SLOW_QUERY_EXPLAIN_RATE) also gets a query plan:
+- PostgreSQL: EXPLAIN (ANALYZE, BUFFERS) for plain reads, plain EXPLAIN
+  otherwise. ANALYZE runs the statement again, so anything that locks rows
+  or calls a function outside a short list of pure builtins (advisory
+  locks, pg_notify, nextval) only gets the estimated plan
+- SQLite: EXPLAIN QUERY PLAN
+
+Admins can browse the log at /admin/slow-queries.
+"""
+import os
+import re
+import json
+import random
+import sqlite3
+import logging
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from flask import request, has_request_context, render_template
+from services import db_service
+from utils.settings import get_settings
+
+LOG_FILENAME = 'slow_queries.jsonl'
+
+slow_logger = logging.getLogger('rentverify.slow_queries')
+slow_logger.propagate = False
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_SPACE_RE = re.compile(r'\s+')
+_CALL_RE = re.compile(r'\b([a-z_][a-z0-9_.]*)\s*\(')
+
+# Names that may precede '(' in a statement safe to run twice: SQL keywords
+# and builtins without side effects
+_PURE_CALLS = frozenset((
+    'select', 'from', 'join', 'on', 'using', 'where', 'and', 'or', 'not', 'in', 'exists',
+    'any', 'all', 'as', 'over', 'filter', 'values',
+    'count', 'sum', 'min', 'max', 'avg', 'coalesce', 'nullif', 'greatest', 'least',
+    'lower', 'upper', 'length', 'substr', 'substring', 'left', 'right', 'trim',
+    'cast', 'round', 'abs', 'date', 'date_trunc', 'extract', 'to_char',
+))
+
+
+@lru_cache(maxsize=512)
+def normalize_sql(query):
+    """Collapse whitespace and replace literals/placeholders with '?'."""
+    return _SPACE_RE.sub(' ', _LITERAL_RE.sub('?', query)).strip()
+
+
+def is_plain_read(query):
+    """True for a SELECT that takes no row locks and calls only pure builtins."""
+    sql = normalize_sql(query).lower()
+    if not sql.startswith('select') or re.search(r'\bfor\s+(update|share|no key|key)\b', sql):
+        return False
+    return all(name in _PURE_CALLS for name in _CALL_RE.findall(sql))
+
+
+def _explain(cursor, query, params):
+    """Capture a query plan on the connection that ran the statement."""
+    conn = cursor.connection
+    if isinstance(conn, sqlite3.Connection):
+        plan_cursor = conn.cursor()
+        plan_cursor.execute('EXPLAIN QUERY PLAN ' + query, params or ())
+        return [' '.join(str(col) for col in row) for row in plan_cursor.fetchall()]
+
+    # PostgreSQL: isolate the EXPLAIN so a failure can't abort the caller's transaction
+    prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if is_plain_read(query) else 'EXPLAIN '
+    plan_cursor = conn.cursor()
+    plan_cursor.execute('SAVEPOINT slow_query_explain')
+    try:
+        plan_cursor.execute(prefix + query, params)
+        plan = [row[0] for row in plan_cursor.fetchall()]
+        plan_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    except Exception:
+        plan_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        raise
+
+
+def _record_slow_query(cursor, query, params, seconds):
+    """Query listener: log statements above the threshold."""
+    settings = get_settings()
+    threshold_ms = settings.slow_query_ms
+    duration_ms = seconds * 1000
+    if duration_ms < threshold_ms:
+        return
+    rowcount = getattr(cursor, 'rowcount', -1)
+    entry = {
+        'logged_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'statement': db_service.statement_name(query),
+        'sql': normalize_sql(query),
+        'duration_ms': round(duration_ms, 2),
+        'param_count': len(params) if params else 0,
+        'row_count': rowcount if rowcount is not None and rowcount >= 0 else None,
+        'route': request.endpoint if has_request_context() else None,
+        'pid': os.getpid()
+    }
+    if random.random() < settings.slow_query_explain_rate:
+        try:
+            entry['plan'] = _explain(cursor, query, params)
+        except Exception as e:
+            entry['plan_error'] = str(e)
+    slow_logger.warning(json.dumps(entry))
+    logging.getLogger(__name__).warning(
+        f"Slow query ({entry['duration_ms']} ms, route {entry['route']}): {entry['statement']}"
+    )
+
+
+def read_slow_queries(log_path, limit=200):
+    """Return the newest `limit` entries from the current log file, newest first."""
+    if not os.path.exists(log_path):
+        return []
+    with open(log_path) as f:
+        lines = deque(f, maxlen=limit)
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def summarize_slow_queries(entries):
+    """Group entries by normalized SQL, worst total time first."""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['sql'], {
+            'sql': entry['sql'], 'statement': entry['statement'],
+            'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'routes': set()
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        if entry.get('route'):
+            group['routes'].add(entry['route'])
+    summary = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+    for group in summary:
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 2)
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['routes'] = ', '.join(sorted(group['routes']))
+    return summary
+
+
+def register_slow_query_log(app, login_required):
+    """
+    Start logging slow statements and add the admin page.
+
+    Args:
+        app (Flask): Application whose instance folder holds the log
+        login_required (func): Decorator protecting the admin page
+    """
+    log_path = os.path.join(app.instance_path, LOG_FILENAME)
+    if not slow_logger.handlers:
+        os.makedirs(app.instance_path, exist_ok=True)
+        handler = RotatingFileHandler(
+            log_path,
+            maxBytes=get_settings().slow_query_log_bytes,
+            backupCount=5
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        slow_logger.addHandler(handler)
+        slow_logger.setLevel(logging.WARNING)
+    db_service.add_query_listener(_record_slow_query)
+
+    @login_required
+    def slow_queries():
+        """Recent slow statements, grouped and raw."""
+        entries = read_slow_queries(log_path)
+        return render_template(
+            'slow_queries.html',
+            entries=entries,
+            summary=summarize_slow_queries(entries),
+            threshold_ms=get_settings().slow_query_ms
+        )
+
+    app.add_url_rule('/admin/slow-queries', 'slow_queries', slow_queries)
@@ -0,0 +1,123 @@
+"""
+Startup Timing for RentVerify
+
+Records how long each startup phase and each top-level import takes, and the
+time from process start to the first served request. The report is logged
+once the app is built and served to the logged-in admin at /health/startup.
+
+Target: the first request should complete within STARTUP_TARGET_MS (default
+2000 ms) of the worker process starting; slower starts are logged as warnings.
+"""
+import os
+import sys
+import time
+import logging
+import builtins
+from contextlib import contextmanager
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _process_start_offset():
+    """Seconds between process start and now, read from /proc when available."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+# perf_counter() value corresponding to the moment the process started
+PROCESS_STARTED = time.perf_counter() - _process_start_offset()
+
+_phases = []
+_imports = {}
+_state = {'ready_ms': None, 'first_request_ms': None}
+_original_import = builtins.__import__
+_import_depth = [0]
+
+
+def _timing_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """__import__ wrapper that attributes first-time import cost to top-level packages."""
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _import_depth[0] += 1
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth[0] -= 1
+        if _import_depth[0] == 0:
+            top = name.partition('.')[0]
+            _imports[top] = _imports.get(top, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def begin():
+    """Start recording import times (call as early as possible)."""
+    if builtins.__import__ is not _timing_import:
+        builtins.__import__ = _timing_import
+
+
+@contextmanager
+def phase(name):
+    """Time a named startup phase."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, round((time.perf_counter() - started) * 1000, 2)))
+
+
+def _target_ms():
+    return get_settings().startup_target_ms
+
+
+def report():
+    """Return the startup timing report as a dict."""
+    imports = sorted(_imports.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'pid': os.getpid(),
+        'app_ready_ms': _state['ready_ms'],
+        'first_request_ms': _state['first_request_ms'],
+        'target_ms': _target_ms(),
+        'phases': [{'name': name, 'ms': ms} for name, ms in _phases],
+        'imports': [{'module': module, 'ms': round(ms, 2)} for module, ms in imports[:25]]
+    }
+
+
+def finish(app, app_logger=None):
+    """
+    Stop recording imports, log the report and hook first-request timing.
+
+    Args:
+        app (Flask): The application that was just built
+        app_logger (Logger): Logger to report to (defaults to this module's)
+    """
+    log = app_logger or logger
+    if builtins.__import__ is _timing_import:
+        builtins.__import__ = _original_import
+    _state['ready_ms'] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
+    slowest = ', '.join(f"{m['module']} {m['ms']:.0f}ms" for m in report()['imports'][:5])
+    phases = ', '.join(f"{name} {ms:.0f}ms" for name, ms in _phases)
+    log.info(f"App ready {_state['ready_ms']} ms after process start (phases: {phases}; slowest imports: {slowest})")
+
+    @app.before_request
+    def _time_first_request():
+        if _state['first_request_ms'] is None:
+            _state['first_request_ms'] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
+            level = logging.WARNING if _state['first_request_ms'] > _target_ms() else logging.INFO
+            log.log(level, f"First request {_state['first_request_ms']} ms after process start (target {_target_ms():.0f} ms)")
+
+    # Module paths and timings are for admins, unlike the bare /health probes
+    from utils.auth import login_required
+
+    @app.route('/health/startup')
+    @login_required
+    def health_startup():
+        """Startup timing report for this worker (protected route)."""
+        from flask import jsonify
+        return jsonify(report())
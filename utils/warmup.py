@@ -0,0 +1,148 @@
+"""
+Warm-up for RentVerify Workers
+
+After a deploy or an idle spin-down the first webhook and dashboard load used
+to pay for DB connects, Jinja compilation of dashboard.html, Twilio client
+construction and lazy imports. The warm-up routine does that work up front:
+
+- opens and checks WARMUP_DB_CONNECTIONS pooled connections
+- compiles every template
+- builds the reply classifier and URL map
+- constructs the Twilio client (when credentials are configured)
+- loads the open verification requests into this worker's map
+- runs any extra steps registered with add_warmup_step()
+
+It runs in a background thread started by the app factory, and the gunicorn
+post_worker_init hook waits for it, so a worker accepts traffic only once
+warm. Until it finishes, /health/ready reports the app as not ready.
+"""
+import os
+import time
+import logging
+import threading
+from utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Tracks the warm-up thread and its results for one app."""
+
+    def __init__(self, app):
+        self.app = app
+        self.steps = [
+            ('db_connections', _warm_db_connections),
+            ('templates', _warm_templates),
+            ('reply_classifier', _warm_classifier),
+            ('url_map', _warm_url_map),
+            ('twilio_client', _warm_twilio_client),
+            ('verification_requests', _warm_verification_requests),
+        ]
+        self.results = {}
+        self.done = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start warming this process if it hasn't been (fork-safe)."""
+        pid = os.getpid()
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self.done.clear()
+            self._thread = threading.Thread(target=self.run, name='warm-up', daemon=True)
+            self._thread.start()
+
+    def run(self):
+        """Run every step, recording duration and any error; never raises."""
+        started = time.perf_counter()
+        results = {}
+        for name, step in list(self.steps):
+            step_started = time.perf_counter()
+            try:
+                detail = step(self.app)
+                results[name] = {'ok': True, 'ms': round((time.perf_counter() - step_started) * 1000, 1)}
+                if detail is not None:
+                    results[name]['detail'] = detail
+            except Exception as e:
+                results[name] = {'ok': False, 'error': str(e)}
+                logger.warning(f"Warm-up step '{name}' failed: {e}")
+        self.results = results
+        self.done.set()
+        logger.info(f"Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+        prober = self.app.extensions.get('health_prober')
+        if prober is not None:
+            prober.refresh()
+
+    def wait(self, timeout):
+        """Block until warm-up finishes or `timeout` seconds pass."""
+        self.ensure_started()
+        return self.done.wait(timeout)
+
+    def readiness_check(self):
+        """Health check: fail until warm-up has completed."""
+        if not self.done.is_set():
+            raise RuntimeError("Warm-up in progress")
+        return {'steps': self.results}
+
+
+# ==================== Steps ====================
+
+def _warm_db_connections(app):
+    from services import db_service
+    return {'opened': db_service.prewarm_pool(get_settings().warmup_db_connections)}
+
+
+def _warm_templates(app):
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return {'compiled': len(names)}
+
+
+def _warm_classifier(app):
+    from services.reply_classifier import get_classifier
+    get_classifier().classify('YES')
+
+
+def _warm_url_map(app):
+    app.url_map.update()
+    with app.test_request_context('/'):
+        pass
+
+
+def _warm_twilio_client(app):
+    settings = get_settings()
+    if not (settings.twilio_account_sid and settings.twilio_auth_token):
+        return {'skipped': 'credentials not configured'}
+    from services.twilio_service import get_twilio_client
+    get_twilio_client(settings.twilio_account_sid, settings.twilio_auth_token)
+
+
+def _warm_verification_requests(app):
+    from services import db_service, verification_service
+    conn = db_service.get_read_connection()
+    try:
+        return {'open': verification_service.load_open_requests(conn)}
+    finally:
+        db_service.close_db_connection(conn)
+
+
+# ==================== Registration ====================
+
+def add_warmup_step(app, name, step):
+    """Register an extra warm-up step, called as step(app)."""
+    app.extensions['warmup'].steps.append((name, step))
+
+
+def register_warmup(app):
+    """Gate readiness on warm-up and start it in the background."""
+    warmup = WarmUp(app)
+    app.extensions['warmup'] = warmup
+    prober = app.extensions.get('health_prober')
+    if prober is not None:
+        prober.add_check('warmup', warmup.readiness_check)
+    warmup.ensure_started()
+    return warmup